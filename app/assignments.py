@@ -1,36 +1,39 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from . import models, database, utils
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+from . import models, database, utils, loaders
 from datetime import datetime
 import os, shutil, uuid
 
 router = APIRouter(prefix="/assignments", tags=["Assignments"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
-# config for file saving
+# config for file saving (created by the app lifespan in main.py)
 MEDIA_DIR = "media/assignments"
-os.makedirs(MEDIA_DIR, exist_ok=True)
+
+def _save_upload(upload: UploadFile, dest: str):
+    # blocking file copy, run in the threadpool
+    with open(dest, "wb") as buffer:
+        shutil.copyfileobj(upload.file, buffer)
 
 # 1. Staff: create assignment (to class or to single student)
 # imports at top if needed
 
 
 @router.post("/create")
-def create_assignment(
+async def create_assignment(
     title: str = Form(...),
     description: Optional[str] = Form(None),
     class_id: Optional[int] = Form(None),
     assigned_to_student: Optional[int] = Form(None),
     due_date: Optional[datetime] = Form(None),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
 ):
     if current_user.role not in ["Admin", "Staff"]:
         raise HTTPException(status_code=403, detail="Only Staff/Admin can create assignments")
@@ -47,13 +50,15 @@ def create_assignment(
 
     # if class_id provided, check exists
     if class_id:
-        cls = db.query(models.Class).filter(models.Class.id == class_id).first()
+        cls = await db.get(models.Class, class_id)
         if not cls:
             raise HTTPException(status_code=404, detail="Class not found")
 
     # if assigned_to_student provided, check exists and role=Student
     if assigned_to_student:
-        student = db.query(models.User).filter(models.User.id == assigned_to_student, models.User.role == "Student").first()
+        student = (await db.execute(
+            select(models.User).where(models.User.id == assigned_to_student, models.User.role == "Student")
+        )).scalars().first()
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
 
@@ -66,15 +71,15 @@ def create_assignment(
         due_date=due_date
     )
     db.add(assignment)
-    db.commit()
-    db.refresh(assignment)
+    await db.commit()
+    await db.refresh(assignment)
     return {"message": "Assignment created", "assignment_id": assignment.id}
 
 # 2. Get assignments assigned to a student (student view)
 @router.get("/student/{student_id}")
-def get_assignments_for_student(student_id: int,
-                                db: Session = Depends(get_db),
-                                current_user: models.User = Depends(utils.get_current_user)):
+async def get_assignments_for_student(student_id: int,
+                                db: AsyncSession = Depends(get_db),
+                                current_user: models.User = Depends(get_current_user)):
     # allow student themselves, staff, admin
     if current_user.role == "Student" and current_user.id != student_id:
         raise HTTPException(status_code=403, detail="Not authorized")
@@ -82,17 +87,23 @@ def get_assignments_for_student(student_id: int,
         raise HTTPException(status_code=403, detail="Not authorized")
 
     # assignments assigned directly
-    direct = db.query(models.Assignment).filter(models.Assignment.assigned_to_student == student_id).all()
+    direct = (await db.execute(
+        select(models.Assignment).where(models.Assignment.assigned_to_student == student_id)
+    )).scalars().all()
 
     # assignments assigned to student's classes
-    student = db.query(models.User).filter(models.User.id == student_id).first()
+    student = (await db.execute(
+        select(models.User).where(models.User.id == student_id).options(selectinload(models.User.enrolled_classes))
+    )).scalars().first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
     class_ids = [c.id for c in student.enrolled_classes]  # from relationship
     class_assignments = []
     if class_ids:
-        class_assignments = db.query(models.Assignment).filter(models.Assignment.class_id.in_(class_ids)).all()
+        class_assignments = (await db.execute(
+            select(models.Assignment).where(models.Assignment.class_id.in_(class_ids))
+        )).scalars().all()
 
     # combine unique assignments
     assignments = {a.id: a for a in (direct + class_assignments)}.values()
@@ -112,19 +123,19 @@ def get_assignments_for_student(student_id: int,
 
 # 3. Student: submit assignment (upload screenshot optional + link optional)
 @router.post("/{assignment_id}/submit")
-def submit_assignment(
+async def submit_assignment(
     assignment_id: int,
     screenshot: Optional[UploadFile] = File(None),
     optional_link: Optional[str] = Form(None),
     comment: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
 ):
     # only students can submit (or Admin for testing)
     if current_user.role not in ["Student", "Admin"]:
         raise HTTPException(status_code=403, detail="Only Student can submit assignment")
 
-    assignment = db.query(models.Assignment).filter(models.Assignment.id == assignment_id).first()
+    assignment = await db.get(models.Assignment, assignment_id)
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
 
@@ -141,8 +152,7 @@ def submit_assignment(
         ext = os.path.splitext(screenshot.filename)[1] or ".png"
         fname = f"{uuid.uuid4().hex}{ext}"
         dest = os.path.join(MEDIA_DIR, fname)
-        with open(dest, "wb") as buffer:
-            shutil.copyfileobj(screenshot.file, buffer)
+        await run_in_threadpool(_save_upload, screenshot, dest)
         file_path = dest  # you may want to store relative path or URL
 
     # create submission
@@ -158,23 +168,27 @@ def submit_assignment(
     db.add(submission)
     # update assignment status (optional logic)
     assignment.status = models.AssignmentStatus.submitted
-    db.commit()
-    db.refresh(submission)
+    await db.commit()
+    await db.refresh(submission)
     return {"message": "Submitted", "submission_id": submission.id}
 
 # 4. Get submissions for an assignment (Staff/Admin)
 @router.get("/{assignment_id}/submissions")
-def get_submissions(assignment_id: int,
-                    db: Session = Depends(get_db),
-                    current_user: models.User = Depends(utils.get_current_user)):
+async def get_submissions(assignment_id: int,
+                    db: AsyncSession = Depends(get_db),
+                    current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Staff"]:
         raise HTTPException(status_code=403, detail="Only Staff/Admin can view submissions")
 
-    assignment = db.query(models.Assignment).filter(models.Assignment.id == assignment_id).first()
+    assignment = await db.get(models.Assignment, assignment_id)
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
 
-    subs = db.query(models.AssignmentSubmission).filter(models.AssignmentSubmission.assignment_id == assignment_id).all()
+    subs = (await db.execute(
+        select(models.AssignmentSubmission)
+        .where(models.AssignmentSubmission.assignment_id == assignment_id)
+        .options(*loaders.profile("submission_with_student"))
+    )).scalars().all()
     out = []
     for s in subs:
         out.append({
@@ -194,15 +208,15 @@ def get_submissions(assignment_id: int,
 
 # 5. Staff/Admin: grade/accept a submission
 @router.post("/submission/{submission_id}/grade")
-def grade_submission(submission_id: int,
+async def grade_submission(submission_id: int,
                      is_accepted: bool = Form(...),
                      grade_comment: Optional[str] = Form(None),
-                     db: Session = Depends(get_db),
-                     current_user: models.User = Depends(utils.get_current_user)):
+                     db: AsyncSession = Depends(get_db),
+                     current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Staff"]:
         raise HTTPException(status_code=403, detail="Only Staff/Admin can grade submissions")
 
-    sub = db.query(models.AssignmentSubmission).filter(models.AssignmentSubmission.id == submission_id).first()
+    sub = await db.get(models.AssignmentSubmission, submission_id)
     if not sub:
         raise HTTPException(status_code=404, detail="Submission not found")
 
@@ -211,12 +225,12 @@ def grade_submission(submission_id: int,
     sub.grader_id = current_user.id
     sub.graded_at = datetime.utcnow()
     # optionally update assignment status to graded/closed if you want
-    db.commit()
+    await db.commit()
     return {"message": "Submission graded"}
 
 @router.get("/my")
-def get_my_assignments(db: Session = Depends(get_db),
-                       current_user: models.User = Depends(utils.get_current_user)) -> List[dict]:
+async def get_my_assignments(db: AsyncSession = Depends(get_db),
+                       current_user: models.User = Depends(get_current_user)) -> List[dict]:
     """
     Staff can view the list of assignments they created.
     Admin can also view their own created assignments.
@@ -224,7 +238,9 @@ def get_my_assignments(db: Session = Depends(get_db),
     if current_user.role not in ["Staff", "Admin"]:
         raise HTTPException(status_code=403, detail="Only Staff/Admin can view their created assignments")
 
-    assignments = db.query(models.Assignment).filter(models.Assignment.created_by == current_user.id).all()
+    assignments = (await db.execute(
+        select(models.Assignment).where(models.Assignment.created_by == current_user.id)
+    )).scalars().all()
     return [
         {
             "id": a.id,
@@ -0,0 +1,143 @@
+# attempt_limits.py
+"""
+Sliding-window limit on failed punch attempts.
+
+A rejected punch (SSID/geo/IP mismatch) is recorded in an AttemptStore, not
+in the users table: the count is the number of failures in the last
+ATTEMPT_WINDOW_SECONDS, so old failures decay on their own. Only when it
+reaches ATTEMPT_LIMIT is the block decision written to the database
+(users.is_blocked, with the count kept in failed_attendance_attempts). A
+successful punch or an admin unblock clears the window.
+
+Stores (ATTEMPT_STORE):
+  memory  per process; with several uvicorn workers each keeps its own count,
+          so the effective limit is up to ATTEMPT_LIMIT per worker
+  sqlite  a small SQLite file shared by every worker on the host, by default
+          in /dev/shm (ATTEMPT_STORE_PATH), written in WAL mode
+
+Either way the hot path of a failure is a memory (or local-file) operation
+and never touches the application database.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from .config import settings
+
+PURGE_EVERY = 1000   # hits between sweeps of keys whose window has expired
+
+
+class MemoryStore:
+    """Timestamps of recent failures per key, in process memory."""
+
+    def __init__(self):
+        self._hits: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._since_purge = 0
+
+    def hit(self, key: str, now: float, window: float) -> int:
+        cutoff = now - window
+        with self._lock:
+            hits = self._hits.setdefault(key, deque())
+            while hits and hits[0] <= cutoff:
+                hits.popleft()
+            hits.append(now)
+            self._since_purge += 1
+            if self._since_purge >= PURGE_EVERY:
+                self._since_purge = 0
+                self._hits = {k: h for k, h in self._hits.items() if h and h[-1] > cutoff}
+            return len(hits)
+
+    def count(self, key: str, now: float, window: float) -> int:
+        with self._lock:
+            return sum(1 for t in self._hits.get(key, ()) if t > now - window)
+
+    def clear(self, key: str):
+        with self._lock:
+            self._hits.pop(key, None)
+
+
+class SQLiteStore:
+    """Failures in a local SQLite file, shared by the worker processes of one host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._since_purge = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")   # losing a few counts in a crash is fine
+            conn.execute("CREATE TABLE IF NOT EXISTS attempt_hits (key TEXT NOT NULL, at REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_attempt_hits_key_at ON attempt_hits (key, at)")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, now: float, window: float) -> int:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM attempt_hits WHERE key = ? AND at <= ?", (key, now - window))
+            conn.execute("INSERT INTO attempt_hits (key, at) VALUES (?, ?)", (key, now))
+            n = conn.execute("SELECT count(*) FROM attempt_hits WHERE key = ?", (key,)).fetchone()[0]
+            self._since_purge += 1
+            if self._since_purge >= PURGE_EVERY:
+                self._since_purge = 0
+                conn.execute("DELETE FROM attempt_hits WHERE at <= ?", (now - window,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return n
+
+    def count(self, key: str, now: float, window: float) -> int:
+        return self._conn().execute(
+            "SELECT count(*) FROM attempt_hits WHERE key = ? AND at > ?", (key, now - window)).fetchone()[0]
+
+    def clear(self, key: str):
+        self._conn().execute("DELETE FROM attempt_hits WHERE key = ?", (key,))
+
+
+def default_store_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "oddo-attempts.db")
+
+
+def make_store(kind: str = settings.ATTEMPT_STORE, path: Optional[str] = None):
+    if kind == "memory":
+        return MemoryStore()
+    if kind == "sqlite":
+        return SQLiteStore(path or settings.ATTEMPT_STORE_PATH or default_store_path())
+    raise ValueError(f"Unknown ATTEMPT_STORE {kind!r} (expected 'memory' or 'sqlite')")
+
+
+class FailedAttemptLimiter:
+    def __init__(self, store=None, limit: int = settings.ATTEMPT_LIMIT,
+                 window_seconds: float = settings.ATTEMPT_WINDOW_SECONDS):
+        self.store = store if store is not None else make_store()
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"punch:{user_id}"
+
+    def record_failure(self, user_id: int) -> int:
+        """Count this failure; returns the failures in the current window, this one included."""
+        return self.store.hit(self._key(user_id), time.time(), self.window_seconds)
+
+    def failures(self, user_id: int) -> int:
+        return self.store.count(self._key(user_id), time.time(), self.window_seconds)
+
+    def clear(self, user_id: int):
+        self.store.clear(self._key(user_id))
+
+
+limiter = FailedAttemptLimiter()
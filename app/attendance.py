@@ -1,28 +1,22 @@
 # attendance.py
-from typing import Optional, List
+import importlib.util
+from bisect import bisect_right, insort
+from typing import Literal, Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Request, Body, Header, Query
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime
-from . import models, database, utils
+from datetime import date, datetime, time, timedelta, timezone
+from . import models, database, attempt_limits, attendance_report, attendance_rollup, geofence, network_policy, pagination, sqlfuncs, utils
 from .config import settings
-from .attendance_utils import (
-    get_allowed_ssids,
-    extract_ssid,
-    haversine_distance_m,
-    get_client_ip,
-    is_ip_allowed,
-    is_client_on_router_network,
-)
+from .attendance_utils import extract_ssid, get_client_ip
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 # ----------------- Pydantic payloads -----------------
 class PunchPayload(BaseModel):
@@ -49,238 +43,465 @@ class AdminMarkOutPayload(BaseModel):
     punch_out_time: Optional[str] = None   # ISO string (optional). If omitted, server time UTC used.
     ip: Optional[str] = None
 
+class PunchEvent(BaseModel):
+    type: Literal["in", "out"]
+    client_ts: datetime   # when the device recorded the punch; naive = UTC
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    ssid: Optional[str] = None
+    ip: Optional[str] = None
+    note: Optional[str] = None
+
+class PunchBatchPayload(BaseModel):
+    events: List[PunchEvent] = Field(..., min_length=1, max_length=500)
+
 # ----------------- Settings -----------------
-MAX_ATTEMPTS = int(getattr(settings, "ATTEMPT_LIMIT", 15))
-OFFICE_LAT = float(getattr(settings, "OFFICE_LAT", 0.0))
-OFFICE_LNG = float(getattr(settings, "OFFICE_LNG", 0.0))
-ALLOWED_RADIUS_METERS = int(getattr(settings, "ALLOWED_RADIUS_METERS", 150))
+MAX_ATTEMPTS = int(getattr(settings, "ATTEMPT_LIMIT", 15))   # within ATTEMPT_WINDOW_SECONDS
+PUNCH_RETRY_SECONDS = 60   # a punch-out this soon after the last one is a retry, not a new record
+BATCH_MAX_AGE_DAYS = 7   # offline punches older than this are not accepted
+BATCH_CLOCK_SKEW_SECONDS = 300   # device clocks may run this far ahead of the server
+# geofence: the sites table, or OFFICE_LAT/OFFICE_LNG/ALLOWED_RADIUS_METERS (see geofence.py)
 
 # ----------------- Helpers -----------------
-def is_ssid_allowed(ssid: Optional[str]) -> bool:
-    if not ssid:
-        return False
-    ss = ssid.strip().lower()
-    allowed = [a.strip().lower() for a in get_allowed_ssids()]
-    return ss in allowed
-
-def check_and_increment_fail(db: Session, user: models.User, reason_msg: str):
-    """Increment failed attempts, possibly block, commit and raise HTTPException."""
-    user.failed_attendance_attempts = (user.failed_attendance_attempts or 0) + 1
-    if user.failed_attendance_attempts >= MAX_ATTEMPTS:
+async def block_user(db: AsyncSession, user_id: int, failures: int):
+    """Write the block decision (with the failure count), revoke the user's tokens and commit."""
+    user = (await db.execute(
+        select(models.User).where(models.User.id == user_id).with_for_update()
+        .execution_options(populate_existing=True)
+    )).scalar_one_or_none()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not user.is_blocked:
         user.is_blocked = True
-    db.add(user)
-    db.commit()
-    remaining = max(0, MAX_ATTEMPTS - user.failed_attendance_attempts)
-    if user.is_blocked:
-        raise HTTPException(status_code=403, detail=f"{reason_msg} You have been blocked after {MAX_ATTEMPTS} failed attempts.")
-    else:
-        raise HTTPException(status_code=403, detail=f"{reason_msg} Attempts left: {remaining}")
+        user.failed_attendance_attempts = failures
+        # tokens carry the blocked flag in stateless mode: force a fresh login
+        email = user.email
+        utils.revoke_user_tokens(db, user.id, email)
+        await db.commit()
+        utils.invalidate_principal(email)
+
+async def check_and_increment_fail(db: AsyncSession, user_id: int, reason_msg: str):
+    """
+    Count a failed punch in the sliding window (attempt_limits.py, no DB write) and
+    raise 403. Reaching MAX_ATTEMPTS blocks the user: that decision, with the count,
+    is the only thing written to the users table.
+    """
+    failures = attempt_limits.limiter.record_failure(user_id)
+    if failures < MAX_ATTEMPTS:
+        raise HTTPException(status_code=403, detail=f"{reason_msg} Attempts left: {MAX_ATTEMPTS - failures}")
+    await block_user(db, user_id, failures)
+    raise HTTPException(status_code=403, detail=f"{reason_msg} You have been blocked after {MAX_ATTEMPTS} failed attempts.")
+
+def _failure_reason(verdict: geofence.Verdict) -> str:
+    reasons = []
+    if not verdict.ssid_ok:
+        reasons.append("SSID mismatch")
+    if not verdict.geo_ok:
+        reasons.append("location outside allowed area")
+    if not verdict.ip_ok:
+        reasons.append("network IP not allowed")
+    return " and ".join(reasons) + "."
+
+async def begin_punch(db: AsyncSession, user_id: int, clear_failures: bool = True):
+    """
+    First write of a successful punch: reset failed attempts (the column and, with
+    clear_failures, the sliding window), unless the user is blocked. The UPDATE
+    takes the user's row lock (on SQLite the database write lock) until the punch
+    commits, so concurrent punches by one user - double taps, client retries -
+    run one after the other and each sees the other's row.
+    """
+    U = models.User
+    result = await db.execute(
+        update(U).where(U.id == user_id, U.is_blocked == False)
+        .values(failed_attendance_attempts=0)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        if await db.get(U, user_id) is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=403, detail="Your account is blocked due to multiple failed attempts. Contact admin.")
+    if clear_failures:
+        attempt_limits.limiter.clear(user_id)
+
+async def latest_open_session(db: AsyncSession, user_id: int) -> Optional[models.Attendance]:
+    # locking read: sees sessions committed by a punch we waited for (InnoDB snapshots predate the lock)
+    A = models.Attendance
+    return (await db.execute(
+        select(A).where(A.user_id == user_id, A.punch_out_time.is_(None))
+        .order_by(A.punch_in_time.desc(), A.id.desc()).limit(1).with_for_update()
+    )).scalar_one_or_none()
+
+async def recent_punch_out(db: AsyncSession, user_id: int, now: datetime) -> Optional[models.Attendance]:
+    A = models.Attendance
+    return (await db.execute(
+        select(A).where(A.user_id == user_id, A.punch_out_time >= now - timedelta(seconds=PUNCH_RETRY_SECONDS))
+        .order_by(A.punch_out_time.desc(), A.id.desc()).limit(1).with_for_update()
+    )).scalar_one_or_none()
+
+def _duration(att: models.Attendance) -> Optional[int]:
+    if att.punch_in_time and att.punch_out_time:
+        return max(0, int((att.punch_out_time - att.punch_in_time).total_seconds()))
+    return None
 
 # ----------------- Endpoints -----------------
 
 @router.post("/punch-in")
-def punch_in(
+async def punch_in(
     payload: PunchPayload = Body(...),
     request: Request = None,
     x_client_ssid: Optional[str] = Header(None, alias="X-Client-SSID"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
     Punch-in requires SSID, geo, and network IP to match allowed values.
     Router-network based check is supported (ALLOWED_ROUTER_IPS).
+    With sites configured, all three are checked against the site containing
+    the coordinate and its id is recorded on the row.
+    One transaction: a repeated punch-in while a session is open returns that
+    session instead of opening a second one.
     """
     # role-based optional restriction (adjust as needed)
     if getattr(current_user, "role", None) not in ["Developer", "Tester", "SEO", "HR", "Accountant","Student","Staff","Intern", None]:
         raise HTTPException(status_code=403, detail="Not allowed to punch in")
 
-    user = db.query(models.User).filter(models.User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    if getattr(user, "is_blocked", False):
+    if getattr(current_user, "is_blocked", False):
         raise HTTPException(status_code=403, detail="Your account is blocked due to multiple failed attempts. Contact admin.")
 
-    # SSID check
     ssid = extract_ssid(request, payload.ssid, x_client_ssid)
-    ssid_ok = is_ssid_allowed(ssid)
-
-    # Geo check
     lat = payload.latitude
     lng = payload.longitude
-    geo_ok = False
-    if lat is not None and lng is not None:
-        dist_m = haversine_distance_m(lat, lng, OFFICE_LAT, OFFICE_LNG)
-        geo_ok = dist_m <= ALLOWED_RADIUS_METERS
-
     # IP check — prefer payload.ip (manual tests) else read headers/request
     client_ip = (payload.ip or "").strip() or get_client_ip(request)
-    ip_allowed_direct = is_ip_allowed(client_ip)
-    ip_allowed_router_net = is_client_on_router_network(client_ip)
-    ip_ok = ip_allowed_direct or ip_allowed_router_net
-
-    if not (ssid_ok and geo_ok and ip_ok):
-        # build reason string
-        reasons = []
-        if not ssid_ok:
-            reasons.append("SSID mismatch")
-        if not geo_ok:
-            reasons.append("location outside allowed area")
-        if not ip_ok:
-            reasons.append("network IP not allowed")
-        reason = " and ".join(reasons) + "."
-        check_and_increment_fail(db, user, reason)
-
-    # success -> reset attempts and record attendance (punch-in)
-    user.failed_attendance_attempts = 0
-    db.add(user)
-    db.commit()
+
+    # SSID, geo and IP checks against the site the coordinate falls in (see geofence.py)
+    verdict = await db.run_sync(geofence.check_location, lat, lng, ssid, client_ip)
+    if not verdict.ok:
+        await check_and_increment_fail(db, current_user.id, _failure_reason(verdict))
+
+    # success -> reset attempts (and lock the user) and record attendance (punch-in)
+    await begin_punch(db, current_user.id)
+    now = datetime.utcnow()
+    open_att = await latest_open_session(db, current_user.id)
+    if open_att and open_att.punch_in_time and \
+            (now - open_att.punch_in_time).total_seconds() < attendance_rollup.MAX_SESSION_SECONDS:
+        # double tap / retry: the session is already open (older open rows are forgotten punch-outs)
+        response = {
+            "message": "Already punched in",
+            "attendance_id": open_att.id,
+            "punch_in_time": open_att.punch_in_time.isoformat(),
+            "client_ip": client_ip,
+            "site_id": open_att.site_id,
+        }
+        await db.commit()
+        return response
 
     att = models.Attendance(
-        user_id=user.id,
-        punch_in_time=datetime.utcnow(),
+        user_id=current_user.id,
+        punch_in_time=now,
         latitude=lat,
         longitude=lng,
         ssid=ssid,
+        site_id=verdict.site_id,
         note=payload.note or "punch-in",
     )
     db.add(att)
-    db.commit()
-    db.refresh(att)
-
-    return {
+    await db.flush()
+    response = {
         "message": "Attendance recorded (punch-in)",
         "attendance_id": att.id,
         "punch_in_time": att.punch_in_time.isoformat(),
         "client_ip": client_ip,
+        "site_id": att.site_id,
     }
+    await db.commit()
+    return response
 
 @router.post("/punch-out")
-def punch_out(
+async def punch_out(
     payload: PunchPayload = Body(...),
     request: Request = None,
     x_client_ssid: Optional[str] = Header(None, alias="X-Client-SSID"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
+    """
+    Close the latest open session, in one transaction. A repeated punch-out within
+    PUNCH_RETRY_SECONDS returns the session it closed; with no open session and no
+    recent punch-out, a punch-out-only row is recorded.
+    """
     # require authenticated user and check blocked flag
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
-
-    user = db.query(models.User).filter(models.User.id == current_user.id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if getattr(user, "is_blocked", False):
+    if getattr(current_user, "is_blocked", False):
         raise HTTPException(status_code=403, detail="Your account is blocked.")
 
-    # validation checks (SSID, geo, IP) - same logic as before
+    # validation checks (SSID, geo, IP) - same logic as punch-in
     ssid = extract_ssid(request, payload.ssid, x_client_ssid)
-    ssid_ok = is_ssid_allowed(ssid)
-
     lat = payload.latitude
     lng = payload.longitude
-    geo_ok = False
-    if lat is not None and lng is not None:
-        dist_m = haversine_distance_m(lat, lng, OFFICE_LAT, OFFICE_LNG)
-        geo_ok = dist_m <= ALLOWED_RADIUS_METERS
-
     client_ip = (payload.ip or "").strip() or get_client_ip(request)
-    ip_allowed_direct = is_ip_allowed(client_ip)
-    ip_allowed_router_net = is_client_on_router_network(client_ip)
-    ip_ok = ip_allowed_direct or ip_allowed_router_net
-
-    if not (ssid_ok and geo_ok and ip_ok):
-        reasons = []
-        if not ssid_ok:
-            reasons.append("SSID mismatch")
-        if not geo_ok:
-            reasons.append("location outside allowed area")
-        if not ip_ok:
-            reasons.append("network IP not allowed")
-        reason = " and ".join(reasons) + "."
-        check_and_increment_fail(db, user, reason)
-
-    # success -> reset attempts
-    user.failed_attendance_attempts = 0
-    db.add(user)
-    db.commit()
+    verdict = await db.run_sync(geofence.check_location, lat, lng, ssid, client_ip)
+    if not verdict.ok:
+        await check_and_increment_fail(db, current_user.id, _failure_reason(verdict))
 
+    # success -> reset attempts (and lock the user)
+    await begin_punch(db, current_user.id)
     now = datetime.utcnow()
 
-    # Try to find latest open attendance row for this user (no punch_out_time)
-    open_att = (
-        db.query(models.Attendance)
-        .filter(models.Attendance.user_id == user.id)
-        .filter((models.Attendance.punch_out_time == None) | (models.Attendance.punch_out_time == ""))
-        .order_by(models.Attendance.punch_in_time.desc())
-        .first()
-    )
+    # latest open attendance row for this user (no punch_out_time), via ix_attendance_open
+    open_att = await latest_open_session(db, current_user.id)
 
     if open_att:
         # Update existing row with punch_out_* columns
         open_att.punch_out_time = now
-        if hasattr(open_att, "punch_out_lat"):
-            open_att.punch_out_lat = lat
-        if hasattr(open_att, "punch_out_lng"):
-            open_att.punch_out_lng = lng
-        if hasattr(open_att, "punch_out_ip"):
-            open_att.punch_out_ip = client_ip
-        if hasattr(open_att, "punch_out_ssid"):
-            open_att.punch_out_ssid = ssid
+        open_att.punch_out_lat = lat
+        open_att.punch_out_lng = lng
+        open_att.punch_out_ip = client_ip
+        open_att.punch_out_ssid = ssid
         open_att.note = payload.note or (open_att.note or "") + " | punch-out"
-        open_att.updated_at = datetime.utcnow() if hasattr(open_att, "updated_at") else open_att.updated_at
-        db.add(open_att)
-        db.commit()
-        db.refresh(open_att)
-
-        # compute duration if punch_in_time exists
-        duration_seconds = None
-        if open_att.punch_in_time and open_att.punch_out_time:
-            delta = open_att.punch_out_time - open_att.punch_in_time
-            duration_seconds = int(delta.total_seconds()) if delta.total_seconds() >= 0 else 0
-
-        return {
+        if open_att.site_id is None:
+            open_att.site_id = verdict.site_id
+        open_att.updated_at = now
+        await db.run_sync(attendance_rollup.refresh_day, current_user.id, attendance_rollup.day_of(open_att))
+        response = {
             "message": "Punch-out updated on existing record",
             "attendance_id": open_att.id,
             "punch_in_time": open_att.punch_in_time.isoformat() if open_att.punch_in_time else None,
-            "punch_out_time": open_att.punch_out_time.isoformat() if open_att.punch_out_time else None,
-            "duration_seconds": duration_seconds,
+            "punch_out_time": open_att.punch_out_time.isoformat(),
+            "duration_seconds": _duration(open_att),
             "client_ip": client_ip,
+            "site_id": open_att.site_id,
         }
-    else:
-        # No open row found — create a new row containing punch_out_* only
-        att = models.Attendance(
-            user_id=user.id,
-            date=now.date() if hasattr(models.Attendance, "date") else None,
-            punch_out_time=now,
-            punch_out_lat=lat if hasattr(models.Attendance, "punch_out_lat") else None,
-            punch_out_lng=lng if hasattr(models.Attendance, "punch_out_lng") else None,
-            punch_out_ip=client_ip if hasattr(models.Attendance, "punch_out_ip") else None,
-            punch_out_ssid=ssid if hasattr(models.Attendance, "punch_out_ssid") else None,
-            note=payload.note or "punch-out (no open in)",
-        )
-        db.add(att)
-        db.commit()
-        db.refresh(att)
-        return {
-            "message": "Punch-out recorded as new record (no open punch-in found)",
-            "attendance_id": att.id,
-            "punch_out_time": att.punch_out_time.isoformat() if att.punch_out_time else None,
+        await db.commit()
+        return response
+
+    recent = await recent_punch_out(db, current_user.id, now)
+    if recent:
+        # double tap / retry of a punch-out that already went through
+        response = {
+            "message": "Already punched out",
+            "attendance_id": recent.id,
+            "punch_in_time": recent.punch_in_time.isoformat() if recent.punch_in_time else None,
+            "punch_out_time": recent.punch_out_time.isoformat(),
+            "duration_seconds": _duration(recent),
             "client_ip": client_ip,
+            "site_id": recent.site_id,
         }
+        await db.commit()
+        return response
 
+    # No open row found — create a new row containing punch_out_* only
+    att = models.Attendance(
+        user_id=current_user.id,
+        date=now.date(),
+        punch_out_time=now,
+        punch_out_lat=lat,
+        punch_out_lng=lng,
+        punch_out_ip=client_ip,
+        punch_out_ssid=ssid,
+        site_id=verdict.site_id,
+        note=payload.note or "punch-out (no open in)",
+    )
+    db.add(att)
+    await db.run_sync(attendance_rollup.refresh_day, current_user.id, attendance_rollup.day_of(att))
+    response = {
+        "message": "Punch-out recorded as new record (no open punch-in found)",
+        "attendance_id": att.id,
+        "punch_out_time": att.punch_out_time.isoformat(),
+        "client_ip": client_ip,
+        "site_id": att.site_id,
+    }
+    await db.commit()
+    return response
+
+def _utc_naive(ts: datetime) -> datetime:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+async def _sessions_between(db: AsyncSession, user_id: int, start: datetime, end: datetime) -> List[models.Attendance]:
+    """The user's records with a punch in [start, end] (or a session spanning it), for dropping re-sent events."""
+    A = models.Attendance
+    return (await db.execute(
+        select(A).where(
+            A.user_id == user_id,
+            or_(A.punch_in_time.between(start - timedelta(seconds=attendance_rollup.MAX_SESSION_SECONDS), end),
+                A.punch_out_time.between(start, end)),
+        )
+    )).scalars().all()
 
+@router.post("/punch-batch")
+async def punch_batch(
+    payload: PunchBatchPayload = Body(...),
+    request: Request = None,
+    x_client_ssid: Optional[str] = Header(None, alias="X-Client-SSID"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Upload punches queued by a device while offline, stamped with the device's
+    clock (client_ts). All events are validated in one pass (geofence.check_locations,
+    vectorised haversine), paired in time order into sessions - an "in" opens one,
+    the next "out" closes it, continuing the user's open session if there is one -
+    and the new rows are written with a single INSERT, in one transaction.
+
+    Per event the result is recorded, duplicate (already on record: re-sent
+    batches and double taps are safe) or rejected with a reason. Rejected
+    SSID/geo/IP checks count as ONE failed attempt for the whole batch; if that
+    reaches the limit the user is blocked and nothing is recorded.
+    """
+    if getattr(current_user, "role", None) not in ["Developer", "Tester", "SEO", "HR", "Accountant","Student","Staff","Intern", None]:
+        raise HTTPException(status_code=403, detail="Not allowed to punch in")
+    if getattr(current_user, "is_blocked", False):
+        raise HTTPException(status_code=403, detail="Your account is blocked due to multiple failed attempts. Contact admin.")
+
+    now = datetime.utcnow()
+    oldest = now - timedelta(days=BATCH_MAX_AGE_DAYS)
+    newest = now + timedelta(seconds=BATCH_CLOCK_SKEW_SECONDS)
+    request_ip = get_client_ip(request)
+    header_ssid = extract_ssid(request, None, x_client_ssid)
+
+    results = [{"index": i, "type": ev.type, "status": None, "reason": None} for i, ev in enumerate(payload.events)]
+    events = []   # (index, event, UTC time, ssid, ip) still to validate
+    for i, ev in enumerate(payload.events):
+        ts = _utc_naive(ev.client_ts)
+        results[i]["client_ts"] = ts.isoformat()
+        if ts < oldest:
+            results[i].update(status="rejected", reason=f"older than {BATCH_MAX_AGE_DAYS} days")
+        elif ts > newest:
+            results[i].update(status="rejected", reason="timestamp is in the future")
+        else:
+            # a device clock slightly ahead is pulled back to the server's
+            events.append((i, ev, min(ts, now), ev.ssid or header_ssid, (ev.ip or "").strip() or request_ip))
+
+    verdicts = await db.run_sync(geofence.check_locations, [(ev.latitude, ev.longitude, ssid, ip) for _, ev, _, ssid, ip in events])
+    accepted = []
+    for event, verdict in zip(events, verdicts):
+        if verdict.ok:
+            accepted.append((event, verdict))
+        else:
+            results[event[0]].update(status="rejected", reason=_failure_reason(verdict))
+
+    rejected_checks = len(events) - len(accepted)
+    if rejected_checks:
+        # one failed attempt per batch, whether or not some of its punches passed
+        reason_msg = f"{rejected_checks} punch(es) rejected."
+        failures = attempt_limits.limiter.record_failure(current_user.id)
+        if failures >= MAX_ATTEMPTS:
+            await block_user(db, current_user.id, failures)
+            raise HTTPException(status_code=403, detail=f"{reason_msg} You have been blocked after {MAX_ATTEMPTS} failed attempts.")
+        if not accepted:
+            raise HTTPException(status_code=403, detail=f"{reason_msg} Attempts left: {MAX_ATTEMPTS - failures}")
+
+    rows: List[dict] = []
+    closed: List[models.Attendance] = []
+    if accepted:
+        await begin_punch(db, current_user.id, clear_failures=not rejected_checks)
+        accepted.sort(key=lambda a: (a[0][2], a[0][0]))
+        first_ts = accepted[0][0][2]
+        db_open = await latest_open_session(db, current_user.id)
+        known = await _sessions_between(db, current_user.id, first_ts - timedelta(seconds=PUNCH_RETRY_SECONDS), accepted[-1][0][2])
+        known_ins = {att.punch_in_time: att for att in known if att.punch_in_time}
+        known_outs = sorted(att.punch_out_time for att in known if att.punch_out_time)
+        spans = [(att.punch_in_time, att.punch_out_time) for att in known if att.punch_in_time and att.punch_out_time]
+
+        def field(session, name):
+            return getattr(session, name) if isinstance(session, models.Attendance) else session[name]
+
+        open_session = None   # open session at the current event's time: a DB row or a new row (dict)
+        for (i, ev, ts, ssid, ip), verdict in accepted:
+            result = results[i]
+            if db_open is not None and db_open.punch_in_time and ts >= db_open.punch_in_time:
+                # events after the user's open session continue it (a pending batch session before it stays open)
+                open_session, db_open = db_open, None
+            if ev.type == "in":
+                if ts in known_ins:
+                    # re-sent: carry on from that session, as the first upload did
+                    att = known_ins[ts]
+                    open_session = att if field(att, "punch_out_time") is None else None
+                    result.update(status="duplicate", reason="already recorded")
+                    continue
+                in_session = any(start <= ts <= end for start, end in spans) or open_session is not None and \
+                    (ts - field(open_session, "punch_in_time")).total_seconds() < attendance_rollup.MAX_SESSION_SECONDS
+                if in_session:
+                    result.update(status="duplicate", reason="already punched in")
+                    continue
+                open_session = {
+                    "user_id": current_user.id, "date": None,
+                    "punch_in_time": ts, "latitude": ev.latitude, "longitude": ev.longitude, "ssid": ssid,
+                    "punch_in_ip": ip, "punch_out_time": None, "punch_out_lat": None, "punch_out_lng": None,
+                    "punch_out_ip": None, "punch_out_ssid": None, "site_id": verdict.site_id,
+                    "note": ev.note or "punch-in (offline)",
+                }
+                rows.append(open_session)
+                known_ins[ts] = open_session
+                result["status"] = "recorded"
+                continue
+
+            # "out": a punch-out just after one already on record is a retry
+            j = bisect_right(known_outs, ts)
+            if j and (ts - known_outs[j - 1]).total_seconds() < PUNCH_RETRY_SECONDS:
+                result.update(status="duplicate", reason="already punched out")
+                continue
+            out = {"punch_out_time": ts, "punch_out_lat": ev.latitude, "punch_out_lng": ev.longitude,
+                   "punch_out_ip": ip, "punch_out_ssid": ssid}
+            if isinstance(open_session, models.Attendance):
+                for key, value in out.items():
+                    setattr(open_session, key, value)
+                open_session.note = ev.note or (open_session.note or "") + " | punch-out (offline)"
+                if open_session.site_id is None:
+                    open_session.site_id = verdict.site_id
+                open_session.updated_at = now
+                closed.append(open_session)
+            elif open_session is not None:
+                open_session.update(out)
+                if ev.note:
+                    open_session["note"] = ev.note
+            else:
+                rows.append({
+                    "user_id": current_user.id, "date": ts.date(),
+                    "punch_in_time": None, "latitude": None, "longitude": None, "ssid": None, "punch_in_ip": None,
+                    **out, "site_id": verdict.site_id, "note": ev.note or "punch-out (offline, no open in)",
+                })
+            open_session = None
+            insort(known_outs, ts)
+            result["status"] = "recorded"
+
+        if rows:
+            # one multi-row INSERT for the whole batch
+            await db.execute(insert(models.Attendance), rows)
+        days = {attendance_rollup.day_of(att) for att in closed}
+        days.update((row["punch_in_time"] or row["punch_out_time"]).date() for row in rows)
+        for day in sorted(days):
+            await db.run_sync(attendance_rollup.refresh_day, current_user.id, day)
+        await db.commit()
+
+    counts = {status: sum(r["status"] == status for r in results) for status in ("recorded", "duplicate", "rejected")}
+    return {
+        "message": "Punch batch processed",
+        **counts,
+        "sessions_created": len(rows),
+        "sessions_closed": len(closed),
+        "results": results,
+    }
 
 @router.get("/me")
-def my_attendance(
+async def my_attendance(
     limit: int = Query(50, ge=1, le=500),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    date_from: Optional[date] = Query(None, description="first day (UTC) to include"),
+    date_to: Optional[date] = Query(None, description="last day (UTC) to include"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
-    Return attendance records for current user.
-    - If DB has punch_out_time column, calculate per-row durations (preferred).
-    - Otherwise fallback to pairing separate rows by note detection.
+    Return the current user's attendance, newest first, one keyset page at a time.
+    - Pass next_cursor back as `cursor` for the following page (null on the last one).
+    - date_from/date_to filter on the punch-in day (punch-out-only rows: the punch-out day).
+    - total_work_seconds covers the whole date range when one is given (SQL SUM),
+      otherwise the rows on this page.
     """
     def format_duration_seconds(sec: Optional[int]) -> Optional[str]:
         if sec is None:
@@ -290,148 +511,153 @@ def my_attendance(
         s = sec % 60
         return f"{h:02d}:{m:02d}:{s:02d}"
 
-    # Fetch rows newest-first (we'll slice by limit later)
-    rows = (
-        db.query(models.Attendance)
-        .filter(models.Attendance.user_id == current_user.id)
-        .order_by(models.Attendance.punch_in_time.desc())
-        .all()
-    )
-
-    # Preferred branch: per-row punch_in_time + punch_out_time columns exist
-    if hasattr(models.Attendance, "punch_out_time"):
-        pairs = []
-        total_seconds = 0
-        for r in rows[:limit]:
-            in_time = getattr(r, "punch_in_time", None)
-            out_time = getattr(r, "punch_out_time", None)
-            duration_sec = None
-            if in_time and out_time:
-                delta = out_time - in_time
-                duration_sec = max(0, int(delta.total_seconds()))
-                total_seconds += duration_sec
-            pairs.append({
-                "punch_in_time": in_time.isoformat() if in_time else None,
-                "punch_out_time": out_time.isoformat() if out_time else None,
-                "duration_seconds": duration_sec,
-                "duration": format_duration_seconds(duration_sec) if duration_sec is not None else None,
-                "in_id": getattr(r, "id", None),
-                "out_id": getattr(r, "id", None),
-                "punch_in_lat": getattr(r, "punch_in_lat", None) or getattr(r, "latitude", None),
-                "punch_out_lat": getattr(r, "punch_out_lat", None),
-                "punch_in_ip": getattr(r, "punch_in_ip", None),
-                "punch_out_ip": getattr(r, "punch_out_ip", None),
-                "note": getattr(r, "note", None),
-            })
-        return {
-            "count": len(pairs),
-            "total_work_seconds": total_seconds,
-            "total_work_time": format_duration_seconds(total_seconds) if total_seconds else "00:00:00",
-            "pairs": pairs,
-        }
-
-    # Fallback branch: older schema using separate rows (pairing by notes)
-    # We'll operate ascending so pairing logic is straightforward
-    rows_asc = list(reversed(rows))
+    A = models.Attendance
 
-    def note_is_punch_in(note: Optional[str]) -> bool:
-        if not note:
-            return False
-        s = str(note).lower()
-        return "punch-in" in s or s.strip() in ("in", "punchin", "punch in") or "in office" in s
+    def in_range(column):
+        filters = []
+        if date_from is not None:
+            filters.append(column >= datetime.combine(date_from, time.min))
+        if date_to is not None:
+            filters.append(column < datetime.combine(date_to + timedelta(days=1), time.min))
+        return filters
 
-    def note_is_punch_out(note: Optional[str]) -> bool:
-        if not note:
-            return False
-        s = str(note).lower()
-        return "punch-out" in s or s.strip() in ("out", "punchout", "punch out") or "leaving" in s
+    # seeks on ix_attendance_user_punch_in; punch-out-only rows (no punch_in_time) come last
+    stmt = select(A).where(A.user_id == current_user.id, *in_range(A.punch_in_time))
+    undated = select(A).where(A.user_id == current_user.id, *in_range(A.punch_out_time))
+    rows, next_cursor = await db.run_sync(pagination.fetch_page, stmt, A.punch_in_time, A.id, cursor, limit, undated_stmt=undated)
 
     pairs = []
-    total_seconds = 0
-    pending_in = None
-
-    for r in rows_asc:
-        note = getattr(r, "note", "") or ""
-        if pending_in is None:
-            if note_is_punch_in(note) or not note_is_punch_out(note):
-                pending_in = r
-                continue
-            else:
-                # standalone punch-out without an earlier in
-                out_time = getattr(r, "punch_in_time", None)
-                pairs.append({
-                    "punch_in_time": None,
-                    "punch_out_time": out_time.isoformat() if out_time else None,
-                    "duration_seconds": None,
-                    "duration": None,
-                    "in_id": None,
-                    "out_id": getattr(r, "id", None),
-                    "note": note,
-                })
-                continue
-        else:
-            if note_is_punch_out(note):
-                in_time = getattr(pending_in, "punch_in_time", None)
-                out_time = getattr(r, "punch_in_time", None)
-                duration_sec = None
-                if in_time and out_time:
-                    delta = out_time - in_time
-                    duration_sec = max(0, int(delta.total_seconds()))
-                    total_seconds += duration_sec
-                pairs.append({
-                    "punch_in_time": in_time.isoformat() if in_time else None,
-                    "punch_out_time": out_time.isoformat() if out_time else None,
-                    "duration_seconds": duration_sec,
-                    "duration": format_duration_seconds(duration_sec) if duration_sec is not None else None,
-                    "in_id": getattr(pending_in, "id", None),
-                    "out_id": getattr(r, "id", None),
-                    "note": f"{getattr(pending_in,'note',None)} | {note}",
-                })
-                pending_in = None
-                continue
-            else:
-                # treat current as a new in, close previous as open
-                in_time = getattr(pending_in, "punch_in_time", None)
-                pairs.append({
-                    "punch_in_time": in_time.isoformat() if in_time else None,
-                    "punch_out_time": None,
-                    "duration_seconds": None,
-                    "duration": None,
-                    "in_id": getattr(pending_in, "id", None),
-                    "out_id": None,
-                    "note": getattr(pending_in, "note", None),
-                })
-                pending_in = r
-                continue
-
-    # if still open at end, include it
-    if pending_in is not None:
+    page_seconds = 0
+    for r in rows:
+        in_time = r.punch_in_time
+        out_time = r.punch_out_time
+        duration_sec = None
+        if in_time and out_time:
+            duration_sec = max(0, int((out_time - in_time).total_seconds()))
+            page_seconds += duration_sec
         pairs.append({
-            "punch_in_time": getattr(pending_in, "punch_in_time", None).isoformat() if getattr(pending_in, "punch_in_time", None) else None,
-            "punch_out_time": None,
-            "duration_seconds": None,
-            "duration": None,
-            "in_id": getattr(pending_in, "id", None),
-            "out_id": None,
-            "note": getattr(pending_in, "note", None),
+            "punch_in_time": in_time.isoformat() if in_time else None,
+            "punch_out_time": out_time.isoformat() if out_time else None,
+            "duration_seconds": duration_sec,
+            "duration": format_duration_seconds(duration_sec),
+            "in_id": r.id,
+            "out_id": r.id,
+            "punch_in_lat": r.punch_in_lat or r.latitude,
+            "punch_out_lat": r.punch_out_lat,
+            "punch_in_ip": r.punch_in_ip,
+            "punch_out_ip": r.punch_out_ip,
+            "note": r.note,
         })
 
-    # sort pairs by punch_in_time desc for recent-first, then limit
-    pairs_sorted = sorted(pairs, key=lambda x: x["punch_in_time"] or "", reverse=True)
+    total_seconds = page_seconds
+    if date_from is not None or date_to is not None:
+        total_seconds = (await db.execute(
+            select(func.coalesce(func.sum(sqlfuncs.worked_seconds(A.punch_in_time, A.punch_out_time)), 0))
+            .where(A.user_id == current_user.id, *in_range(A.punch_in_time))
+        )).scalar_one()
+
     return {
-        "count": len(pairs_sorted),
+        "count": len(pairs),
         "total_work_seconds": total_seconds,
         "total_work_time": format_duration_seconds(total_seconds) if total_seconds else "00:00:00",
-        "pairs": pairs_sorted[:limit],
+        "pairs": pairs,
+        "next_cursor": next_cursor,
+    }
+
+
+async def _daily_summary(db: AsyncSession, user_id: int, date_from: Optional[date], date_to: Optional[date]) -> dict:
+    """Per-day rows from the attendance_daily rollup (about 30 rows a month, no raw punches read)."""
+    today = datetime.utcnow().date()
+    date_from = date_from or today.replace(day=1)
+    date_to = date_to or today
+    D = models.AttendanceDaily
+    rows = (await db.execute(
+        select(D).where(D.user_id == user_id, D.day >= date_from, D.day <= date_to).order_by(D.day)
+    )).scalars().all()
+    total = sum(r.worked_seconds for r in rows)
+    return {
+        "user_id": user_id,
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "days_present": len(rows),
+        "anomaly_days": sum(1 for r in rows if r.anomaly),
+        "total_work_seconds": total,
+        "days": [{
+            "day": r.day.isoformat(),
+            "first_in": r.first_in.isoformat() if r.first_in else None,
+            "last_out": r.last_out.isoformat() if r.last_out else None,
+            "worked_seconds": r.worked_seconds,
+            "sessions": r.sessions,
+            "anomaly": r.anomaly,
+        } for r in rows],
     }
 
 
+@router.get("/me/daily")
+async def my_attendance_daily(
+    date_from: Optional[date] = Query(None, description="default: first day of this month"),
+    date_to: Optional[date] = Query(None, description="default: today"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Current user's per-day totals (first in, last out, worked seconds) from the daily rollup."""
+    return await _daily_summary(db, current_user.id, date_from, date_to)
+
+
+@router.get("/admin/daily/{user_id}")
+async def admin_attendance_daily(
+    user_id: int,
+    date_from: Optional[date] = Query(None, description="default: first day of this month"),
+    date_to: Optional[date] = Query(None, description="default: today"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Admin: a user's per-day totals from the daily rollup (payroll lookups)."""
+    if getattr(current_user, "role", None) != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can view attendance of other users")
+    return await _daily_summary(db, user_id, date_from, date_to)
+
+
+@router.get("/admin/report")
+async def admin_attendance_report(
+    month: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="YYYY-MM"),
+    format: str = Query("csv", pattern="^(csv|xlsx|ndjson)$"),
+    role: Optional[str] = Query(None, description="only users with this role"),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Admin: users x days matrix of worked time for one month, streamed as csv, xlsx or ndjson.
+    Built from the attendance_daily rollup (see attendance_report.py).
+    """
+    if getattr(current_user, "role", None) != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can export attendance")
+    if format == "xlsx" and importlib.util.find_spec("xlsxwriter") is None:
+        raise HTTPException(status_code=501, detail="xlsx export needs the XlsxWriter package; use csv or ndjson")
+    days = attendance_report.parse_month(month)
+
+    def stream():
+        # the request's session is closed before the body is sent; the export reads through its own
+        db = database.SessionLocal()
+        db.info["read_only"] = True
+        try:
+            rows = attendance_report.matrix_rows(db, days, role)
+            yield from attendance_report.WRITERS[format](rows, days)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=attendance_report.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="attendance-{month}.{format}"'},
+    )
+
+
 # Admin endpoints
 @router.post("/admin/mark")
-def admin_mark(
+async def admin_mark(
     payload: AdminMarkPayload = Body(...),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
     Admin can manually create an attendance entry for any user.
@@ -439,7 +665,7 @@ def admin_mark(
     if getattr(current_user, "role", None) != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can manually mark attendance")
 
-    target = db.query(models.User).filter(models.User.id == payload.user_id).first()
+    target = await db.get(models.User, payload.user_id)
     if not target:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -452,15 +678,15 @@ def admin_mark(
         note=payload.note or "admin-mark",
     )
     db.add(att)
-    db.commit()
-    db.refresh(att)
+    await db.commit()
+    await db.refresh(att)
     return {"message": "Marked", "attendance_id": att.id}
 
 @router.post("/admin/mark-out")
-def admin_mark_out(
+async def admin_mark_out(
     payload: AdminMarkOutPayload = Body(...),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
     Admin: close (punch-out) a user's open attendance record, or close specific attendance_id.
@@ -469,7 +695,7 @@ def admin_mark_out(
     if getattr(current_user, "role", None) != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can perform this action")
 
-    target = db.query(models.User).filter(models.User.id == payload.user_id).first()
+    target = await db.get(models.User, payload.user_id)
     if not target:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -486,21 +712,16 @@ def admin_mark_out(
     # prefer explicit attendance_id if given
     open_att = None
     if payload.attendance_id:
-        open_att = db.query(models.Attendance).filter(models.Attendance.id == payload.attendance_id,
-                                                     models.Attendance.user_id == payload.user_id).first()
+        open_att = (await db.execute(
+            select(models.Attendance).where(models.Attendance.id == payload.attendance_id,
+                                            models.Attendance.user_id == payload.user_id)
+            .with_for_update()
+        )).scalars().first()
         if not open_att:
             raise HTTPException(status_code=404, detail="Attendance record not found for given attendance_id")
     else:
-        # find latest open attendance for user (punch_out_time is NULL)
-        # If model doesn't have punch_out_time column, fall back to None -> handled below
-        if hasattr(models.Attendance, "punch_out_time"):
-            open_att = (
-                db.query(models.Attendance)
-                .filter(models.Attendance.user_id == payload.user_id)
-                .filter(models.Attendance.punch_out_time == None)
-                .order_by(models.Attendance.punch_in_time.desc())
-                .first()
-            )
+        # latest open attendance for user, locked as in punch_out so the two cannot both close it
+        open_att = await latest_open_session(db, payload.user_id)
 
     client_ip = (payload.ip or "").strip()
     ssid = payload.ssid
@@ -527,10 +748,11 @@ def admin_mark_out(
 
         try:
             db.add(open_att)
-            db.commit()
-            db.refresh(open_att)
+            await db.run_sync(attendance_rollup.refresh_day, payload.user_id, attendance_rollup.day_of(open_att))
+            await db.commit()
+            await db.refresh(open_att)
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail=f"DB error saving punch-out: {e}")
 
         # compute duration if punch_in_time present
@@ -571,10 +793,11 @@ def admin_mark_out(
     att = models.Attendance(**att_kwargs)
     try:
         db.add(att)
-        db.commit()
-        db.refresh(att)
+        await db.run_sync(attendance_rollup.refresh_day, payload.user_id, attendance_rollup.day_of(att))
+        await db.commit()
+        await db.refresh(att)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"DB error creating punch-out record: {e}")
 
     return {
@@ -583,26 +806,79 @@ def admin_mark_out(
         "punch_out_time": getattr(att, "punch_out_time", None).isoformat() if getattr(att, "punch_out_time", None) else getattr(att, "punch_in_time", None).isoformat() if getattr(att, "punch_in_time", None) else None,
     }
 
+def _approx_attendance_count(db: Session, user_id, role, date_from, date_to) -> int:
+    """
+    Attendance rows matching the admin/all filters without COUNT(*) over raw
+    punches: table statistics when unfiltered, else the session counts kept
+    in attendance_daily (lags only for sessions not yet punched out).
+    """
+    if user_id is None and not role and date_from is None and date_to is None:
+        return pagination.estimated_rows(db, models.Attendance.__table__)
+    D = models.AttendanceDaily
+    stmt = select(func.coalesce(func.sum(D.sessions), 0))
+    if user_id is not None:
+        stmt = stmt.where(D.user_id == user_id)
+    if role:
+        stmt = stmt.where(D.user_id.in_(select(models.User.id).where(models.User.role == role)))
+    if date_from is not None:
+        stmt = stmt.where(D.day >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(D.day <= date_to)
+    return int(db.execute(stmt).scalar_one())
+
+
 @router.get("/admin/all")
-def admin_list_all(
+async def admin_list_all(
     user_id: Optional[int] = Query(None),
+    role: Optional[str] = Query(None, description="only users with this role"),
+    date_from: Optional[date] = Query(None, description="first day (UTC) to include"),
+    date_to: Optional[date] = Query(None, description="last day (UTC) to include"),
     limit: int = Query(100, ge=1, le=2000),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    offset: int = Query(0, ge=0, deprecated=True, description="replaced by cursor; only 0 is accepted"),
+    count: str = Query("exact", pattern="^(exact|approx|none)$", description="how `total` is computed"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
-    Admin: list all attendance records with optional user_id filter, pagination.
-    Returns per-record punch_in/punch_out and duration; also returns total_work_seconds/time.
+    Admin: list attendance records, newest punch-in first, one keyset page at a time.
+    - Pass next_cursor back as `cursor` for the following page (null on the last one).
+    - Filters: user_id, role, and date_from/date_to on the punch-in day (punch-out day for
+      records without a punch-in); each is served by an index.
+    - total: count=exact (default) runs COUNT(*), approx estimates it cheaply, none skips it.
+    - offset is gone: a non-zero offset is rejected rather than silently serving page 1 again.
+    Returns per-record punch_in/punch_out and duration; total_work_seconds/time cover the page.
     """
     if getattr(current_user, "role", None) != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can view all attendance")
-
-    q = db.query(models.Attendance)
-    if user_id is not None:
-        q = q.filter(models.Attendance.user_id == user_id)
-    total = q.count()
-    rows = q.order_by(models.Attendance.id.desc()).offset(offset).limit(limit).all()
+    if offset:
+        raise HTTPException(status_code=400, detail="offset is no longer supported: pass the previous page's next_cursor as cursor")
+
+    A = models.Attendance
+
+    def filters(column):
+        out = []
+        if user_id is not None:
+            out.append(A.user_id == user_id)
+        if role:
+            out.append(A.user_id.in_(select(models.User.id).where(models.User.role == role)))
+        if date_from is not None:
+            out.append(column >= datetime.combine(date_from, time.min))
+        if date_to is not None:
+            out.append(column < datetime.combine(date_to + timedelta(days=1), time.min))
+        return out
+
+    stmt = select(A).where(*filters(A.punch_in_time))
+    undated = select(A).where(*filters(A.punch_out_time))
+    rows, next_cursor = await db.run_sync(pagination.fetch_page, stmt, A.punch_in_time, A.id, cursor, limit, undated_stmt=undated)
+
+    total = None
+    if count == "exact":
+        total = 0
+        for s in (stmt.where(A.punch_in_time.is_not(None)), undated.where(A.punch_in_time.is_(None))):
+            total += (await db.execute(select(func.count()).select_from(s.subquery()))).scalar_one()
+    elif count == "approx":
+        total = await db.run_sync(_approx_attendance_count, user_id, role, date_from, date_to)
 
     def fmt_seconds(sec: Optional[int]) -> Optional[str]:
         if sec is None:
@@ -667,9 +943,10 @@ def admin_list_all(
 
     return {
         "total": total,
+        "total_is_estimate": count == "approx",
         "count": len(records),
-        "offset": offset,
         "limit": limit,
+        "next_cursor": next_cursor,
         "total_work_seconds": total_work_seconds,
         "total_work_time": fmt_seconds(total_work_seconds) if total_work_seconds else "00:00:00",
         "records": records,
@@ -677,10 +954,10 @@ def admin_list_all(
 
 
 @router.post("/admin/unblock/{user_id}")
-def admin_unblock_user(
+async def admin_unblock_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
     Admin: Unblock a user (reset failed attempts).
@@ -688,15 +965,18 @@ def admin_unblock_user(
     if getattr(current_user, "role", None) != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can unblock users")
 
-    target = db.query(models.User).filter(models.User.id == user_id).first()
+    target = await db.get(models.User, user_id)
     if not target:
         raise HTTPException(status_code=404, detail="User not found")
 
     target.is_blocked = False
     target.failed_attendance_attempts = 0
+    attempt_limits.limiter.clear(target.id)
+    utils.revoke_user_tokens(db, target.id, target.email)
     db.add(target)
-    db.commit()
-    db.refresh(target)
+    await db.commit()
+    await db.refresh(target)
+    utils.invalidate_principal(target.email)
 
     return {
         "message": f"User {target.email} has been unblocked",
@@ -705,29 +985,58 @@ def admin_unblock_user(
         "failed_attempts": target.failed_attendance_attempts,
     }
 
+@router.get("/admin/network-policy")
+async def admin_network_policy(current_user: models.User = Depends(get_current_user)):
+    """Admin: size of the compiled SSID/IP/router/proxy policy this worker is using."""
+    if getattr(current_user, "role", None) != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can view the network policy")
+    return network_policy.current().summary()
+
+@router.post("/admin/network-policy/reload")
+async def admin_reload_network_policy(current_user: models.User = Depends(get_current_user)):
+    """
+    Admin: re-read .env and NETWORK_POLICY_FILE now in this worker. Other workers
+    pick up the change within NETWORK_POLICY_RELOAD_SECONDS.
+    """
+    if getattr(current_user, "role", None) != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can reload the network policy")
+    try:
+        policy = network_policy.reload()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Network policy not reloaded: {e}")
+    return policy.summary()
+
 @router.get("/admin/blocked")
-def admin_list_blocked(
+async def admin_list_blocked(
     q: Optional[str] = Query(None, description="search by email or name"),
+    role: Optional[str] = Query(None, description="only users with this role"),
     limit: int = Query(50, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(utils.get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    count: str = Query("exact", pattern="^(exact|approx|none)$", description="how total_blocked is computed"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
-    Admin: list blocked users. Optional search (email or full_name).
+    Admin: list blocked users, most failed attempts first, one keyset page at a time.
+    Optional search (email or full_name) and role filter. Everything is read through
+    ix_users_blocked_attempts, so only blocked users are ever visited and the count is
+    cheap: count=approx is the same as exact here.
     """
     if getattr(current_user, "role", None) != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can view blocked users")
 
-    query = db.query(models.User).filter(models.User.is_blocked == True)
+    U = models.User
+    stmt = select(U).where(U.is_blocked == True)
+    if role:
+        stmt = stmt.where(U.role == role)
     if q:
         q_like = f"%{q.strip().lower()}%"
         # case-insensitive search (DB collation may already handle case insensitivity)
-        query = query.filter(
-            (models.User.email.ilike(q_like)) | (models.User.full_name.ilike(q_like))
-        )
-    total = query.count()
-    rows = query.order_by(models.User.failed_attendance_attempts.desc(), models.User.id.desc()).offset(offset).limit(limit).all()
+        stmt = stmt.where(U.email.ilike(q_like) | U.full_name.ilike(q_like))
+    rows, next_cursor = await db.run_sync(pagination.fetch_page, stmt, U.failed_attendance_attempts, U.id, cursor, limit)
+    total = None
+    if count != "none":
+        total = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
 
     out = []
     for u in rows:
@@ -743,7 +1052,7 @@ def admin_list_blocked(
     return {
         "total_blocked": total,
         "count": len(out),
-        "offset": offset,
         "limit": limit,
+        "next_cursor": next_cursor,
         "users": out,
     }
\ No newline at end of file
@@ -0,0 +1,141 @@
+# attendance_report.py
+"""
+Monthly attendance matrix (users x days) for GET /attendance/admin/report.
+
+One query over users LEFT JOIN attendance_daily, ordered by user and day, is
+read through a server-side cursor (yield_per) and folded into one row per
+user as it streams, so memory stays flat however many users there are. The
+matrix reads the daily rollup (attendance_rollup.py): today's still-open
+sessions appear once they are punched out or the nightly backfill has run.
+
+Writers turn the rows into chunks for a StreamingResponse:
+  csv     one line per user, a column per day (hours, 2 decimals)
+  ndjson  one JSON object per user, worked seconds per day (null = absent)
+  xlsx    same layout as csv; needs the optional XlsxWriter package and is
+          built in a temp file (constant_memory mode) before it is sent
+"""
+import calendar
+import csv
+import io
+import json
+import tempfile
+from datetime import date
+from itertools import groupby
+from typing import Iterator, List, Optional
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from . import models
+
+FETCH_ROWS = 2000       # rows per server-side cursor fetch
+FLUSH_USERS = 200       # users per streamed text chunk
+FILE_CHUNK = 64 * 1024
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def parse_month(month: str) -> List[date]:
+    """'YYYY-MM' -> every day of that month."""
+    year, mon = (int(p) for p in month.split("-"))
+    return [date(year, mon, d) for d in range(1, calendar.monthrange(year, mon)[1] + 1)]
+
+
+def matrix_rows(db: Session, days: List[date], role: Optional[str] = None) -> Iterator[dict]:
+    """One dict per user: identity, worked seconds per day (None if absent) and month totals."""
+    U, D = models.User, models.AttendanceDaily
+    stmt = (
+        select(U.id, U.full_name, U.email, U.role, D.day, D.worked_seconds, D.anomaly)
+        .outerjoin(D, and_(D.user_id == U.id, D.day >= days[0], D.day <= days[-1]))
+        .order_by(U.id, D.day)
+        .execution_options(yield_per=FETCH_ROWS)
+    )
+    if role:
+        stmt = stmt.where(U.role == role)
+    index = {d: i for i, d in enumerate(days)}
+    for user_id, rows in groupby(db.execute(stmt), key=lambda r: r.id):
+        worked: List[Optional[int]] = [None] * len(days)
+        anomalies = 0
+        first = None
+        for r in rows:
+            if first is None:
+                first = r
+            if r.day is not None:
+                worked[index[r.day]] = r.worked_seconds
+                anomalies += bool(r.anomaly)
+        yield {
+            "user_id": user_id,
+            "full_name": first.full_name,
+            "email": first.email,
+            "role": first.role,
+            "worked_seconds": worked,
+            "days_present": sum(1 for w in worked if w is not None),
+            "anomaly_days": anomalies,
+            "total_work_seconds": sum(w for w in worked if w),
+        }
+
+
+def _hours(seconds: Optional[int]):
+    return None if seconds is None else round(seconds / 3600, 2)
+
+
+def _header(days: List[date]) -> list:
+    return ["user_id", "full_name", "email", "role"] + [d.isoformat() for d in days] + \
+           ["days_present", "anomaly_days", "total_hours"]
+
+
+def _cells(row: dict) -> list:
+    return [row["user_id"], row["full_name"], row["email"], row["role"]] + \
+           [_hours(w) for w in row["worked_seconds"]] + \
+           [row["days_present"], row["anomaly_days"], _hours(row["total_work_seconds"])]
+
+
+def write_csv(rows: Iterator[dict], days: List[date]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(_header(days))
+    for n, row in enumerate(rows, start=1):
+        writer.writerow(["" if c is None else c for c in _cells(row)])
+        if n % FLUSH_USERS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def write_ndjson(rows: Iterator[dict], days: List[date]) -> Iterator[str]:
+    month = days[0].strftime("%Y-%m")
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({"month": month, **row}))
+        if len(lines) >= FLUSH_USERS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def write_xlsx(rows: Iterator[dict], days: List[date]) -> Iterator[bytes]:
+    import xlsxwriter
+
+    with tempfile.TemporaryFile() as fh:
+        # constant_memory flushes every finished row to disk
+        workbook = xlsxwriter.Workbook(fh, {"constant_memory": True})
+        sheet = workbook.add_worksheet(days[0].strftime("%Y-%m"))
+        sheet.write_row(0, 0, _header(days))
+        for n, row in enumerate(rows, start=1):
+            sheet.write_row(n, 0, _cells(row))
+        workbook.close()
+        fh.seek(0)
+        while True:
+            chunk = fh.read(FILE_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+
+
+WRITERS = {"csv": write_csv, "ndjson": write_ndjson, "xlsx": write_xlsx}
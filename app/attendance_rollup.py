@@ -0,0 +1,141 @@
+# attendance_rollup.py
+"""
+Per-user daily attendance rollup (models.AttendanceDaily).
+
+    python -m app.attendance_rollup backfill [--since YYYY-MM-DD] [--user-id N]
+
+One row per (user_id, day): first punch-in, last punch-out, worked seconds
+(closed sessions, same rule as the reports), session count and an anomaly
+flag. A record belongs to the UTC day of its punch-in, or of its punch-out
+when it has none.
+
+punch_out and admin_mark_out call refresh_day() in their own transaction, so
+the day they close is always current. Days whose sessions were never closed
+(forgot to punch out) or rows edited outside those endpoints are picked up by
+the backfill, which rebuilds a date range set-based; run it nightly with
+--since set to a few days back.
+"""
+import argparse
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import Date, and_, case, delete, func, or_, select, type_coerce
+from sqlalchemy.orm import Session
+
+from . import database, models, sqlfuncs
+
+# a session longer than this is more likely a missed punch-out than a working day
+MAX_SESSION_SECONDS = 16 * 3600
+
+USERS_PER_CHUNK = 200
+
+
+def day_of(att: models.Attendance) -> Optional[date]:
+    when = att.punch_in_time or att.punch_out_time
+    return when.date() if when else None
+
+
+def _aggregates():
+    A = models.Attendance
+    worked = sqlfuncs.worked_seconds(A.punch_in_time, A.punch_out_time)
+    anomaly = case(
+        (A.punch_in_time.is_(None), 1),                      # punch-out without a punch-in
+        (A.punch_out_time.is_(None), 1),                     # never punched out
+        (A.punch_out_time < A.punch_in_time, 1),
+        (sqlfuncs.duration_seconds(A.punch_in_time, A.punch_out_time) > MAX_SESSION_SECONDS, 1),
+        else_=0,
+    )
+    return (
+        func.min(A.punch_in_time).label("first_in"),
+        func.max(A.punch_out_time).label("last_out"),
+        func.coalesce(func.sum(worked), 0).label("worked_seconds"),
+        func.count(A.id).label("sessions"),
+        (func.max(anomaly) > 0).label("anomaly"),
+    )
+
+
+def _in_days(start: Optional[date], end: Optional[date]):
+    """Records belonging to days [start, end) - index-friendly on both punch columns."""
+    A = models.Attendance
+
+    def bounded(column):
+        filters = []
+        if start is not None:
+            filters.append(column >= datetime.combine(start, time.min))
+        if end is not None:
+            filters.append(column < datetime.combine(end, time.min))
+        return and_(*filters) if filters else column.is_not(None)
+
+    return or_(bounded(A.punch_in_time), and_(A.punch_in_time.is_(None), bounded(A.punch_out_time)))
+
+
+def refresh_day(db: Session, user_id: int, day: Optional[date]):
+    """Recompute one user's rollup row for `day` from the raw records (does not commit)."""
+    if day is None:
+        return
+    db.flush()
+    A = models.Attendance
+    row = db.execute(
+        select(*_aggregates()).where(A.user_id == user_id, _in_days(day, day + timedelta(days=1)))
+    ).one()
+    daily = db.get(models.AttendanceDaily, (user_id, day))
+    if not row.sessions:
+        if daily is not None:
+            db.delete(daily)
+        return
+    if daily is None:
+        daily = models.AttendanceDaily(user_id=user_id, day=day)
+        db.add(daily)
+    daily.first_in = row.first_in
+    daily.last_out = row.last_out
+    daily.worked_seconds = int(row.worked_seconds)
+    daily.sessions = row.sessions
+    daily.anomaly = bool(row.anomaly)
+    daily.updated_at = datetime.utcnow()
+
+
+def backfill(db: Session, since: Optional[date] = None, user_id: Optional[int] = None) -> int:
+    """Rebuild the rollup from `since` (default: all history), for one user or everyone. Commits."""
+    A, D = models.Attendance, models.AttendanceDaily
+    day = type_coerce(func.date(func.coalesce(A.punch_in_time, A.punch_out_time)), Date)
+    stmt = select(A.user_id, day.label("day"), *_aggregates()).where(_in_days(since, None))
+    wipe = delete(D)
+    if since is not None:
+        wipe = wipe.where(D.day >= since)
+    if user_id is not None:
+        wipe = wipe.where(D.user_id == user_id)
+    stmt = stmt.group_by(A.user_id, day)
+
+    db.execute(wipe)
+    now = datetime.utcnow()
+    written = 0
+    user_ids = [user_id] if user_id is not None else list(db.execute(select(models.User.id).order_by(models.User.id)).scalars())
+    # a few hundred users per grouped query: bounded memory, and no open cursor while inserting
+    for i in range(0, len(user_ids), USERS_PER_CHUNK):
+        chunk = user_ids[i:i + USERS_PER_CHUNK]
+        rows = [{"user_id": r.user_id, "day": r.day, "first_in": r.first_in, "last_out": r.last_out,
+                 "worked_seconds": int(r.worked_seconds), "sessions": r.sessions,
+                 "anomaly": bool(r.anomaly), "updated_at": now}
+                for r in db.execute(stmt.where(A.user_id.in_(chunk)))]
+        if rows:
+            db.execute(D.__table__.insert(), rows)
+            written += len(rows)
+    db.commit()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--since", type=date.fromisoformat, default=None)
+    parser.add_argument("--user-id", type=int, default=None)
+    args = parser.parse_args()
+    session = database.SessionLocal()
+    try:
+        print(f"wrote {backfill(session, args.since, args.user_id)} daily rows")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,12 @@
 # attendance_utils.py
-from .config import settings
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from math import radians, cos, sin, asin, sqrt
+import numpy as np
 from fastapi import Request
-import ipaddress
+from . import network_policy
 
 def get_allowed_ssids() -> List[str]:
-    ssids: List[str] = []
-    if getattr(settings, "ALLOWED_SSID", None):
-        ssids.append(settings.ALLOWED_SSID.strip())
-    if getattr(settings, "ALLOWED_SSID_ALT", None):
-        ssids += [s.strip() for s in settings.ALLOWED_SSID_ALT.split(",") if s.strip()]
-    return ssids
+    return list(network_policy.current().ssid_list)
 
 def extract_ssid(request: Optional[Request], payload_ssid: Optional[str], header_ssid: Optional[str] = None) -> Optional[str]:
     """
@@ -43,133 +38,67 @@ def haversine_distance_m(lat1: float, lon1: float, lat2: float, lon2: float) ->
     R = 6371000
     return R * c
 
+# below this many points the plain loop beats building NumPy arrays
+VECTORIZE_MIN = 16
+
+def haversine_distances_m(lats1: Sequence, lons1: Sequence, lats2: Sequence, lons2: Sequence) -> List[float]:
+    """
+    Element-wise haversine_distance_m over equal-length sequences (inf where a
+    coordinate is None). Vectorized with NumPy from VECTORIZE_MIN points up.
+    """
+    if len(lats1) < VECTORIZE_MIN:
+        return [haversine_distance_m(*p) for p in zip(lats1, lons1, lats2, lons2)]
+    # None -> nan, and nan propagates to the result
+    lat1, lon1, lat2, lon2 = (np.radians(np.array(v, dtype=float)) for v in (lats1, lons1, lats2, lons2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    d = 2 * 6371000 * np.arcsin(np.sqrt(a))
+    return np.where(np.isnan(d), np.inf, d).tolist()
+
 # ---------- IP helpers ----------
+# Lists are parsed once into network_policy.NetworkPolicy; these helpers read
+# the current (auto-reloaded) policy.
 def get_allowed_ips() -> List[str]:
     """
     Return list of allowed IPs/CIDRs from settings (comma-separated).
     """
-    raw = getattr(settings, "ALLOWED_IPS", "")
-    if not raw:
-        return []
-    return [s.strip() for s in raw.split(",") if s.strip()]
+    return list(network_policy.current().ip_list)
 
 def get_allowed_router_ips() -> List[str]:
     """
     Return list of configured router IPs (single IPs or CIDRs) from settings.
     Example: ALLOWED_ROUTER_IPS=192.168.1.1,10.0.0.1/24
     """
-    raw = getattr(settings, "ALLOWED_ROUTER_IPS", "")
-    if not raw:
-        return []
-    return [s.strip() for s in raw.split(",") if s.strip()]
+    return list(network_policy.current().router_ip_list)
 
 def get_client_ip(request: Optional[Request]) -> Optional[str]:
     """
     Extract client IP from request.
-    Order:
-      1) X-Forwarded-For header (first IP)
-      2) X-Real-IP header
-      3) request.client.host
+    X-Forwarded-For / X-Real-IP are used only when the peer is a trusted
+    proxy (TRUSTED_PROXIES); otherwise request.client.host.
     """
     if not request:
         return None
-    xff = request.headers.get("X-Forwarded-For")
-    if xff:
-        first = xff.split(",")[0].strip()
-        if first:
-            return first
-    xr = request.headers.get("X-Real-IP")
-    if xr:
-        return xr.strip()
+    peer = None
     try:
         if request.client and request.client.host:
-            return request.client.host
+            peer = request.client.host
     except Exception:
         pass
-    return None
+    return network_policy.current().client_ip(
+        peer, request.headers.get("X-Forwarded-For"), request.headers.get("X-Real-IP"))
 
 def is_ip_allowed(client_ip: Optional[str]) -> bool:
     """
     Check if client_ip (string) is in allowed list. Supports CIDR ranges.
     If ALLOWED_IPS is empty, returns False (strict).
     """
-    if not client_ip:
-        return False
-    allowed = get_allowed_ips()
-    if not allowed:
-        return False
-
-    # strip possible port
-    if ":" in client_ip and client_ip.count(":") == 1:
-        client_ip = client_ip.split(":")[0]
-
-    for entry in allowed:
-        try:
-            if "/" in entry:
-                net = ipaddress.ip_network(entry, strict=False)
-                ip = ipaddress.ip_address(client_ip)
-                if ip in net:
-                    return True
-            else:
-                if ipaddress.ip_address(client_ip) == ipaddress.ip_address(entry):
-                    return True
-        except Exception:
-            continue
-    return False
+    return network_policy.current().ip_allowed(client_ip)
 
 # ---------- Router/network-based helpers ----------
 def is_client_on_router_network(client_ip: Optional[str]) -> bool:
     """
     Check if client_ip belongs to any network defined by ALLOWED_ROUTER_IPS.
-    For each router entry:
-      - if it's a CIDR (e.g. 10.0.0.0/24) check membership directly
-      - if it's a single IP (e.g. 192.168.1.1), we assume /24 network by default
-        and check whether client_ip falls in that /24 (i.e., 192.168.1.0/24)
-    This covers the common home/office router case.
-    """
-    if not client_ip:
-        return False
-    router_entries = get_allowed_router_ips()
-    if not router_entries:
-        return False
-
-    # strip port if any
-    if ":" in client_ip and client_ip.count(":") == 1:
-        client_ip = client_ip.split(":")[0]
-
-    try:
-        ip_obj = ipaddress.ip_address(client_ip)
-    except Exception:
-        return False
-
-    for entry in router_entries:
-        try:
-            if "/" in entry:
-                # router entry is a network already
-                net = ipaddress.ip_network(entry, strict=False)
-                if ip_obj in net:
-                    return True
-            else:
-                # treat single router IP as meaning the router's /24 subnet
-                # for IPv4: derive network by replacing last octet with 0/24
-                # for IPv6: fallback to direct equality or skip
-                try:
-                    router_ip = ipaddress.ip_address(entry)
-                except Exception:
-                    continue
-
-                if router_ip.version == 4 and ip_obj.version == 4:
-                    # form /24 network from router_ip
-                    parts = str(router_ip).split(".")
-                    if len(parts) == 4:
-                        net_cidr = ".".join(parts[:3]) + ".0/24"
-                        net = ipaddress.ip_network(net_cidr, strict=False)
-                        if ip_obj in net:
-                            return True
-                else:
-                    # for IPv6, if router_ip equals client or if a CIDR provided
-                    if ip_obj == router_ip:
-                        return True
-        except Exception:
-            continue
-    return False
+    A CIDR entry is used as is; a single IPv4 router IP stands for its /24
+    (the common home/office router case), a single IPv6 one for itself.
+    """
+    return network_policy.current().on_router_network(client_ip)
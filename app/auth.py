@@ -1,23 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from . import database, models, schemas, utils
+from fastapi.security import HTTPAuthorizationCredentials
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import database, models, schemas, utils, passwords, login_ids
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
-@router.post("/admin-signup")
-def admin_signup(request: schemas.AdminSignup, db: Session = Depends(get_db)):
-    existing_admin = db.query(models.User).filter(models.User.role == "Admin").first()
-    if existing_admin:
-        raise HTTPException(status_code=400, detail="Admin already exists")
+# Lookups end their transaction before returning so the pooled connection is not
+# held while the handler awaits bcrypt.
+
+async def _admin_exists(db: AsyncSession) -> bool:
+    exists = (await db.execute(select(models.User.id).where(models.User.role == "Admin").limit(1))).first() is not None
+    await db.rollback()
+    return exists
 
-    hashed = utils.hash_password(request.password)
+async def _create_admin(db: AsyncSession, request: schemas.AdminSignup, hashed: str) -> models.User:
     admin = models.User(
         full_name=request.full_name,
         email=request.email,
@@ -25,23 +27,51 @@ def admin_signup(request: schemas.AdminSignup, db: Session = Depends(get_db)):
         role="Admin"
     )
     db.add(admin)
-    db.commit()
-    db.refresh(admin)
+    try:
+        await db.flush()
+        login_ids.add_identifiers(db, admin.id, email=admin.email)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="This email is already registered")
+    await db.refresh(admin)
+    return admin
+
+async def _find_login_user(db: AsyncSession, identifier: str):
+    # email, code or (unambiguous) full name, in a single query
+    try:
+        return await db.run_sync(login_ids.resolve_login_user, identifier)
+    finally:
+        await db.rollback()
+
+async def _store_rehash(db: AsyncSession, user_id: int, new_hash: str):
+    await db.execute(update(models.User).where(models.User.id == user_id).values(password=new_hash))
+    await db.commit()
+
+# bcrypt runs in passwords.pool (worker processes); the DB calls are awaited on the async session
+@router.post("/admin-signup")
+async def admin_signup(request: schemas.AdminSignup, db: AsyncSession = Depends(get_db)):
+    if await _admin_exists(db):
+        raise HTTPException(status_code=400, detail="Admin already exists")
+
+    hashed = await passwords.hash_password_async(request.password)
+    admin = await _create_admin(db, request, hashed)
     return {"id": admin.id, "full_name": admin.full_name, "email": admin.email, "role": admin.role}
 
 @router.post("/login", response_model=schemas.TokenResponse)
-def login(request: schemas.LoginRequest, db: Session = Depends(get_db)):
-    # Try login by email first
-    user = db.query(models.User).filter(models.User.email == request.email).first()
-
-    # If not found, try by full_name (or code if you add it to User model)
+async def login(request: schemas.LoginRequest, db: AsyncSession = Depends(get_db)):
+    user = await _find_login_user(db, request.email)
     if not user:
-        user = db.query(models.User).filter(models.User.full_name == request.email).first()
+        raise HTTPException(status_code=401, detail="Invalid email/code or password")
 
-    if not user or not utils.verify_password(request.password, user.password):
+    valid, new_hash = await passwords.verify_and_update_async(request.password, user.password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email/code or password")
+    if new_hash:
+        # cost factor changed since this hash was created: upgrade it transparently
+        await _store_rehash(db, user.id, new_hash)
 
-    token = utils.create_access_token({"sub": user.email, "role": user.role})
+    token = utils.create_access_token(utils.token_claims(user))
 
     return {
         "id": user.id,
@@ -53,3 +83,22 @@ def login(request: schemas.LoginRequest, db: Session = Depends(get_db)):
     }
 
 
+@router.post("/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(utils.security),
+           db: AsyncSession = Depends(get_db)):
+    """Revoke the presented token."""
+    payload = utils.decode_access_token(credentials.credentials)
+    if not payload.get("jti"):
+        raise HTTPException(status_code=400, detail="Token cannot be revoked, it has no jti")
+    utils.revocation_list.revoke_token(db, payload["jti"], payload.get("uid"),
+                                       datetime.utcfromtimestamp(payload["exp"]))
+    await db.commit()
+    return {"message": "Logged out"}
+
+
+@router.get("/hash-pool")
+async def hash_pool_stats(current_user: models.User = Depends(get_current_user)):
+    """Admin: password worker pool queue depth and counters."""
+    if current_user.role != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can view pool stats")
+    return passwords.pool.stats()
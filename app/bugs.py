@@ -1,20 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from . import database, models, schemas, utils
 
 router = APIRouter(prefix="/bugs", tags=["Bugs"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 @router.post("/", response_model=schemas.BugResponse)
-def create_bug(request: schemas.BugCreate, db: Session = Depends(get_db),
-               current_user: models.User = Depends(utils.get_current_user)):
+async def create_bug(request: schemas.BugCreate, db: AsyncSession = Depends(get_db),
+               current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Tester", "Admin", "Developer"]:
         raise HTTPException(status_code=403, detail="Only Testers/Admin/Developer can report bugs")
 
@@ -24,26 +21,26 @@ def create_bug(request: schemas.BugCreate, db: Session = Depends(get_db),
         created_by=current_user.id
     )
     db.add(bug)
-    db.commit()
-    db.refresh(bug)
+    await db.commit()
+    await db.refresh(bug)
     return bug
 
 @router.put("/{id}/status")
-def update_bug_status(id: int, request: schemas.BugStatusUpdate, db: Session = Depends(get_db),
-                      current_user: models.User = Depends(utils.get_current_user)):
+async def update_bug_status(id: int, request: schemas.BugStatusUpdate, db: AsyncSession = Depends(get_db),
+                      current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Developer", "Admin"]:
         raise HTTPException(status_code=403, detail="Only Developers/Admin can update bug status")
 
-    bug = db.query(models.Bug).filter(models.Bug.id == id).first()
+    bug = (await db.execute(select(models.Bug).where(models.Bug.id == id))).scalars().first()
     if not bug:
         raise HTTPException(status_code=404, detail="Bug not found")
 
     bug.status = request.status
-    db.commit()
+    await db.commit()
     return {"message": f"Bug status updated to {bug.status}"}
 
 @router.get("/{task_id}", response_model=List[schemas.BugResponse])
-def list_bugs(task_id: int, db: Session = Depends(get_db),
-              current_user: models.User = Depends(utils.get_current_user)):
-    bugs = db.query(models.Bug).filter(models.Bug.task_id == task_id).all()
+async def list_bugs(task_id: int, db: AsyncSession = Depends(get_db),
+              current_user: models.User = Depends(get_current_user)):
+    bugs = (await db.execute(select(models.Bug).where(models.Bug.task_id == task_id))).scalars().all()
     return bugs
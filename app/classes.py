@@ -1,54 +1,51 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from . import models, database, utils
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, database, utils, loaders
 
 router = APIRouter(prefix="/classes", tags=["Classes"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 # 1. Create Class (Admin only)
 @router.post("/")
-def create_class(name: str,
-                 db: Session = Depends(get_db),
-                 current_user: models.User = Depends(utils.get_current_user)):
+async def create_class(name: str,
+                 db: AsyncSession = Depends(get_db),
+                 current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can create classes")
 
-    existing = db.query(models.Class).filter(models.Class.name == name).first()
+    existing = (await db.execute(select(models.Class).where(models.Class.name == name))).scalars().first()
     if existing:
         raise HTTPException(status_code=400, detail="Class already exists")
 
     new_class = models.Class(name=name)
     db.add(new_class)
-    db.commit()
-    db.refresh(new_class)
+    await db.commit()
+    await db.refresh(new_class)
     return {"message": "Class created", "id": new_class.id, "name": new_class.name}
 
 # 2. Get all classes (Admin/Tester/Staff allowed)
 @router.get("/")
-def get_all_classes(db: Session = Depends(get_db),
-                    current_user: models.User = Depends(utils.get_current_user)):
+async def get_all_classes(db: AsyncSession = Depends(get_db),
+                    current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Tester", "Staff"]:
         raise HTTPException(status_code=403, detail="Not authorized to view classes")
-    return db.query(models.Class).all()
+    return (await db.execute(select(models.Class).options(*loaders.profile("class_list")))).scalars().all()
 
 # 3. Delete class (Admin only)
 @router.delete("/{class_id}")
-def delete_class(class_id: int,
-                 db: Session = Depends(get_db),
-                 current_user: models.User = Depends(utils.get_current_user)):
+async def delete_class(class_id: int,
+                 db: AsyncSession = Depends(get_db),
+                 current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can delete classes")
 
-    cls = db.query(models.Class).filter(models.Class.id == class_id).first()
+    cls = (await db.execute(select(models.Class).where(models.Class.id == class_id))).scalars().first()
     if not cls:
         raise HTTPException(status_code=404, detail="Class not found")
 
-    db.delete(cls)
-    db.commit()
+    await db.delete(cls)
+    await db.commit()
     return {"message": "Class deleted"}
@@ -7,8 +7,54 @@ class Settings(BaseSettings):
     OFFICE_LAT: float = 22.804925060054416
     OFFICE_LNG: float = 86.203053378007
     ALLOWED_RADIUS_METERS: int = 50
-    ATTEMPT_LIMIT: int = 15
+    ATTEMPT_LIMIT: int = 15               # failed punches within ATTEMPT_WINDOW_SECONDS before a block
+    ATTEMPT_WINDOW_SECONDS: int = 900
+    ATTEMPT_STORE: str = "memory"         # memory (per worker) | sqlite (shared per host), see attempt_limits.py
+    ATTEMPT_STORE_PATH: str = ""          # sqlite store file; default /dev/shm/oddo-attempts.db
     ALLOWED_IPS: str = "192.168.1.1"
+    ALLOWED_ROUTER_IPS: str = ""          # router IPs (their /24) or CIDRs, comma-separated
+
+    # compiled network policy (see network_policy.py)
+    TRUSTED_PROXIES: str = "*"            # peers whose X-Forwarded-For is believed; "*" = any (legacy)
+    NETWORK_POLICY_FILE: str = ""         # optional JSON with long ssid/ip/router/proxy lists
+    NETWORK_POLICY_RELOAD_SECONDS: float = 30.0
+
+    # multi-site geofencing (sites table, see geofence.py); no active sites = the OFFICE_* circle above
+    SITES_REFRESH_SECONDS: float = 10.0
+
+    # connection pool per engine and process (size workers * (size + overflow) below the DB's max_connections)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+
+    # create missing tables at startup instead of running migrations (dev/benchmarks only)
+    AUTO_CREATE_SCHEMA: bool = False
+
+    # password hashing (see passwords.py)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2       # 0 = hash in the request threadpool
+    PASSWORD_HASH_MAX_PENDING: int = 64  # callers waiting for a worker before we answer 503
+
+    # stateless auth: trust JWT claims, check revocations in memory (see revocations.py)
+    AUTH_STATELESS: bool = False
+    REVOCATION_REFRESH_SECONDS: int = 15
+
+    # read replicas (REPLICA_DATABASE_URLS, see replicas.py)
+    REPLICA_HEALTH_CHECK_SECONDS: float = 10.0
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # a user's reads stay on the primary this long after they write
+
+    # per-route DB/pool metrics at /metrics (see metrics.py)
+    METRICS_ENABLED: bool = True
+    METRICS_STATEMENT_SAMPLE_RATE: float = 0.05  # share of requests whose slowest SQL text is kept
+    METRICS_TOKEN: str = ""                      # /metrics is 404 until set, then needs "Authorization: Bearer <token>"
+    QUERY_SHAPE_TRACKING: bool = False           # count identical statements per request and warn on N+1
+    QUERY_REPEAT_THRESHOLD: int = 3
+
+    # email outbox (see mailer.py)
+    OUTBOX_WORKER_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 6         # then the message is dead-lettered
+    OUTBOX_RETRY_BASE_SECONDS: int = 30  # backoff: base * 2^(attempts-1)
+    OUTBOX_POLL_SECONDS: float = 5.0
 
     class Config:
         env_file = ".env"
@@ -1,7 +1,16 @@
 # database.py
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.selectable import CompoundSelect
+
+from . import metrics
+from .config import settings
+from .replicas import ReplicaSet
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
@@ -9,15 +18,129 @@ DATABASE_URL = os.getenv(
 )
 # DATABASE_URL = "mysql+pymysql://root:@localhost:3306/oddo"
 
+# optional read replicas for GET requests, comma separated (see replicas.py)
+REPLICA_DATABASE_URLS = [u.strip() for u in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if u.strip()]
+
+# async handlers use the same database through an async driver; derived from
+# DATABASE_URL unless ASYNC_DATABASE_URL is set
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def async_url_for(url: str) -> str:
+    u = make_url(url)
+    return u.set(drivername=ASYNC_DRIVERS.get(u.get_backend_name(), u.drivername)).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_url_for(DATABASE_URL)
+
 
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
     pool_recycle=3600,
     future=True,
+    poolclass=metrics.TimedQueuePool,
 )
+metrics.register_engine("primary", engine)
+
+replicas = ReplicaSet(REPLICA_DATABASE_URLS)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs of read-only requests to a replica.
+
+    Everything else goes to the primary: flushes, INSERT/UPDATE/DELETE, SELECT
+    ... FOR UPDATE, statements with execution_options(use_primary=True), any
+    session that has already written, and users inside their read-your-writes
+    window. Sessions are read/write unless info["read_only"] is set, so
+    scripts and background workers using SessionLocal() are unaffected.
+    """
+
+    def __init__(self, *args, use_async: bool = False, **kw):
+        super().__init__(*args, **kw)
+        self.use_async = use_async
+
+    def _replica_bind(self, clause):
+        if not replicas or not self.info.get("read_only") or self.info.get("wrote"):
+            return None
+        if self._flushing or not isinstance(clause, (Select, CompoundSelect)):
+            return None
+        if clause._for_update_arg is not None or clause.get_execution_options().get("use_primary"):
+            return None
+        if replicas.wrote_recently(self.info.get("principal")):
+            return None
+        replica = self.info.get("replica")
+        if replica is None or not replica.healthy:
+            replica = self.info["replica"] = replicas.pick()
+        if replica is None:
+            return None
+        return replica.get_async_engine().sync_engine if self.use_async else replica.engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        return self._replica_bind(clause) or super().get_bind(mapper=mapper, clause=clause, **kw)
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_wrote(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _note_write(session):
+    if session.info.get("wrote") and session.info.get("principal"):
+        replicas.note_write(session.info["principal"])
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine, future=True)
 Base = declarative_base()
+
+
+def _is_read_only(request: Request) -> bool:
+    return request.method in ("GET", "HEAD")
+
+
+def get_db(request: Request):
+    """
+    Request-scoped sync session dependency, for code that still runs in the
+    threadpool; the routers use get_async_db. Whatever depends on this callable
+    shares one Session (one pooled connection) per request. GET/HEAD requests
+    are flagged read-only so RoutingSession may serve them from a replica.
+    """
+    db = SessionLocal()
+    db.info["read_only"] = _is_read_only(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ---- async engine (created on first use, so the sync-only tools don't need the driver)
+_async_lock = threading.Lock()
+async_engine = None
+AsyncSessionLocal = None
+
+def get_async_sessionmaker():
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        with _async_lock:
+            if AsyncSessionLocal is None:
+                from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+                kwargs = {"pool_pre_ping": True, "pool_recycle": 3600, "poolclass": metrics.TimedAsyncQueuePool}
+                if make_url(ASYNC_DATABASE_URL).get_backend_name() != "sqlite":
+                    kwargs.update(pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+                async_engine = create_async_engine(ASYNC_DATABASE_URL, **kwargs)
+                metrics.register_engine("primary-async", async_engine.sync_engine)
+                AsyncSessionLocal = async_sessionmaker(async_engine, sync_session_class=RoutingSession, use_async=True,
+                                                       autoflush=False, expire_on_commit=False)
+    return AsyncSessionLocal
+
+
+async def get_async_db(request: Request):
+    """Request-scoped AsyncSession dependency for async def handlers (replica routing as in get_db)."""
+    async with get_async_sessionmaker()() as db:
+        db.info["read_only"] = _is_read_only(request)
+        yield db
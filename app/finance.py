@@ -1,6 +1,8 @@
 # finance.py
 from fastapi import APIRouter, Depends, HTTPException, Request, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date
 import json, uuid
@@ -22,12 +24,7 @@ except Exception:
 
 router = APIRouter(prefix="/finance", tags=["Finance"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
 
 # Basic get_current_user: tries to decode Authorization Bearer token using utils if available.
 # If utils has a method `decode_token(payload)` or `verify_token`, it'll be used.
@@ -36,7 +33,7 @@ from fastapi import Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 security = HTTPBearer(auto_error=False)
 
-def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security), db: Session = Depends(get_db)):
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security), db: AsyncSession = Depends(get_db)):
     """
     Attempts to return models.User for the current Bearer token.
     If utils.decode_token / utils.verify_token exists it will be used; otherwise returns None.
@@ -66,7 +63,7 @@ def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depen
         if payload and isinstance(payload, dict):
             sub = payload.get("sub") or payload.get("email")
             if sub:
-                user = db.query(models.User).filter(models.User.email == sub).first()
+                user = (await db.execute(select(models.User).where(models.User.email == sub))).scalars().first()
                 return user
     return None
 
@@ -75,7 +72,7 @@ def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depen
 # FEE STRUCTURES
 # -----------------------
 @router.post("/fee-structures", response_model=schemas.FeeStructureOut)
-def create_fee_structure(payload: schemas.FeeStructureCreate, current_user: Optional[models.User] = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_fee_structure(payload: schemas.FeeStructureCreate, current_user: Optional[models.User] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     # Optionally restrict to admins: if current_user and current_user.role != "Admin": raise
     fs = models.FeeStructure(
         class_id=payload.class_id,
@@ -84,31 +81,31 @@ def create_fee_structure(payload: schemas.FeeStructureCreate, current_user: Opti
         terms=payload.terms or 3
     )
     db.add(fs)
-    db.commit()
-    db.refresh(fs)
+    await db.commit()
+    await db.refresh(fs)
     # audit
     try:
         actor = current_user.id if current_user else None
     except Exception:
         actor = None
     db.add(models.AuditLog(actor_id=actor, action="create_fee_structure", resource_type="fee_structures", resource_id=fs.id, details={"payload": payload.dict()}))
-    db.commit()
+    await db.commit()
     return fs
 
 @router.get("/fee-structures", response_model=List[schemas.FeeStructureOut])
-def list_fee_structures(class_id: Optional[int] = None, db: Session = Depends(get_db)):
-    q = db.query(models.FeeStructure)
+async def list_fee_structures(class_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+    stmt = select(models.FeeStructure)
     if class_id:
-        q = q.filter(models.FeeStructure.class_id == class_id)
-    return q.order_by(models.FeeStructure.created_at.desc()).all()
+        stmt = stmt.where(models.FeeStructure.class_id == class_id)
+    return (await db.execute(stmt.order_by(models.FeeStructure.created_at.desc()))).scalars().all()
 
 
 # -----------------------
 # PAYMENT INTENT (gateway-sim)
 # -----------------------
 @router.post("/students/{student_id}/create-intent", response_model=schemas.PaymentIntentOut)
-def create_payment_intent(student_id: int, payload: schemas.PaymentIntentCreate, current_user: Optional[models.User] = Depends(get_current_user), db: Session = Depends(get_db)):
-    student = db.query(models.User).filter(models.User.id == student_id).first()
+async def create_payment_intent(student_id: int, payload: schemas.PaymentIntentCreate, current_user: Optional[models.User] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    student = await db.get(models.User, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     # create a fake intent id (in production call real gateway)
@@ -123,22 +120,24 @@ def create_payment_intent(student_id: int, payload: schemas.PaymentIntentCreate,
         metadata=payload.metadata or {}
     )
     db.add(pi)
-    db.commit()
-    db.refresh(pi)
+    await db.commit()
+    await db.refresh(pi)
     actor = current_user.id if current_user else None
     db.add(models.AuditLog(actor_id=actor, action="create_payment_intent", resource_type="payment_intents", resource_id=pi.id, details={"intent_id": pi.intent_id}))
-    db.commit()
+    await db.commit()
     return pi
 
 @router.post("/students/{student_id}/confirm-payment")
-def confirm_payment(student_id: int, intent_id: str, payment_method: Optional[str] = None,
+async def confirm_payment(student_id: int, intent_id: str, payment_method: Optional[str] = None,
                     reference: Optional[str] = None, term_no: Optional[int] = None,
-                    current_user: Optional[models.User] = Depends(get_current_user), db: Session = Depends(get_db)):
+                    current_user: Optional[models.User] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """
     For testing: mark a PaymentIntent succeeded and create Payment record.
     In production, use webhook to mark completed.
     """
-    pi = db.query(models.PaymentIntent).filter(models.PaymentIntent.intent_id == intent_id, models.PaymentIntent.student_id == student_id).first()
+    pi = (await db.execute(
+        select(models.PaymentIntent).where(models.PaymentIntent.intent_id == intent_id, models.PaymentIntent.student_id == student_id)
+    )).scalars().first()
     if not pi:
         raise HTTPException(status_code=404, detail="Payment intent not found")
     if pi.status == "succeeded":
@@ -146,7 +145,7 @@ def confirm_payment(student_id: int, intent_id: str, payment_method: Optional[st
     # mark intent succeeded
     pi.status = "succeeded"
     db.add(pi)
-    db.commit()
+    await db.commit()
     # create payment
     payment = models.Payment(
         student_id=student_id,
@@ -161,16 +160,17 @@ def confirm_payment(student_id: int, intent_id: str, payment_method: Optional[st
         created_by=(current_user.id if current_user else None)
     )
     db.add(payment)
-    db.commit()
-    db.refresh(payment)
+    await db.commit()
+    await db.refresh(payment)
     db.add(models.AuditLog(actor_id=current_user.id if current_user else None, action="confirm_payment", resource_type="payments", resource_id=payment.id, details={"intent": pi.intent_id}))
-    db.commit()
+    await db.commit()
     return {"status": "ok", "payment_id": payment.id}
 
 
 # Webhook skeleton (secure in production)
 @router.post("/webhook")
-async def webhook(request: Request, x_signature: Optional[str] = Header(None), db: Session = Depends(get_db)):
+async def webhook(request: Request, x_signature: Optional[str] = Header(None),
+                  db: AsyncSession = Depends(get_db)):
     """
     Receive gateway events here (Stripe/Razorpay). MUST verify signature in production.
     Expected event example:
@@ -186,13 +186,17 @@ async def webhook(request: Request, x_signature: Optional[str] = Header(None), d
     if ev_type in ("payment_intent.succeeded", "payment.succeeded"):
         intent_id = obj.get("id") or obj.get("payment_intent")
         amount = obj.get("amount") or obj.get("amount_received")
-        pi = db.query(models.PaymentIntent).filter(models.PaymentIntent.intent_id == intent_id).first()
+        pi = (await db.execute(
+            select(models.PaymentIntent).where(models.PaymentIntent.intent_id == intent_id).limit(1)
+        )).scalars().first()
         if pi:
             pi.status = "succeeded"
             db.add(pi)
-            db.commit()
+            await db.commit()
             # create payment if not exists
-            exists = db.query(models.Payment).filter(models.Payment.payment_intent_id == pi.id).first()
+            exists = (await db.execute(
+                select(models.Payment.id).where(models.Payment.payment_intent_id == pi.id).limit(1)
+            )).first()
             if not exists:
                 # Note: many gateways report amount in paise; adapt if needed.
                 amt = pi.amount
@@ -209,9 +213,9 @@ async def webhook(request: Request, x_signature: Optional[str] = Header(None), d
                     created_by=None
                 )
                 db.add(payment)
-                db.commit()
+                await db.commit()
                 db.add(models.AuditLog(actor_id=None, action="webhook_create_payment", resource_type="payments", resource_id=payment.id, details={"raw_event": data}))
-                db.commit()
+                await db.commit()
     return {"received": True}
 
 
@@ -219,9 +223,9 @@ async def webhook(request: Request, x_signature: Optional[str] = Header(None), d
 # PAYMENTS (admin / manual)
 # -----------------------
 @router.post("/payments", response_model=schemas.PaymentOut)
-def create_payment(payload: schemas.PaymentCreate, current_user: Optional[models.User] = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_payment(payload: schemas.PaymentCreate, current_user: Optional[models.User] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     # validation: ensure student exists
-    student = db.query(models.User).filter(models.User.id == payload.student_id).first()
+    student = await db.get(models.User, payload.student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     pay = models.Payment(
@@ -237,33 +241,33 @@ def create_payment(payload: schemas.PaymentCreate, current_user: Optional[models
         created_by=(current_user.id if current_user else payload.created_by)
     )
     db.add(pay)
-    db.commit()
-    db.refresh(pay)
+    await db.commit()
+    await db.refresh(pay)
     db.add(models.AuditLog(actor_id=(current_user.id if current_user else None), action="create_payment", resource_type="payments", resource_id=pay.id, details={"payload": payload.dict()}))
-    db.commit()
+    await db.commit()
     return pay
 
 @router.get("/payments", response_model=List[schemas.PaymentOut])
-def list_payments(student_id: Optional[int] = None, class_id: Optional[int] = None, from_date: Optional[date] = None, to_date: Optional[date] = None, term_no: Optional[int] = None, db: Session = Depends(get_db)):
-    q = db.query(models.Payment)
+async def list_payments(student_id: Optional[int] = None, class_id: Optional[int] = None, from_date: Optional[date] = None, to_date: Optional[date] = None, term_no: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+    stmt = select(models.Payment)
     if student_id:
-        q = q.filter(models.Payment.student_id == student_id)
+        stmt = stmt.where(models.Payment.student_id == student_id)
     if class_id:
-        q = q.join(models.FeeStructure, models.Payment.fee_structure).filter(models.FeeStructure.class_id == class_id)
+        stmt = stmt.join(models.FeeStructure, models.Payment.fee_structure).where(models.FeeStructure.class_id == class_id)
     if term_no:
-        q = q.filter(models.Payment.term_no == term_no)
+        stmt = stmt.where(models.Payment.term_no == term_no)
     if from_date:
-        q = q.filter(models.Payment.payment_date >= from_date)
+        stmt = stmt.where(models.Payment.payment_date >= from_date)
     if to_date:
-        q = q.filter(models.Payment.payment_date <= to_date)
-    return q.order_by(models.Payment.payment_date.desc()).limit(500).all()
+        stmt = stmt.where(models.Payment.payment_date <= to_date)
+    return (await db.execute(stmt.order_by(models.Payment.payment_date.desc()).limit(500))).scalars().all()
 
 
 # -----------------------
 # EXPENSES
 # -----------------------
 @router.post("/expenses", response_model=schemas.ExpenseOut)
-def create_expense(payload: schemas.ExpenseCreate, current_user: Optional[models.User] = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_expense(payload: schemas.ExpenseCreate, current_user: Optional[models.User] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     exp = models.Expense(
         title=payload.title,
         description=payload.description,
@@ -275,32 +279,32 @@ def create_expense(payload: schemas.ExpenseCreate, current_user: Optional[models
         created_by=(current_user.id if current_user else payload.created_by)
     )
     db.add(exp)
-    db.commit()
-    db.refresh(exp)
+    await db.commit()
+    await db.refresh(exp)
     db.add(models.AuditLog(actor_id=(current_user.id if current_user else None), action="create_expense", resource_type="expenses", resource_id=exp.id, details={"payload": payload.dict()}))
-    db.commit()
+    await db.commit()
     return exp
 
 @router.get("/expenses", response_model=List[schemas.ExpenseOut])
-def list_expenses(from_date: Optional[date] = None, to_date: Optional[date] = None, category: Optional[str] = None, vendor: Optional[str] = None, db: Session = Depends(get_db)):
-    q = db.query(models.Expense)
+async def list_expenses(from_date: Optional[date] = None, to_date: Optional[date] = None, category: Optional[str] = None, vendor: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    stmt = select(models.Expense)
     if from_date:
-        q = q.filter(models.Expense.expense_date >= from_date)
+        stmt = stmt.where(models.Expense.expense_date >= from_date)
     if to_date:
-        q = q.filter(models.Expense.expense_date <= to_date)
+        stmt = stmt.where(models.Expense.expense_date <= to_date)
     if category:
-        q = q.filter(models.Expense.category == category)
+        stmt = stmt.where(models.Expense.category == category)
     if vendor:
-        q = q.filter(models.Expense.vendor == vendor)
-    return q.order_by(models.Expense.expense_date.desc()).limit(500).all()
+        stmt = stmt.where(models.Expense.vendor == vendor)
+    return (await db.execute(stmt.order_by(models.Expense.expense_date.desc()).limit(500))).scalars().all()
 
 
 # -----------------------
 # STAFF SALARIES
 # -----------------------
 @router.post("/salaries", response_model=schemas.SalaryOut)
-def create_salary(payload: schemas.SalaryCreate, current_user: Optional[models.User] = Depends(get_current_user), db: Session = Depends(get_db)):
-    staff = db.query(models.User).filter(models.User.id == payload.staff_id).first()
+async def create_salary(payload: schemas.SalaryCreate, current_user: Optional[models.User] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    staff = await db.get(models.User, payload.staff_id)
     if not staff:
         raise HTTPException(status_code=404, detail="Staff not found")
     net = float(payload.basic) + float(payload.allowances) - float(payload.deductions)
@@ -316,15 +320,15 @@ def create_salary(payload: schemas.SalaryCreate, current_user: Optional[models.U
         created_by=(current_user.id if current_user else payload.created_by)
     )
     db.add(sal)
-    db.commit()
-    db.refresh(sal)
+    await db.commit()
+    await db.refresh(sal)
     db.add(models.AuditLog(actor_id=(current_user.id if current_user else None), action="create_salary", resource_type="staff_salaries", resource_id=sal.id, details={"month": payload.month, "net": net} ))
-    db.commit()
+    await db.commit()
     return sal
 
 @router.post("/salaries/{salary_id}/pay", response_model=schemas.SalaryOut)
-def pay_salary(salary_id: int, reference: Optional[str] = None, current_user: Optional[models.User] = Depends(get_current_user), db: Session = Depends(get_db)):
-    sal = db.query(models.StaffSalary).filter(models.StaffSalary.id == salary_id).first()
+async def pay_salary(salary_id: int, reference: Optional[str] = None, current_user: Optional[models.User] = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    sal = await db.get(models.StaffSalary, salary_id)
     if not sal:
         raise HTTPException(status_code=404, detail="Salary record not found")
     if sal.status == "paid":
@@ -334,40 +338,46 @@ def pay_salary(salary_id: int, reference: Optional[str] = None, current_user: Op
     if reference:
         sal.reference = reference
     db.add(sal)
-    db.commit()
-    db.refresh(sal)
+    await db.commit()
+    await db.refresh(sal)
     db.add(models.AuditLog(actor_id=(current_user.id if current_user else None), action="pay_salary", resource_type="staff_salaries", resource_id=sal.id, details={"net_amount": float(sal.net_amount)}))
-    db.commit()
+    await db.commit()
     return sal
 
 @router.get("/salaries", response_model=List[schemas.SalaryOut])
-def list_salaries(staff_id: Optional[int] = None, month: Optional[str] = None, status: Optional[str] = None, db: Session = Depends(get_db)):
-    q = db.query(models.StaffSalary)
+async def list_salaries(staff_id: Optional[int] = None, month: Optional[str] = None, status: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    stmt = select(models.StaffSalary)
     if staff_id:
-        q = q.filter(models.StaffSalary.staff_id == staff_id)
+        stmt = stmt.where(models.StaffSalary.staff_id == staff_id)
     if month:
-        q = q.filter(models.StaffSalary.month == month)
+        stmt = stmt.where(models.StaffSalary.month == month)
     if status:
-        q = q.filter(models.StaffSalary.status == status)
-    return q.order_by(models.StaffSalary.month.desc()).limit(500).all()
+        stmt = stmt.where(models.StaffSalary.status == status)
+    return (await db.execute(stmt.order_by(models.StaffSalary.month.desc()).limit(500))).scalars().all()
 
 
 # -----------------------
 # STUDENT-FACING: outstanding & per-term
 # -----------------------
 @router.get("/students/{student_id}/outstanding", response_model=schemas.StudentOutstandingOut)
-def student_outstanding(student_id: int, db: Session = Depends(get_db)):
-    student = db.query(models.User).filter(models.User.id == student_id).first()
+async def student_outstanding(student_id: int, db: AsyncSession = Depends(get_db)):
+    student = (await db.execute(
+        select(models.User).where(models.User.id == student_id).options(selectinload(models.User.enrolled_classes))
+    )).scalars().first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     classes = student.enrolled_classes
     if not classes:
         raise HTTPException(status_code=404, detail="Student not enrolled in any class")
     class_obj = classes[0]
-    fs = db.query(models.FeeStructure).filter(models.FeeStructure.class_id == class_obj.id).order_by(models.FeeStructure.created_at.desc()).first()
+    fs = (await db.execute(
+        select(models.FeeStructure).where(models.FeeStructure.class_id == class_obj.id).order_by(models.FeeStructure.created_at.desc()).limit(1)
+    )).scalars().first()
     if not fs:
         raise HTTPException(status_code=404, detail="No fee structure for class")
-    payments = db.query(models.Payment).filter(models.Payment.student_id == student_id, models.Payment.fee_structure_id == fs.id, models.Payment.status == "completed").all()
+    payments = (await db.execute(
+        select(models.Payment).where(models.Payment.student_id == student_id, models.Payment.fee_structure_id == fs.id, models.Payment.status == "completed")
+    )).scalars().all()
     total_paid = sum([float(p.amount) for p in payments])
     per_term = []
     per_term_amount = float(fs.total_amount) / int(fs.terms)
@@ -394,14 +404,20 @@ def student_outstanding(student_id: int, db: Session = Depends(get_db)):
 # CLASS SUMMARY & REPORTS
 # -----------------------
 @router.get("/classes/{class_id}/summary", response_model=schemas.ClassSummaryOut)
-def class_summary(class_id: int, db: Session = Depends(get_db)):
-    fs = db.query(models.FeeStructure).filter(models.FeeStructure.class_id == class_id).order_by(models.FeeStructure.created_at.desc()).first()
+async def class_summary(class_id: int, db: AsyncSession = Depends(get_db)):
+    fs = (await db.execute(
+        select(models.FeeStructure).where(models.FeeStructure.class_id == class_id).order_by(models.FeeStructure.created_at.desc()).limit(1)
+    )).scalars().first()
     if not fs:
         raise HTTPException(status_code=404, detail="No fee structure for class")
     # students in class
-    students = db.query(models.User).join(models.student_classes).filter(models.student_classes.c.class_id == class_id).all()
+    students = (await db.execute(
+        select(models.User).join(models.student_classes).where(models.student_classes.c.class_id == class_id)
+    )).scalars().all()
     expected = len(students) * float(fs.total_amount)
-    paid_rows = db.query(models.Payment.student_id, models.func.sum(models.Payment.amount).label("paid")).filter(models.Payment.fee_structure_id == fs.id).group_by(models.Payment.student_id).all()
+    paid_rows = (await db.execute(
+        select(models.Payment.student_id, models.func.sum(models.Payment.amount).label("paid")).where(models.Payment.fee_structure_id == fs.id).group_by(models.Payment.student_id)
+    )).all()
     paid_map = {r.student_id: float(r.paid) for r in paid_rows}
     total_received = sum(paid_map.values())
     unpaid_list = []
@@ -421,23 +437,23 @@ def class_summary(class_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/reports/summary", response_model=schemas.ReportSummaryOut)
-def report_summary(from_date: Optional[date] = None, to_date: Optional[date] = None, class_id: Optional[int] = None, db: Session = Depends(get_db)):
-    q_pay = db.query(models.Payment)
-    q_exp = db.query(models.Expense)
-    q_sal = db.query(models.StaffSalary)
+async def report_summary(from_date: Optional[date] = None, to_date: Optional[date] = None, class_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+    q_pay = select(models.Payment)
+    q_exp = select(models.Expense)
+    q_sal = select(models.StaffSalary)
     if from_date:
-        q_pay = q_pay.filter(models.Payment.payment_date >= from_date)
-        q_exp = q_exp.filter(models.Expense.expense_date >= from_date)
-        q_sal = q_sal.filter(models.StaffSalary.paid_date >= from_date)
+        q_pay = q_pay.where(models.Payment.payment_date >= from_date)
+        q_exp = q_exp.where(models.Expense.expense_date >= from_date)
+        q_sal = q_sal.where(models.StaffSalary.paid_date >= from_date)
     if to_date:
-        q_pay = q_pay.filter(models.Payment.payment_date <= to_date)
-        q_exp = q_exp.filter(models.Expense.expense_date <= to_date)
-        q_sal = q_sal.filter(models.StaffSalary.paid_date <= to_date)
+        q_pay = q_pay.where(models.Payment.payment_date <= to_date)
+        q_exp = q_exp.where(models.Expense.expense_date <= to_date)
+        q_sal = q_sal.where(models.StaffSalary.paid_date <= to_date)
     if class_id:
-        q_pay = q_pay.join(models.FeeStructure, models.Payment.fee_structure).filter(models.FeeStructure.class_id == class_id)
-    total_fees_received = sum([float(r.amount) for r in q_pay.all()])
-    total_expenses = sum([float(r.amount) for r in q_exp.all()])
-    total_salaries_paid = sum([float(r.net_amount) for r in q_sal.filter(models.StaffSalary.status == "paid").all()])
+        q_pay = q_pay.join(models.FeeStructure, models.Payment.fee_structure).where(models.FeeStructure.class_id == class_id)
+    total_fees_received = sum([float(r.amount) for r in (await db.execute(q_pay)).scalars().all()])
+    total_expenses = sum([float(r.amount) for r in (await db.execute(q_exp)).scalars().all()])
+    total_salaries_paid = sum([float(r.net_amount) for r in (await db.execute(q_sal.where(models.StaffSalary.status == "paid"))).scalars().all()])
     net = total_fees_received - (total_expenses + total_salaries_paid)
     return {"period": {"from": str(from_date) if from_date else None, "to": str(to_date) if to_date else None}, "total_fees_received": total_fees_received, "total_expenses": total_expenses, "total_salaries_paid": total_salaries_paid, "net": net}
 
@@ -446,10 +462,10 @@ def report_summary(from_date: Optional[date] = None, to_date: Optional[date] = N
 # AUDIT LOGS (simple)
 # -----------------------
 @router.get("/audit-logs", response_model=List[schemas.AuditLogOut])
-def audit_logs(resource_type: Optional[str] = None, resource_id: Optional[int] = None, db: Session = Depends(get_db)):
-    q = db.query(models.AuditLog)
+async def audit_logs(resource_type: Optional[str] = None, resource_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+    stmt = select(models.AuditLog)
     if resource_type:
-        q = q.filter(models.AuditLog.resource_type == resource_type)
+        stmt = stmt.where(models.AuditLog.resource_type == resource_type)
     if resource_id:
-        q = q.filter(models.AuditLog.resource_id == resource_id)
-    return q.order_by(models.AuditLog.created_at.desc()).limit(500).all()
+        stmt = stmt.where(models.AuditLog.resource_id == resource_id)
+    return (await db.execute(stmt.order_by(models.AuditLog.created_at.desc()).limit(500))).scalars().all()
@@ -0,0 +1,216 @@
+# geofence.py
+"""
+Multi-site attendance geofencing.
+
+Each active row of the sites table (models.Site) is a circle plus the SSIDs
+and IP ranges valid there. A punch passes at a site when the coordinate is
+inside its circle and the SSID and client IP match the site's lists (an empty
+list means the global ALLOWED_SSID* / ALLOWED_IPS / ALLOWED_ROUTER_IPS
+policy, see network_policy.py). The nearest passing site is recorded on the
+attendance row. With no active sites, the single OFFICE_LAT/OFFICE_LNG/
+ALLOWED_RADIUS_METERS circle from the settings applies, as before.
+
+SiteIndex buckets sites on fixed lat/lng grids the size of geohash cells: a
+site is registered in every cell its circle's bounding box touches, on the
+finest grid (geohash-6, about 1.2 x 0.6 km) where that is at most
+MAX_CELLS_PER_SITE cells, else on the geohash-4 grid (about 39 x 20 km). A
+lookup reads one bucket per grid and runs haversine only on the few sites in
+them, however many thousands exist. Sites too large even for the coarse grid
+are kept in a short list that is always checked.
+
+SiteRegistry keeps one index per process, rebuilt when the count or
+max(updated_at) of the sites table changes, checked at most every
+SITES_REFRESH_SECONDS; the /sites endpoints invalidate it directly.
+"""
+import math
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models, network_policy
+from .attendance_utils import haversine_distance_m, haversine_distances_m
+from .config import settings
+
+# (latitude bits, longitude bits) per grid, finest first: geohash precision 6 and 4
+GRIDS = ((15, 15), (10, 10))
+MAX_CELLS_PER_SITE = 256
+METERS_PER_DEG_LAT = 111320.0
+
+
+def _cell(grid: int, lat: float, lng: float) -> Tuple[int, int, int]:
+    lat_bits, lng_bits = GRIDS[grid]
+    return (grid,
+            int((lat + 90.0) // (180.0 / 2 ** lat_bits)),
+            int((lng + 180.0) // (360.0 / 2 ** lng_bits)) % 2 ** lng_bits)
+
+
+class CompiledSite:
+    __slots__ = ("id", "name", "latitude", "longitude", "radius_m", "ssids", "allowed_ips")
+
+    def __init__(self, site: models.Site):
+        self.id = site.id
+        self.name = site.name
+        self.latitude = site.latitude
+        self.longitude = site.longitude
+        self.radius_m = site.radius_m
+        self.ssids = frozenset(s.strip().lower() for s in (site.ssids or []) if s and s.strip())
+        self.allowed_ips = network_policy.IntervalSet(network_policy.parse_networks(site.allowed_ips or []))
+
+    def cells(self) -> Optional[List[Tuple[int, int, int]]]:
+        """Cells of the finest grid the circle's bounding box fits in, or None if it fits in none."""
+        dlat = self.radius_m / METERS_PER_DEG_LAT
+        dlng = self.radius_m / (METERS_PER_DEG_LAT * max(math.cos(math.radians(self.latitude)), 0.01))
+        south = max(-90.0, self.latitude - dlat)
+        north = min(90.0 - 1e-9, self.latitude + dlat)
+        for grid, (_, lng_bits) in enumerate(GRIDS):
+            _, lat0, lng0 = _cell(grid, south, self.longitude - dlng)
+            _, lat1, _ = _cell(grid, north, self.longitude)
+            lng_span = int((2 * dlng) // (360.0 / 2 ** lng_bits)) + 2
+            if (lat1 - lat0 + 1) * lng_span <= MAX_CELLS_PER_SITE:
+                return [(grid, i, (lng0 + j) % 2 ** lng_bits)
+                        for i in range(lat0, lat1 + 1) for j in range(lng_span)]
+        return None
+
+
+class SiteIndex:
+    def __init__(self, sites: List[models.Site]):
+        self.sites = [CompiledSite(s) for s in sites]
+        self._buckets: Dict[Tuple[int, int, int], List[CompiledSite]] = {}
+        self._wide: List[CompiledSite] = []
+        for site in self.sites:
+            cells = site.cells()
+            if cells is None:
+                self._wide.append(site)
+                continue
+            for cell in cells:
+                self._buckets.setdefault(cell, []).append(site)
+
+    def __len__(self) -> int:
+        return len(self.sites)
+
+    def candidates(self, lat: float, lng: float) -> List[CompiledSite]:
+        found = list(self._wide)
+        for grid in range(len(GRIDS)):
+            found += self._buckets.get(_cell(grid, lat, lng), ())
+        return found
+
+    def containing(self, lat: Optional[float], lng: Optional[float]) -> List[Tuple[float, CompiledSite]]:
+        """(distance_m, site) for every site whose circle contains the point, nearest first."""
+        if lat is None or lng is None:
+            return []
+        hits = []
+        for site in self.candidates(lat, lng):
+            dist = haversine_distance_m(lat, lng, site.latitude, site.longitude)
+            if dist <= site.radius_m:
+                hits.append((dist, site))
+        hits.sort(key=lambda h: (h[0], h[1].id))
+        return hits
+
+
+class SiteRegistry:
+    def __init__(self, refresh_seconds: float = settings.SITES_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._index = SiteIndex([])
+        self._signature = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._next_refresh = 0.0
+
+    def current(self, db: Session) -> SiteIndex:
+        if time.monotonic() < self._next_refresh:
+            return self._index
+        S = models.Site
+        signature = tuple(db.execute(
+            select(func.count(S.id), func.max(S.updated_at)).execution_options(use_primary=True)
+        ).one())
+        with self._lock:
+            if signature != self._signature:
+                sites = db.execute(
+                    select(S).where(S.is_active == True).execution_options(use_primary=True)
+                ).scalars().all()
+                self._index = SiteIndex(sites)
+                self._signature = signature
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+            return self._index
+
+
+registry = SiteRegistry()
+
+
+class Verdict(NamedTuple):
+    site_id: Optional[int]
+    ssid_ok: bool
+    geo_ok: bool
+    ip_ok: bool
+
+    @property
+    def ok(self) -> bool:
+        return self.ssid_ok and self.geo_ok and self.ip_ok
+
+
+def _site_verdict(policy, hits, ssid: Optional[str], client_ip: Optional[str], global_ip_ok: bool) -> Verdict:
+    """First site (nearest first) whose SSID and IP lists accept the punch, else the nearest one's verdict."""
+    ssid_key = (ssid or "").strip().lower()
+    ip = network_policy.parse_ip(client_ip)
+    verdicts = []
+    for _, site in hits:
+        ssid_ok = ssid_key in site.ssids if site.ssids else policy.ssid_allowed(ssid)
+        ip_ok = ip in site.allowed_ips if site.allowed_ips else global_ip_ok
+        if ssid_ok and ip_ok:
+            return Verdict(site.id, True, True, True)
+        verdicts.append(Verdict(site.id, ssid_ok, True, ip_ok))
+    # nothing passed: report against the nearest site
+    return verdicts[0]
+
+
+def check_locations(db: Session, punches: Sequence[Tuple[Optional[float], Optional[float], Optional[str], Optional[str]]]) -> List[Verdict]:
+    """
+    Verdicts for many (lat, lng, ssid, client_ip) punches at once (offline
+    batches): every distance to the office or to the candidate sites is
+    computed in one haversine_distances_m call (vectorised with NumPy).
+    """
+    policy = network_policy.current()
+    index = registry.current(db)
+    ssid_ok = [policy.ssid_allowed(p[2]) for p in punches]
+    ip_ok = [policy.ip_allowed(p[3]) or policy.on_router_network(p[3]) for p in punches]
+
+    if not len(index):
+        n = len(punches)
+        dist = haversine_distances_m([p[0] for p in punches], [p[1] for p in punches],
+                                     [settings.OFFICE_LAT] * n, [settings.OFFICE_LNG] * n)
+        return [Verdict(None, ssid_ok[i], dist[i] <= settings.ALLOWED_RADIUS_METERS, ip_ok[i]) for i in range(n)]
+
+    # (punch, candidate site) pairs from the grid buckets, then one distance pass over all of them
+    owners, sites = [], []
+    for i, (lat, lng, _, _) in enumerate(punches):
+        if lat is None or lng is None:
+            continue
+        for site in index.candidates(lat, lng):
+            owners.append(i)
+            sites.append(site)
+    dist = haversine_distances_m([punches[i][0] for i in owners], [punches[i][1] for i in owners],
+                                 [s.latitude for s in sites], [s.longitude for s in sites])
+    hits: List[list] = [[] for _ in punches]
+    for i, site, d in zip(owners, sites, dist):
+        if d <= site.radius_m:
+            hits[i].append((d, site))
+
+    verdicts = []
+    for i, (_, _, ssid, client_ip) in enumerate(punches):
+        if not hits[i]:
+            verdicts.append(Verdict(None, ssid_ok[i], False, ip_ok[i]))
+            continue
+        hits[i].sort(key=lambda h: (h[0], h[1].id))
+        verdicts.append(_site_verdict(policy, hits[i], ssid, client_ip, ip_ok[i]))
+    return verdicts
+
+
+def check_location(db: Session, lat: Optional[float], lng: Optional[float],
+                   ssid: Optional[str], client_ip: Optional[str]) -> Verdict:
+    """SSID, geo and IP verdict for a punch, and the site it matched (None = legacy office)."""
+    return check_locations(db, [(lat, lng, ssid, client_ip)])[0]
@@ -1,22 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from . import database, models, schemas, utils
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from typing import List, Tuple
+import csv, io, json
+from . import database, models, schemas, utils, passwords, login_ids, mailer
 
 router = APIRouter(prefix="/invites", tags=["Invites"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 
 # --- Admin creates invite (with existing code) ---
 @router.post("/")
-def create_invite(request: schemas.InviteRequest, 
-                  db: Session = Depends(get_db), 
-                  current_user: models.User = Depends(utils.get_current_user)):
+async def create_invite(request: schemas.InviteRequest, 
+                  db: AsyncSession = Depends(get_db), 
+                  current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can invite users")
 
@@ -27,36 +30,162 @@ def create_invite(request: schemas.InviteRequest,
         code=request.code   # ✅ no UUID, use provided code
     )
     db.add(invite)
-    db.commit()
-    db.refresh(invite)
 
-    # Send email with provided code
-    try:
-        utils.send_invite_email(request.email, request.full_name, request.code)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to send email: {e}")
+    # Queue the email in the same transaction; mailer.worker sends it
+    subject, body = mailer.invite_email(request.full_name, request.code)
+    mailer.enqueue(db, request.email, subject, body)
+    await db.commit()
+    mailer.worker.wake()
 
     return {"message": f"Invite sent to {request.email}", "code": request.code}
 
 
+# --- Admin bulk import (CSV or JSON) ---
+BULK_INVITE_MAX_ROWS = 20000
+_IN_CHUNK = 1000   # keep IN (...) lists a sane size
+
+def _parse_bulk_rows(body: bytes, content_type: str) -> List[dict]:
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8 encoded")
+    if "csv" in content_type:
+        return [dict(r) for r in csv.DictReader(io.StringIO(text))]
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or text/csv")
+    if isinstance(data, dict):
+        data = data.get("invites")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of invites")
+    return data
+
+async def _existing(db: AsyncSession, column, values, ignore_case: bool = False) -> set:
+    """Values already in `column`; with ignore_case both sides are lowercased (and so is the result)."""
+    found = set()
+    if ignore_case:
+        column = func.lower(column)
+        values = {v.lower() for v in values}
+    values = list(values)
+    for i in range(0, len(values), _IN_CHUNK):
+        found.update((await db.execute(select(column).where(column.in_(values[i:i + _IN_CHUNK])))).scalars())
+    return found
+
+def _validate_rows(raw_rows: List[dict]) -> Tuple[list, list]:
+    """Per-row results (None for rows still to check against the database) and the valid (index, row) pairs."""
+    results = []
+    valid = []
+    seen_emails, seen_codes = set(), set()
+    for i, raw in enumerate(raw_rows):
+        try:
+            row = schemas.InviteRequest(**{k: (v.strip() if isinstance(v, str) else v) for k, v in dict(raw).items()})
+        except (ValidationError, TypeError, ValueError) as e:
+            results.append({"row": i, "email": (raw or {}).get("email") if isinstance(raw, dict) else None,
+                            "status": "invalid", "detail": str(e).splitlines()[0]})
+            continue
+        email = row.email.lower()
+        if email in seen_emails or row.code in seen_codes:
+            results.append({"row": i, "email": row.email, "status": "duplicate_in_batch"})
+            continue
+        seen_emails.add(email)
+        seen_codes.add(row.code)
+        valid.append((i, row))
+        results.append(None)
+    return results, valid
+
+async def _import_invites(db: AsyncSession, raw_rows: List[dict]) -> List[dict]:
+    # validating up to BULK_INVITE_MAX_ROWS rows is CPU work: keep it off the event loop
+    results, valid = await run_in_threadpool(_validate_rows, raw_rows)
+
+    emails = [r.email for _, r in valid]
+    invited = await _existing(db, models.Invite.email, emails, ignore_case=True)
+    registered = await _existing(db, models.User.email, emails, ignore_case=True)
+    taken_codes = await _existing(db, models.Invite.code, [r.code for _, r in valid])
+
+    to_insert = []
+    for i, row in valid:
+        email = row.email.lower()
+        if email in registered:
+            status = "user_exists"
+        elif email in invited:
+            status = "invite_exists"
+        elif row.code in taken_codes:
+            status = "code_exists"
+        else:
+            status = "created"
+            to_insert.append(row)
+        results[i] = {"row": i, "email": row.email, "status": status}
+
+    if to_insert:
+        now = datetime.utcnow()
+        await db.execute(insert(models.Invite), [
+            {"email": r.email, "full_name": r.full_name, "code": r.code, "is_used": False} for r in to_insert
+        ])
+        outbox = []
+        for r in to_insert:
+            subject, body = mailer.invite_email(r.full_name, r.code)
+            outbox.append({"to_email": r.email, "subject": subject, "body": body,
+                           "status": "pending", "attempts": 0, "next_attempt_at": now})
+        await db.execute(insert(models.EmailOutbox), outbox)
+    await db.commit()
+    return results
+
+@router.post("/bulk")
+async def create_invites_bulk(request: Request,
+                              db: AsyncSession = Depends(get_db),
+                              current_user: models.User = Depends(get_current_user)):
+    """
+    Admin: import many invites at once.
+    Body is a JSON array of {email, full_name, code} (or {"invites": [...]}), or text/csv
+    with those column headers. Duplicates are checked with a few set-based queries, valid
+    rows are inserted with one multi-row INSERT and their emails queued in the outbox.
+    """
+    if current_user.role != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can invite users")
+
+    raw_rows = _parse_bulk_rows(await request.body(), request.headers.get("content-type", ""))
+    if len(raw_rows) > BULK_INVITE_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_INVITE_MAX_ROWS} rows per request")
+
+    results = await _import_invites(db, raw_rows)
+    mailer.worker.wake()
+
+    created = sum(1 for r in results if r["status"] == "created")
+    return {"total": len(results), "created": created, "skipped": len(results) - created, "rows": results}
+
+
 # --- Signup (no invite check, user enters their own code) ---
-@router.post("/signup")
-def signup_with_invite(request: schemas.InviteSignup, db: Session = Depends(get_db)):
+# Lookups end their transaction before returning so the pooled connection is not
+# held while the handler awaits bcrypt.
+
+async def _find_open_invite(db: AsyncSession, code: str):
     # Find invite by code
-    invite = db.query(models.Invite).filter(
-        models.Invite.code == request.code,
+    invite = (await db.execute(select(models.Invite).where(
+        models.Invite.code == code,
         models.Invite.is_used == False
-    ).first()
+    ))).scalars().first()
 
     if not invite:
         raise HTTPException(status_code=400, detail="Invalid or used invite code")
 
     # Check if email already registered
-    existing_user = db.query(models.User).filter(models.User.email == invite.email).first()
+    existing_user = (await db.execute(select(models.User.id).where(models.User.email == invite.email))).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="This email is already registered")
-
-    hashed = utils.hash_password(request.password)
+    db.expunge(invite)
+    await db.rollback()
+    return invite
+
+async def _register_from_invite(db: AsyncSession, invite: models.Invite, request: schemas.InviteSignup, hashed: str) -> models.User:
+    # Mark invite as used (guarded, in case it was consumed while we were hashing)
+    claimed = (await db.execute(update(models.Invite).where(
+        models.Invite.id == invite.id,
+        models.Invite.is_used == False
+    ).values(is_used=True))).rowcount
+    if not claimed:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Invalid or used invite code")
 
     # Create user with data from invite + role from request
     user = models.User(
@@ -66,12 +195,23 @@ def signup_with_invite(request: schemas.InviteSignup, db: Session = Depends(get_
         role=request.role
     )
     db.add(user)
-
-    # Mark invite as used
-    invite.is_used = True
-
-    db.commit()
-    db.refresh(user)
+    try:
+        await db.flush()
+        login_ids.add_identifiers(db, user.id, email=user.email, code=invite.code)
+        await db.commit()
+    except IntegrityError:
+        # email or code already taken (users.email / login_identifiers are unique); the claim rolls back too
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="This email or invite code is already registered")
+    await db.refresh(user)
+    return user
+
+# bcrypt runs in passwords.pool (worker processes); the DB calls are awaited on the async session
+@router.post("/signup")
+async def signup_with_invite(request: schemas.InviteSignup, db: AsyncSession = Depends(get_db)):
+    invite = await _find_open_invite(db, request.code)
+    hashed = await passwords.hash_password_async(request.password)
+    user = await _register_from_invite(db, invite, request, hashed)
 
     return {
         "message": "User registered successfully",
@@ -85,12 +225,12 @@ def signup_with_invite(request: schemas.InviteSignup, db: Session = Depends(get_
 
 # --- List all invites ---
 @router.get("/")
-def list_invites(db: Session = Depends(get_db),
-                 current_user: models.User = Depends(utils.get_current_user)):
+async def list_invites(db: AsyncSession = Depends(get_db),
+                 current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can view invites")
 
-    invites = db.query(models.Invite).all()
+    invites = (await db.execute(select(models.Invite))).scalars().all()
     return [
         {
             "id": i.id,
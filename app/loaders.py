@@ -0,0 +1,66 @@
+# loaders.py
+"""
+Named relationship loading profiles.
+
+Model relationships default to lazy="select", so nothing is eager-loaded unless a
+router asks for it. Each endpoint picks the profile that matches what it returns:
+
+    db.query(models.Project).options(*loaders.profile("project_list")).all()
+"""
+from sqlalchemy.orm import selectinload, load_only
+from . import models
+
+# Columns safe to expose when a User is returned as part of another object
+USER_SUMMARY_COLUMNS = (
+    models.User.id,
+    models.User.full_name,
+    models.User.email,
+    models.User.role,
+    models.User.is_active,
+)
+
+USER_PUBLIC_COLUMNS = USER_SUMMARY_COLUMNS + (
+    models.User.failed_attendance_attempts,
+    models.User.is_blocked,
+)
+
+PROFILES = {
+    # user listings (/users/, /students/, /staff/): no password, no relationships
+    "user_list": (
+        load_only(*USER_PUBLIC_COLUMNS),
+    ),
+    # /projects/: members as id/email/role only
+    "project_list": (
+        selectinload(models.Project.members).load_only(*USER_SUMMARY_COLUMNS),
+    ),
+    # /me/projects/full: project -> sprints -> tasks -> bugs, no members
+    "project_lifecycle": (
+        selectinload(models.Project.sprints)
+        .selectinload(models.Sprint.tasks)
+        .selectinload(models.Task.bugs),
+    ),
+    # /tasks/full
+    "task_with_bugs": (
+        selectinload(models.Task.bugs),
+    ),
+    # /assignments/{id}/submissions: submitter name without one query per row
+    "submission_with_student": (
+        selectinload(models.AssignmentSubmission.student).load_only(*USER_SUMMARY_COLUMNS),
+    ),
+    # /classes/: staff and students as summaries
+    "class_list": (
+        selectinload(models.Class.staff).load_only(*USER_SUMMARY_COLUMNS),
+        selectinload(models.Class.students).load_only(*USER_SUMMARY_COLUMNS),
+    ),
+    "class_staff": (
+        selectinload(models.Class.staff).load_only(*USER_SUMMARY_COLUMNS),
+    ),
+    "class_students": (
+        selectinload(models.Class.students).load_only(*USER_PUBLIC_COLUMNS),
+    ),
+}
+
+
+def profile(name: str) -> tuple:
+    """Return the loader options for a named profile (raises KeyError on typos)."""
+    return PROFILES[name]
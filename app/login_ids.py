@@ -0,0 +1,96 @@
+# login_ids.py
+"""
+Login identifier lookup.
+
+    python -m app.login_ids backfill    # add email/code identifiers for existing users
+"""
+from typing import List, Optional
+import sys
+
+from sqlalchemy import select, literal, union_all
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+
+from . import database, models
+
+
+def normalize(identifier: str) -> str:
+    return (identifier or "").strip().lower()
+
+
+def add_identifiers(db: Session, user_id: int, email: Optional[str] = None, code: Optional[str] = None):
+    """Register a user's identifiers (does not commit)."""
+    if email:
+        db.add(models.LoginIdentifier(user_id=user_id, kind="email", identifier=normalize(email)))
+    if code:
+        db.add(models.LoginIdentifier(user_id=user_id, kind="code", identifier=normalize(code)))
+
+
+def resolve_login_user(db: Session, identifier: str):
+    """
+    Resolve a login identifier to a user row in one round trip.
+
+    Three index-backed branches are UNIONed: the identifier table, users.email
+    (covers users created before the backfill ran) and users.full_name. An exact
+    identifier/email match wins; a full-name match is only accepted when it is
+    unique, otherwise the login is rejected as ambiguous.
+    Returns a row with id, full_name, email, password, role or None.
+    """
+    raw = (identifier or "").strip()
+    ident = normalize(raw)
+    U = models.User
+    cols = (U.id, U.full_name, U.email, U.password, U.role)
+
+    by_identifier = (
+        select(*cols, literal(1).label("exact"))
+        .join(models.LoginIdentifier, models.LoginIdentifier.user_id == U.id)
+        .where(models.LoginIdentifier.identifier == ident)
+    )
+    by_email = select(*cols, literal(1).label("exact")).where(U.email == raw)
+    by_name = select(*cols, literal(0).label("exact")).where(U.full_name == raw).limit(2)
+    stmt = union_all(by_identifier, by_email, select(by_name.subquery()))
+
+    rows = db.execute(stmt).all()
+    exact = {r.id: r for r in rows if r.exact}
+    if exact:
+        return exact[min(exact)]
+    by_name_ids = {r.id: r for r in rows}
+    if len(by_name_ids) > 1:
+        raise HTTPException(status_code=401, detail="Several users share this name; log in with email or code")
+    return next(iter(by_name_ids.values()), None)
+
+
+def backfill(db: Session) -> int:
+    """Create missing email identifiers for all users and code identifiers from used invites."""
+    existing = set(db.execute(select(models.LoginIdentifier.identifier)).scalars())
+    added = 0
+    users = db.execute(select(models.User.id, models.User.email)).all()
+    user_by_email = {normalize(u.email): u.id for u in users}
+    rows: List[dict] = []
+    for email, user_id in user_by_email.items():
+        if email and email not in existing:
+            rows.append({"user_id": user_id, "kind": "email", "identifier": email})
+            existing.add(email)
+    invites = db.execute(select(models.Invite.email, models.Invite.code).where(models.Invite.is_used == True)).all()
+    for inv in invites:
+        code = normalize(inv.code)
+        user_id = user_by_email.get(normalize(inv.email))
+        if user_id and code and code not in existing:
+            rows.append({"user_id": user_id, "kind": "code", "identifier": code})
+            existing.add(code)
+    if rows:
+        db.execute(models.LoginIdentifier.__table__.insert(), rows)
+        added = len(rows)
+    db.commit()
+    return added
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        print(__doc__.strip())
+        sys.exit(2)
+    session = database.SessionLocal()
+    try:
+        print(f"added {backfill(session)} login identifiers")
+    finally:
+        session.close()
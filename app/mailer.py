@@ -0,0 +1,209 @@
+# mailer.py
+"""
+Email outbox.
+
+Handlers call enqueue() inside their own transaction; OutboxWorker (a daemon
+thread started with the app) drains email_outbox in batches over one persistent
+SMTP connection. Failed sends are retried with exponential backoff and
+dead-lettered (status="dead") after OUTBOX_MAX_ATTEMPTS.
+"""
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from . import database, models, utils
+from .config import settings
+
+# a claimed batch is invisible to other workers for this long; if the worker dies
+# mid-batch the rows become due again afterwards
+CLAIM_LEASE_SECONDS = 300
+
+
+def invite_email(full_name: str, invite_code: str) -> tuple:
+    subject = "ODDO – You are invited!"
+    body = f"""
+    Hi {full_name},
+
+    You have been invited to join ODDO Project Management System.
+
+    Please use the following invite code to register your account:
+
+    Invite Code: {invite_code}
+
+    Go to http://127.0.0.1:8000/docs and sign up using this code.
+
+    Regards,
+    ODDO Team
+    """
+    return subject, body
+
+
+def enqueue(db: Session, to_email: str, subject: str, body: str) -> models.EmailOutbox:
+    """Add a message to the outbox; it is sent once the caller's transaction commits."""
+    msg = models.EmailOutbox(to_email=to_email, subject=subject, body=body,
+                             status="pending", attempts=0, next_attempt_at=datetime.utcnow())
+    db.add(msg)
+    return msg
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+
+
+def _connection_lost(e: Exception) -> bool:
+    """True for errors that leave the SMTP connection unusable (SMTPException subclasses OSError)."""
+    if isinstance(e, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)
+
+
+class OutboxWorker:
+    def __init__(self, host: str = utils.SMTP_SERVER, port: int = utils.SMTP_PORT,
+                 username: Optional[str] = utils.SMTP_EMAIL, password: Optional[str] = utils.SMTP_PASSWORD,
+                 sender: str = utils.SMTP_EMAIL, use_tls: bool = True,
+                 batch_size: int = settings.OUTBOX_BATCH_SIZE,
+                 max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+                 poll_seconds: float = settings.OUTBOX_POLL_SECONDS):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.sender = sender
+        self.use_tls = use_tls
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+        self.failed = 0
+        self.dead = 0
+
+    # --- SMTP connection ---
+    def _connect(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=30)
+            if self.use_tls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+            self._smtp = smtp
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _send(self, msg: models.EmailOutbox):
+        mime = MIMEMultipart()
+        mime["From"] = self.sender
+        mime["To"] = msg.to_email
+        mime["Subject"] = msg.subject
+        mime.attach(MIMEText(msg.body, "plain"))
+        try:
+            self._connect().sendmail(self.sender, msg.to_email, mime.as_string())
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # stale persistent connection: reconnect once
+            self._disconnect()
+            self._connect().sendmail(self.sender, msg.to_email, mime.as_string())
+
+    # --- outbox processing ---
+    def _claim(self, db: Session) -> list:
+        now = datetime.utcnow()
+        rows = (
+            db.query(models.EmailOutbox)
+            .filter(models.EmailOutbox.status.in_(("pending", "sending")))
+            .filter(models.EmailOutbox.next_attempt_at <= now)
+            .order_by(models.EmailOutbox.next_attempt_at, models.EmailOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for row in rows:
+            row.status = "sending"
+            row.next_attempt_at = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+        db.commit()
+        return rows
+
+    def process_batch(self) -> int:
+        """Send one batch; returns how many messages were claimed."""
+        db = database.SessionLocal()
+        try:
+            rows = self._claim(db)
+            for row in rows:
+                try:
+                    self._send(row)
+                except Exception as e:
+                    row.attempts = (row.attempts or 0) + 1
+                    row.last_error = str(e)[:2000]
+                    if row.attempts >= self.max_attempts:
+                        row.status = "dead"
+                        self.dead += 1
+                    else:
+                        row.status = "pending"
+                        row.next_attempt_at = datetime.utcnow() + retry_delay(row.attempts)
+                        self.failed += 1
+                    if _connection_lost(e):
+                        self._disconnect()
+                else:
+                    row.status = "sent"
+                    row.sent_at = datetime.utcnow()
+                    row.last_error = None
+                    self.sent += 1
+            db.commit()
+            return len(rows)
+        finally:
+            db.close()
+
+    def drain(self) -> int:
+        """Process batches until nothing is due (used by tests/benchmarks)."""
+        total = 0
+        while True:
+            n = self.process_batch()
+            total += n
+            if n == 0:
+                return total
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self.process_batch()
+            except Exception as e:
+                print("❌ Outbox worker error:", e)
+                claimed = 0
+            if claimed < self.batch_size:
+                # caught up: drop the SMTP connection and wait for new mail
+                self._disconnect()
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+        self._disconnect()
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+worker = OutboxWorker()
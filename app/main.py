@@ -1,5 +1,7 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from . import database, models
+from . import database, models, passwords, mailer, metrics
+from .config import settings
 from .auth import router as auth_router
 from .invites import router as invites_router
 from .project import router as projects_router
@@ -11,22 +13,40 @@ from .projects_user_view import router as projects_user_view_router
 from .classes import router as classes_router
 from .staff import router as staff_router
 from .students import router as students_router
-from .assignments import router as assignments_router
+from .assignments import router as assignments_router, MEDIA_DIR as ASSIGNMENTS_MEDIA_DIR
 from .attendance import router as attendance_router   # 👈 new
 from .finance import router as finance_router
+from .sites import router as sites_router
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import pathlib, os
 
-models.Base.metadata.create_all(bind=database.engine)
-
-app = FastAPI(title="ODDO – Project & Team Management System")
 # MEDIA_DIR absolute path (better than relative)
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]   # <-- repo root
 MEDIA_DIR = PROJECT_ROOT / "media"
 
-os.makedirs(MEDIA_DIR, exist_ok=True)
-app.mount("/media", StaticFiles(directory=str(MEDIA_DIR)), name="media")
+
+# Importing this module must not touch the database or the filesystem: every
+# uvicorn worker imports it. The schema is managed by migrations (`alembic
+# upgrade head` as a deploy step) and the engine connects on first use.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+    os.makedirs(ASSIGNMENTS_MEDIA_DIR, exist_ok=True)
+    if settings.AUTO_CREATE_SCHEMA:
+        # local development only; never a substitute for migrations
+        models.Base.metadata.create_all(bind=database.engine)
+    if settings.OUTBOX_WORKER_ENABLED:
+        mailer.worker.start()
+    database.replicas.start()
+    yield
+    mailer.worker.stop()
+    database.replicas.stop()
+    passwords.pool.shutdown()
+
+
+app = FastAPI(title="ODDO – Project & Team Management System", lifespan=lifespan)
+app.mount("/media", StaticFiles(directory=str(MEDIA_DIR), check_dir=False), name="media")
 
 origins = [
     "*",
@@ -54,6 +74,9 @@ app.include_router(students_router)
 app.include_router(assignments_router)
 app.include_router(attendance_router)   # 👈 new
 app.include_router(finance_router)
+app.include_router(sites_router)
+app.include_router(metrics.router)
+app.middleware("http")(metrics.middleware)
 
 
 
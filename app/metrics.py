@@ -0,0 +1,282 @@
+# metrics.py
+"""
+Per-route database and connection-pool metrics.
+
+Engine and pool event hooks feed a RequestStats object kept in a contextvar
+for the duration of each HTTP request (see middleware()). When the response
+is ready the numbers are folded into per-route totals, exposed at GET /metrics
+in Prometheus text format (only once METRICS_TOKEN is set), and returned to the caller as a Server-Timing header.
+
+Recorded per request: statement count, DB time, the slowest statement, time
+spent waiting for a pooled connection, time a connection was held, and
+whether the pool had to hand out overflow connections. Counting costs two
+perf_counter() calls per statement; statement text is only kept for a
+METRICS_STATEMENT_SAMPLE_RATE fraction of requests.
+
+With QUERY_SHAPE_TRACKING on (tests/benchmarks only) every statement's SQL
+text is also counted per request, so repeated identical shapes - the N+1
+pattern - can be reported and asserted on; see capture() and
+benchmarks/query_budgets.py.
+"""
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from .config import settings
+
+STATEMENT_MAX_LENGTH = 300
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "slowest_seconds", "slowest_statement",
+                 "checkout_wait_seconds", "hold_seconds", "overflow", "sampled", "shapes", "route")
+
+    def __init__(self, sampled: bool, track_shapes: bool = False):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.checkout_wait_seconds = 0.0
+        self.hold_seconds = 0.0
+        self.overflow = False
+        self.sampled = sampled
+        self.shapes: Optional[Counter] = Counter() if track_shapes else None
+        self.route: Optional[str] = None
+
+    def repeated_shapes(self, threshold: int) -> Dict[str, int]:
+        """Statements issued at least `threshold` times in this request (likely N+1)."""
+        if not self.shapes:
+            return {}
+        return {sql: n for sql, n in self.shapes.items() if n >= threshold}
+
+
+class RouteStats:
+    __slots__ = ("requests", "seconds", "queries", "max_queries", "db_seconds", "checkout_wait_seconds",
+                 "hold_seconds", "overflow_requests", "slowest_seconds", "slowest_statement")
+
+    def __init__(self):
+        self.requests = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_seconds = 0.0
+        self.checkout_wait_seconds = 0.0
+        self.hold_seconds = 0.0
+        self.overflow_requests = 0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def add(self, seconds: float, rs: RequestStats):
+        self.requests += 1
+        self.seconds += seconds
+        self.queries += rs.queries
+        self.max_queries = max(self.max_queries, rs.queries)
+        self.db_seconds += rs.db_seconds
+        self.checkout_wait_seconds += rs.checkout_wait_seconds
+        self.hold_seconds += rs.hold_seconds
+        self.overflow_requests += int(rs.overflow)
+        if rs.slowest_statement is not None and rs.slowest_seconds >= self.slowest_seconds:
+            self.slowest_seconds = rs.slowest_seconds
+            self.slowest_statement = rs.slowest_statement
+
+
+current: ContextVar[Optional[RequestStats]] = ContextVar("request_db_stats", default=None)
+routes: Dict[str, RouteStats] = {}
+engines: Dict[str, Engine] = {}
+_captures: List[List[RequestStats]] = []
+
+
+def register_engine(name: str, engine: Engine):
+    """Expose an engine's pool size/checked-out/overflow gauges under this name."""
+    engines[name] = engine
+
+
+# ---------------- engine / pool hooks ----------------
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if current.get() is not None:
+        conn.info.setdefault("_metrics_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    rs = current.get()
+    if rs is None:
+        return
+    started = conn.info.get("_metrics_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    rs.queries += 1
+    rs.db_seconds += elapsed
+    if rs.shapes is not None:
+        rs.shapes[" ".join(statement.split())] += 1
+    if elapsed > rs.slowest_seconds:
+        rs.slowest_seconds = elapsed
+        if rs.sampled:
+            rs.slowest_statement = " ".join(statement.split())[:STATEMENT_MAX_LENGTH]
+
+
+@event.listens_for(Pool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["_metrics_checkout"] = time.perf_counter()
+
+
+@event.listens_for(Pool, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop("_metrics_checkout", None)
+    rs = current.get()
+    if rs is not None and started is not None:
+        rs.hold_seconds += time.perf_counter() - started
+
+
+def _timed_get(pool, get):
+    rs = current.get()
+    if rs is None:
+        return get()
+    t0 = time.perf_counter()
+    try:
+        return get()
+    finally:
+        rs.checkout_wait_seconds += time.perf_counter() - t0
+        if pool.overflow() > 0:
+            rs.overflow = True
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that charges connection wait time and overflow use to the current request."""
+
+    def _do_get(self):
+        return _timed_get(self, super()._do_get)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        return _timed_get(self, super()._do_get)
+
+
+# ---------------- request middleware ----------------
+def _route_label(request: Request) -> str:
+    route = request.scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    return f"{request.method} {path}"
+
+
+def server_timing(rs: RequestStats, total_seconds: float) -> str:
+    return (f'db;dur={rs.db_seconds * 1000:.1f};desc="{rs.queries} queries", '
+            f'pool;dur={rs.checkout_wait_seconds * 1000:.1f}, '
+            f'app;dur={total_seconds * 1000:.1f}')
+
+
+async def middleware(request: Request, call_next):
+    if not settings.METRICS_ENABLED:
+        return await call_next(request)
+    rs = RequestStats(sampled=random.random() < settings.METRICS_STATEMENT_SAMPLE_RATE,
+                      track_shapes=settings.QUERY_SHAPE_TRACKING or bool(_captures))
+    token = current.set(rs)
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current.reset(token)
+        elapsed = time.perf_counter() - t0
+        _record(request, rs, elapsed)
+    response.headers["Server-Timing"] = server_timing(rs, elapsed)
+    return response
+
+
+def _record(request: Request, rs: RequestStats, elapsed: float):
+    label = rs.route = _route_label(request)
+    if label != "GET /metrics":
+        routes.setdefault(label, RouteStats()).add(elapsed, rs)
+    for captured in _captures:
+        captured.append(rs)
+    if settings.QUERY_SHAPE_TRACKING:
+        repeated = rs.repeated_shapes(settings.QUERY_REPEAT_THRESHOLD)
+        if repeated:
+            print(f"⚠️ possible N+1 in {label}: " + "; ".join(f"{n}x {sql[:120]}" for sql, n in repeated.items()))
+
+
+@contextmanager
+def capture():
+    """
+    Collect the RequestStats of every request finished inside the block, with
+    statement shapes tracked:
+
+        with metrics.capture() as seen:
+            client.get("/tasks/full", headers=h)
+        assert seen[0].queries <= 3
+    """
+    captured: List[RequestStats] = []
+    _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        _captures.remove(captured)
+
+
+# ---------------- Prometheus exposition ----------------
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render() -> str:
+    lines = []
+
+    def family(name: str, kind: str, help_text: str, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}")
+
+    items = sorted(routes.items())
+    family("oddo_http_requests_total", "counter", "Requests handled per route.",
+           [({"route": r}, s.requests) for r, s in items])
+    family("oddo_http_request_seconds_total", "counter", "Wall time spent in requests per route.",
+           [({"route": r}, round(s.seconds, 6)) for r, s in items])
+    family("oddo_db_queries_total", "counter", "SQL statements executed per route.",
+           [({"route": r}, s.queries) for r, s in items])
+    family("oddo_db_queries_max", "gauge", "Most statements issued by a single request per route.",
+           [({"route": r}, s.max_queries) for r, s in items])
+    family("oddo_db_seconds_total", "counter", "Time spent executing SQL per route.",
+           [({"route": r}, round(s.db_seconds, 6)) for r, s in items])
+    family("oddo_db_pool_wait_seconds_total", "counter", "Time spent waiting for a pooled connection per route.",
+           [({"route": r}, round(s.checkout_wait_seconds, 6)) for r, s in items])
+    family("oddo_db_pool_hold_seconds_total", "counter", "Time pooled connections were checked out per route.",
+           [({"route": r}, round(s.hold_seconds, 6)) for r, s in items])
+    family("oddo_db_pool_overflow_requests_total", "counter", "Requests that ran while the pool was in overflow.",
+           [({"route": r}, s.overflow_requests) for r, s in items])
+    family("oddo_db_slowest_statement_seconds", "gauge", "Slowest sampled statement per route.",
+           [({"route": r, "statement": s.slowest_statement}, round(s.slowest_seconds, 6))
+            for r, s in items if s.slowest_statement])
+
+    pools = [(name, e.pool) for name, e in sorted(engines.items()) if isinstance(e.pool, QueuePool)]
+    family("oddo_db_pool_size", "gauge", "Configured pool size.",
+           [({"engine": n}, p.size()) for n, p in pools])
+    family("oddo_db_pool_checked_out", "gauge", "Connections currently checked out.",
+           [({"engine": n}, p.checkedout()) for n, p in pools])
+    family("oddo_db_pool_overflow", "gauge", "Overflow connections currently open (negative = unused pool slots).",
+           [({"engine": n}, p.overflow()) for n, p in pools])
+    return "\n".join(lines) + "\n"
+
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics")
+def metrics(request: Request):
+    # route and SQL text are internals: not published until a token is configured
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if request.headers.get("Authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(render(), media_type="text/plain; version=0.0.4")
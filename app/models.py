@@ -1,7 +1,7 @@
 # models.py
 from sqlalchemy import (
-    Column, Integer, String, Boolean, ForeignKey, DateTime, Table, Enum, UniqueConstraint,
-    Index, Float, Text, Numeric, JSON
+    Column, Integer, String, Boolean, ForeignKey, Date, DateTime, Table, Enum, UniqueConstraint,
+    Index, Float, Text, Numeric, JSON, BigInteger
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -32,6 +32,7 @@ staff_classes = Table(
     Base.metadata,
     Column("staff_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
     Column("class_id", Integer, ForeignKey("classes.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_staff_classes_class_id", "class_id"),   # PK only serves staff -> classes
 )
 
 # Student <-> Class (many-to-many)
@@ -40,8 +41,12 @@ student_classes = Table(
     Base.metadata,
     Column("student_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
     Column("class_id", Integer, ForeignKey("classes.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_student_classes_class_id", "class_id"),
 )
 
+# NOTE: relationships are lazy="select"; endpoints that need related rows opt into
+# a named profile from loaders.py instead of every query cascading through the graph.
+
 class User(Base):
     __tablename__ = "users"
 
@@ -53,23 +58,57 @@ class User(Base):
     is_active = Column(Boolean, default=True)
 
     # relationships
-    projects = relationship("Project", secondary=project_members, back_populates="members", lazy="selectin")
-    assigned_classes = relationship("Class", secondary=staff_classes, back_populates="staff", lazy="selectin")
-    enrolled_classes = relationship("Class", secondary=student_classes, back_populates="students", lazy="selectin")
+    projects = relationship("Project", secondary=project_members, back_populates="members", lazy="select")
+    assigned_classes = relationship("Class", secondary=staff_classes, back_populates="staff", lazy="select")
+    enrolled_classes = relationship("Class", secondary=student_classes, back_populates="students", lazy="select")
 
-    # attendance bookkeeping
+    # attendance bookkeeping; live failure counts are in attempt_limits.py, this keeps the count at block time
     failed_attendance_attempts = Column(Integer, default=0, nullable=False)
     is_blocked = Column(Boolean, default=False, nullable=False)
 
+    # /attendance/admin/blocked: only the blocked users, in keyset order
+    __table_args__ = (Index("ix_users_blocked_attempts", "is_blocked", "failed_attendance_attempts", "id"),)
+
     # relationship to Attendance (must match Attendance.user back_populates)
     attendances = relationship(
         "Attendance",
         back_populates="user",
-        lazy="selectin",
+        lazy="select",
         cascade="all, delete-orphan"
     )
 
 
+class LoginIdentifier(Base):
+    """
+    Every string a user may log in with (email, employee/student code, username),
+    stored normalized (see login_ids.normalize) under one unique index.
+    """
+    __tablename__ = "login_identifiers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)   # email, code, username
+    identifier = Column(String(191), nullable=False)
+
+    __table_args__ = (UniqueConstraint("identifier", name="uq_login_identifiers_identifier"),)
+
+
+class TokenRevocation(Base):
+    """
+    Append-only list of revoked access tokens, mirrored in memory by revocations.py.
+    A row revokes either one token (jti) or every token of user_id whose "tv"
+    (issue time in ms) is below min_token_version.
+    """
+    __tablename__ = "token_revocations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    jti = Column(String(64), nullable=True, index=True)
+    min_token_version = Column(BigInteger, nullable=True)
+    expires_at = Column(DateTime, nullable=False)   # every affected token is expired by then
+    created_at = Column(DateTime, server_default=func.now())
+
+
 class Invite(Base):
     __tablename__ = "invites"
 
@@ -80,6 +119,24 @@ class Invite(Base):
     is_used = Column(Boolean, default=False)
 
 
+class EmailOutbox(Base):
+    """Outgoing mail, written in the request transaction and sent by mailer.OutboxWorker."""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(191), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(20), default="pending", nullable=False)   # pending, sending, sent, dead
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_email_outbox_status_next", "status", "next_attempt_at"),)
+
+
 class Project(Base):
     __tablename__ = "projects"
 
@@ -89,8 +146,8 @@ class Project(Base):
     deadline = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
-    members = relationship("User", secondary=project_members, back_populates="projects", lazy="selectin")
-    sprints = relationship("Sprint", back_populates="project", cascade="all, delete-orphan", lazy="selectin")
+    members = relationship("User", secondary=project_members, back_populates="projects", lazy="select")
+    sprints = relationship("Sprint", back_populates="project", cascade="all, delete-orphan", lazy="select")
 
     __table_args__ = (UniqueConstraint("name", name="uq_projects_name"),)
 
@@ -105,7 +162,7 @@ class Sprint(Base):
     end_date = Column(DateTime, nullable=True)
 
     project = relationship("Project", back_populates="sprints")
-    tasks = relationship("Task", back_populates="sprint", cascade="all, delete-orphan", lazy="selectin")
+    tasks = relationship("Task", back_populates="sprint", cascade="all, delete-orphan", lazy="select")
 
     __table_args__ = (Index("ix_sprints_project_id_name", "project_id", "name"),)
 
@@ -123,7 +180,7 @@ class Task(Base):
 
     sprint = relationship("Sprint", back_populates="tasks")
     user = relationship("User", foreign_keys=[assigned_to])
-    bugs = relationship("Bug", back_populates="task", cascade="all, delete-orphan", lazy="selectin")
+    bugs = relationship("Bug", back_populates="task", cascade="all, delete-orphan", lazy="select")
 
 
 class Bug(Base):
@@ -145,8 +202,8 @@ class Class(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(120), unique=True, nullable=False, index=True)
 
-    staff = relationship("User", secondary=staff_classes, back_populates="assigned_classes", lazy="selectin")
-    students = relationship("User", secondary=student_classes, back_populates="enrolled_classes", lazy="selectin")
+    staff = relationship("User", secondary=staff_classes, back_populates="assigned_classes", lazy="select")
+    students = relationship("User", secondary=student_classes, back_populates="enrolled_classes", lazy="select")
 
 
 # --- Assignment related tables
@@ -161,9 +218,9 @@ class Assignment(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    created_by = Column(Integer, ForeignKey("users.id"))
-    class_id = Column(Integer, ForeignKey("classes.id"), nullable=True)
-    assigned_to_student = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), index=True)
+    class_id = Column(Integer, ForeignKey("classes.id"), nullable=True, index=True)
+    assigned_to_student = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     due_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     status = Column(Enum(AssignmentStatus, native_enum=False), default=AssignmentStatus.open)
@@ -178,8 +235,8 @@ class Assignment(Base):
 class AssignmentSubmission(Base):
     __tablename__ = "assignment_submissions"
     id = Column(Integer, primary_key=True, index=True)
-    assignment_id = Column(Integer, ForeignKey("assignments.id"))
-    student_id = Column(Integer, ForeignKey("users.id"))
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), index=True)
+    student_id = Column(Integer, ForeignKey("users.id"), index=True)
     submitted_at = Column(DateTime, default=datetime.utcnow)
     screenshot_path = Column(String(512), nullable=True)
     optional_link = Column(String(512), nullable=True)
@@ -220,12 +277,68 @@ class Attendance(Base):
     longitude = Column(Float, nullable=True)
     ssid = Column(String(255), nullable=True)
 
+    # geofence site the punch matched (see geofence.py); NULL = legacy single office
+    site_id = Column(Integer, ForeignKey("sites.id", ondelete="SET NULL", name="fk_attendance_site_id"), nullable=True, index=True)
+
     note = Column(Text, nullable=True)
 
     created_at = Column(DateTime, server_default=func.now(), nullable=True)
     updated_at = Column(DateTime, onupdate=func.now(), nullable=True)
 
-    user = relationship("User", back_populates="attendances", lazy="joined")
+    user = relationship("User", back_populates="attendances", lazy="select")
+
+    __table_args__ = (
+        # history (/attendance/me): newest first per user
+        Index("ix_attendance_user_punch_in", "user_id", "punch_in_time"),
+        # punch-in/out: a user's open session (punch_out_time IS NULL), newest first, and recent punch-outs
+        Index("ix_attendance_open", "user_id", "punch_out_time", "punch_in_time"),
+        # /attendance/admin/all across users: keyset order and date ranges
+        Index("ix_attendance_punch_in", "punch_in_time"),
+    )
+
+
+class AttendanceDaily(Base):
+    """
+    One row per user and (UTC) day, derived from Attendance by attendance_rollup.py:
+    refreshed by punch-out endpoints, rebuilt by its backfill.
+    """
+    __tablename__ = "attendance_daily"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    first_in = Column(DateTime, nullable=True)
+    last_out = Column(DateTime, nullable=True)
+    worked_seconds = Column(Integer, default=0, nullable=False)
+    sessions = Column(Integer, default=0, nullable=False)
+    anomaly = Column(Boolean, default=False, nullable=False)   # open session, out without in, or > 16h
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=True)
+
+    # month-wide reports across all users
+    __table_args__ = (Index("ix_attendance_daily_day", "day"),)
+
+
+class Site(Base):
+    """
+    A campus or branch office punches are accepted at: a circle around (latitude,
+    longitude) plus the SSIDs and IP ranges valid there (empty = the global
+    ALLOWED_SSID / ALLOWED_IPS settings). Loaded into geofence.SiteIndex.
+    """
+    __tablename__ = "sites"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(150), nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    radius_m = Column(Integer, nullable=False, default=50)
+    ssids = Column(JSON, nullable=True)          # list of SSIDs
+    allowed_ips = Column(JSON, nullable=True)    # list of IPs / CIDRs
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    # bumped on every change: the geofence index reloads when max(updated_at) moves
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # GET /sites/ and the geofence registry: active sites in id order
+    __table_args__ = (Index("ix_sites_active_id", "is_active", "id"),)
 
 
 # ------------------------
@@ -235,7 +348,7 @@ class Attendance(Base):
 class FeeStructure(Base):
     __tablename__ = "fee_structures"
     id = Column(Integer, primary_key=True, index=True)
-    class_id = Column(Integer, ForeignKey("classes.id", ondelete="CASCADE"), nullable=False, index=True)
+    class_id = Column(Integer, ForeignKey("classes.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(150), nullable=True)
     total_amount = Column(Numeric(12,2), nullable=False)
     terms = Column(Integer, default=3, nullable=False)
@@ -318,6 +431,8 @@ class AuditLog(Base):
 
     actor = relationship("User", foreign_keys=[actor_id], lazy="joined")
 
+    __table_args__ = (Index("ix_audit_logs_resource", "resource_type", "resource_id", "created_at"),)
+
 
 class StaffSalary(Base):
     __tablename__ = "staff_salaries"
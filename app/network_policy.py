@@ -0,0 +1,232 @@
+# network_policy.py
+"""
+Compiled attendance network policy: allowed SSIDs, allowed IPs, router
+networks and trusted proxies.
+
+The settings strings are parsed once into a NetworkPolicy: SSIDs become a
+normalised set, and every IP list becomes sorted, merged [first, last]
+integer intervals per IP version, so a membership test is one bisect however
+many CIDRs are configured. Invalid entries are skipped, as before.
+
+Sources, merged:
+  ALLOWED_SSID, ALLOWED_SSID_ALT, ALLOWED_IPS, ALLOWED_ROUTER_IPS, TRUSTED_PROXIES
+      comma-separated settings (env / .env)
+  NETWORK_POLICY_FILE
+      optional JSON file for long lists:
+      {"ssids": [...], "ips": [...], "router_ips": [...], "trusted_proxies": [...]}
+
+Reload: current() rebuilds the policy when .env or the policy file has
+changed, checking at most every NETWORK_POLICY_RELOAD_SECONDS, so every
+worker picks up an edit without a restart. reload() forces it (see
+POST /attendance/admin/network-policy/reload). Readers always get a complete
+policy object; a rebuild swaps the reference.
+
+Client IP: X-Forwarded-For / X-Real-IP are only believed when the peer is a
+trusted proxy. The client is the right-most X-Forwarded-For hop that is not a
+trusted proxy. TRUSTED_PROXIES="*" trusts every peer and takes the first hop,
+which is how the app behaved before proxies were configurable.
+"""
+import ipaddress
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+from .config import Settings, settings
+
+ENV_FILE = ".env"
+
+
+def _split(raw: Optional[str]) -> List[str]:
+    return [s.strip() for s in (raw or "").split(",") if s.strip()]
+
+
+def _strip_port(ip: str) -> str:
+    # "1.2.3.4:5678" -> "1.2.3.4"; IPv6 (several colons) is left alone
+    if ip.count(":") == 1:
+        return ip.split(":")[0]
+    return ip
+
+
+def parse_ip(value: Optional[str]):
+    if not value:
+        return None
+    try:
+        return ipaddress.ip_address(_strip_port(value.strip()))
+    except ValueError:
+        return None
+
+
+class IntervalSet:
+    """Union of IP networks as sorted, non-overlapping integer intervals per IP version."""
+
+    def __init__(self, networks: Iterable):
+        spans = {4: [], 6: []}
+        for net in networks:
+            spans[net.version].append((int(net.network_address), int(net.broadcast_address)))
+        self._starts = {}
+        self._ends = {}
+        self.size = 0
+        for version, items in spans.items():
+            merged: List[List[int]] = []
+            for first, last in sorted(items):
+                if merged and first <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], last)
+                else:
+                    merged.append([first, last])
+            self._starts[version] = [m[0] for m in merged]
+            self._ends[version] = [m[1] for m in merged]
+            self.size += len(merged)
+
+    def __contains__(self, ip) -> bool:
+        if ip is None:
+            return False
+        starts = self._starts[ip.version]
+        i = bisect_right(starts, int(ip)) - 1
+        return i >= 0 and int(ip) <= self._ends[ip.version][i]
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+
+def parse_networks(entries: Iterable[str], single_ipv4_prefix: int = 32) -> List:
+    """
+    Entries with a "/" are networks (host bits ignored); single addresses are
+    one host, or for IPv4 their /single_ipv4_prefix network (routers: /24).
+    """
+    nets = []
+    for entry in entries:
+        try:
+            if "/" in entry:
+                nets.append(ipaddress.ip_network(entry, strict=False))
+            else:
+                ip = ipaddress.ip_address(entry)
+                prefix = single_ipv4_prefix if ip.version == 4 else ip.max_prefixlen
+                nets.append(ipaddress.ip_network(f"{ip}/{prefix}", strict=False))
+        except ValueError:
+            continue
+    return nets
+
+
+class NetworkPolicy:
+    def __init__(self, ssids: Iterable[str] = (), ips: Iterable[str] = (),
+                 router_ips: Iterable[str] = (), trusted_proxies: Iterable[str] = ()):
+        self.ssid_list = [s.strip() for s in ssids if s and s.strip()]
+        self.ssids = frozenset(s.lower() for s in self.ssid_list)
+        self.ip_list = list(ips)
+        self.router_ip_list = list(router_ips)
+        self.allowed_ips = IntervalSet(parse_networks(self.ip_list))
+        self.router_networks = IntervalSet(parse_networks(self.router_ip_list, single_ipv4_prefix=24))
+        proxies = list(trusted_proxies)
+        self.trust_all_proxies = "*" in proxies
+        self.trusted_proxies = IntervalSet(parse_networks(p for p in proxies if p != "*"))
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_settings(cls, cfg: Settings) -> "NetworkPolicy":
+        ssids = ([cfg.ALLOWED_SSID] if cfg.ALLOWED_SSID else []) + _split(cfg.ALLOWED_SSID_ALT)
+        ips = _split(cfg.ALLOWED_IPS)
+        router_ips = _split(cfg.ALLOWED_ROUTER_IPS)
+        proxies = _split(cfg.TRUSTED_PROXIES)
+        if cfg.NETWORK_POLICY_FILE:
+            with open(cfg.NETWORK_POLICY_FILE) as fh:
+                extra = json.load(fh)
+            ssids += extra.get("ssids", [])
+            ips += extra.get("ips", [])
+            router_ips += extra.get("router_ips", [])
+            proxies += extra.get("trusted_proxies", [])
+        return cls(ssids, ips, router_ips, proxies)
+
+    def ssid_allowed(self, ssid: Optional[str]) -> bool:
+        return bool(ssid) and ssid.strip().lower() in self.ssids
+
+    def ip_allowed(self, client_ip: Optional[str]) -> bool:
+        return parse_ip(client_ip) in self.allowed_ips
+
+    def on_router_network(self, client_ip: Optional[str]) -> bool:
+        return parse_ip(client_ip) in self.router_networks
+
+    def is_trusted_proxy(self, ip: Optional[str]) -> bool:
+        return self.trust_all_proxies or parse_ip(ip) in self.trusted_proxies
+
+    def client_ip(self, peer: Optional[str], forwarded_for: Optional[str], real_ip: Optional[str]) -> Optional[str]:
+        """The client's address given the TCP peer and the proxy headers it sent."""
+        if peer and not self.is_trusted_proxy(peer):
+            return peer
+        hops = _split(forwarded_for)
+        if hops:
+            if self.trust_all_proxies:
+                return hops[0]
+            for hop in reversed(hops):
+                if not self.is_trusted_proxy(hop):
+                    return hop
+            return hops[0]
+        if real_ip and real_ip.strip():
+            return real_ip.strip()
+        return peer
+
+    def summary(self) -> dict:
+        return {
+            "ssids": len(self.ssids),
+            "allowed_ip_ranges": self.allowed_ips.size,
+            "router_ranges": self.router_networks.size,
+            "trusted_proxy_ranges": "*" if self.trust_all_proxies else self.trusted_proxies.size,
+            "loaded_at": self.loaded_at,
+        }
+
+
+class PolicyHolder:
+    def __init__(self, reload_seconds: float = settings.NETWORK_POLICY_RELOAD_SECONDS):
+        self.reload_seconds = reload_seconds
+        self._policy: Optional[NetworkPolicy] = None
+        self._signature: Optional[Tuple] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _source_signature(self) -> Tuple:
+        return (self._mtime(ENV_FILE),
+                self._mtime(settings.NETWORK_POLICY_FILE) if settings.NETWORK_POLICY_FILE else None)
+
+    def reload(self) -> NetworkPolicy:
+        with self._lock:
+            signature = self._source_signature()
+            # a fresh Settings() re-reads .env; the process environment itself can't change
+            cfg = Settings() if self._policy is not None else settings
+            self._policy = NetworkPolicy.from_settings(cfg)
+            self._signature = signature
+            self._next_check = time.monotonic() + self.reload_seconds
+            return self._policy
+
+    def current(self) -> NetworkPolicy:
+        policy = self._policy
+        if policy is None:
+            return self.reload()
+        if time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.reload_seconds
+            if self._source_signature() != self._signature:
+                try:
+                    return self.reload()
+                except (OSError, ValueError):
+                    # a half-written file: keep serving the last good policy
+                    pass
+        return policy
+
+
+holder = PolicyHolder()
+
+
+def current() -> NetworkPolicy:
+    return holder.current()
+
+
+def reload() -> NetworkPolicy:
+    return holder.reload()
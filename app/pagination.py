@@ -0,0 +1,90 @@
+# pagination.py
+"""
+Keyset (cursor) pagination and cheap row-count estimates.
+
+A page is fetched with `WHERE (key, id) < (last_key, last_id) ORDER BY key
+DESC, id DESC LIMIT n + 1`: with an index ending in (key[, id]) the database
+seeks straight to the cursor, so the cost depends on the page size and not on
+how deep the client has scrolled (unlike OFFSET). The cursor handed to the
+client is an opaque token holding the (key, id) of the last row served.
+
+Rows whose key is NULL sort after every non-NULL key (as SQLite and MySQL
+order DESC) and are paged by id alone.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Session
+
+
+def encode_cursor(key, row_id: int) -> str:
+    if isinstance(key, datetime):
+        key = {"dt": key.isoformat()}
+    raw = json.dumps([key, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[object, int]:
+    try:
+        key, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(key, dict):
+            key = datetime.fromisoformat(key["dt"])
+        return key, int(row_id)
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def fetch_page(db: Session, stmt, key_column, id_column, cursor: Optional[str], limit: int, undated_stmt=None):
+    """
+    Page through `stmt` (a select of one entity, filters applied, no ORDER
+    BY/LIMIT) in (key DESC, id DESC) order, starting after `cursor`. Rows with
+    a NULL key are only returned when `undated_stmt` is given; it selects them
+    (range filters on another column may differ) and is read once the keyed
+    rows run out. Returns (rows, next_cursor or None).
+    """
+    key, row_id = decode_cursor(cursor) if cursor else (None, None)
+    rows = []
+    if key is not None or row_id is None:
+        keyed = stmt.where(key_column.is_not(None))
+        if key is not None:
+            keyed = keyed.where(tuple_(key_column, id_column) < (key, row_id))
+        keyed = keyed.order_by(key_column.desc(), id_column.desc()).limit(limit + 1)
+        rows = list(db.execute(keyed).scalars())
+    if undated_stmt is not None and len(rows) <= limit:
+        undated = undated_stmt.where(key_column.is_(None))
+        if key is None and row_id is not None:
+            undated = undated.where(id_column < row_id)
+        undated = undated.order_by(id_column.desc()).limit(limit + 1 - len(rows))
+        rows += list(db.execute(undated).scalars())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, key_column.key), getattr(last, id_column.key))
+
+
+def estimated_rows(db: Session, table) -> int:
+    """
+    Row count of a whole table from the database's statistics instead of
+    COUNT(*): information_schema on MySQL, pg_class on PostgreSQL, and on
+    SQLite sqlite_stat1 (after ANALYZE) or else the highest rowid.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        n = db.execute(text("SELECT table_rows FROM information_schema.tables "
+                            "WHERE table_schema = DATABASE() AND table_name = :t"), {"t": table.name}).scalar()
+    elif dialect == "postgresql":
+        n = db.execute(text("SELECT reltuples FROM pg_class WHERE relname = :t"), {"t": table.name}).scalar()
+    else:
+        n = None
+        if db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")).scalar():
+            # first number of any index's stat row is the table's row count
+            stat = db.execute(text("SELECT stat FROM sqlite_stat1 WHERE tbl = :t LIMIT 1"), {"t": table.name}).scalar()
+            n = int(stat.split()[0]) if stat else None
+        if n is None:
+            n = db.execute(text(f'SELECT MAX(rowid) FROM "{table.name}"')).scalar()
+    return max(0, int(n or 0))
@@ -0,0 +1,113 @@
+# passwords.py
+"""
+bcrypt hashing, plus a bounded worker pool so async handlers can hash/verify
+without tying up the request threadpool.
+
+PASSWORD_HASH_WORKERS processes run bcrypt; at most PASSWORD_HASH_MAX_PENDING
+calls may wait for a worker; beyond that callers get a 503 instead of queueing.
+PASSWORD_HASH_WORKERS=0 runs bcrypt in Starlette's threadpool (no processes).
+"""
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+def verify_and_update(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Verify and, if the stored hash uses an outdated cost factor, return a new hash."""
+    return pwd_context.verify_and_update(plain, hashed)
+
+
+class PasswordPool:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queued_seen = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(max(1, self.workers))
+            self._slots_loop = loop
+        return self._slots
+
+    async def run(self, fn, *args):
+        if self.queued >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Too many login attempts in progress, retry shortly",
+                                headers={"Retry-After": "1"})
+        slots = self._get_slots()
+        self.queued += 1
+        self.max_queued_seen = max(self.max_queued_seen, self.queued)
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queued_seen": self.max_queued_seen,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+pool = PasswordPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_password_async(password: str) -> str:
+    return await pool.run(hash_password, password)
+
+
+async def verify_and_update_async(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return await pool.run(verify_and_update, plain, hashed)
@@ -1,21 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from . import database, models, schemas, utils
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from . import database, models, schemas, utils, loaders
 from typing import List
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 @router.post("/", response_model=schemas.ProjectResponse)
-def create_project(request: schemas.ProjectCreate,
-                   db: Session = Depends(get_db),
-                   current_user: models.User = Depends(utils.get_current_user)):
+async def create_project(request: schemas.ProjectCreate,
+                   db: AsyncSession = Depends(get_db),
+                   current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can create projects")
 
@@ -25,8 +23,8 @@ def create_project(request: schemas.ProjectCreate,
         deadline=request.deadline
     )
     db.add(project)
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    await db.refresh(project)
     return schemas.ProjectResponse(
         id=project.id,
         name=project.name,
@@ -37,31 +35,35 @@ def create_project(request: schemas.ProjectCreate,
     )
 
 @router.post("/{project_id}/add-member/{user_id}")
-def add_member(project_id: int, user_id: int,
-               db: Session = Depends(get_db),
-               current_user: models.User = Depends(utils.get_current_user)):
+async def add_member(project_id: int, user_id: int,
+               db: AsyncSession = Depends(get_db),
+               current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can add members")
 
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    project = (await db.execute(
+        select(models.Project).where(models.Project.id == project_id).options(selectinload(models.Project.members))
+    )).scalars().first()
+    user = (await db.execute(select(models.User).where(models.User.id == user_id))).scalars().first()
 
     if not project or not user:
         raise HTTPException(status_code=404, detail="Project or User not found")
 
     project.members.append(user)
-    db.commit()
+    await db.commit()
     return {"message": f"User {user.full_name} added to project {project.name}"}
 
 @router.delete("/{project_id}/remove-member/{user_id}")
-def remove_member(project_id: int, user_id: int,
-                  db: Session = Depends(get_db),
-                  current_user: models.User = Depends(utils.get_current_user)):
+async def remove_member(project_id: int, user_id: int,
+                  db: AsyncSession = Depends(get_db),
+                  current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can remove members")
 
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    project = (await db.execute(
+        select(models.Project).where(models.Project.id == project_id).options(selectinload(models.Project.members))
+    )).scalars().first()
+    user = (await db.execute(select(models.User).where(models.User.id == user_id))).scalars().first()
 
     if not project or not user:
         raise HTTPException(status_code=404, detail="Project or User not found")
@@ -70,17 +72,17 @@ def remove_member(project_id: int, user_id: int,
         raise HTTPException(status_code=400, detail="User not a member of this project")
 
     project.members.remove(user)
-    db.commit()
+    await db.commit()
     return {"message": f"User {user.full_name} removed from project {project.name}"}
 
 @router.get("/")
-def list_projects(db: Session = Depends(get_db),
-                  current_user: models.User = Depends(utils.get_current_user)):
+async def list_projects(db: AsyncSession = Depends(get_db),
+                  current_user: models.User = Depends(get_current_user)):
     # Only Admin or Tester allowed
     if current_user.role not in ["Admin", "Tester"]:
         raise HTTPException(status_code=403, detail="Only Admin/Tester can view projects")
 
-    projects = db.query(models.Project).all()
+    projects = (await db.execute(select(models.Project).options(*loaders.profile("project_list")))).scalars().all()
 
     results = []
     for p in projects:
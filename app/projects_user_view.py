@@ -1,21 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from . import database, models, utils
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import database, models, utils, loaders
 
 router = APIRouter(prefix="/me/projects", tags=["User Projects"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 @router.get("/full")
-def get_user_project_lifecycle(db: Session = Depends(get_db),
-                               current_user: models.User = Depends(utils.get_current_user)):
+async def get_user_project_lifecycle(db: AsyncSession = Depends(get_db),
+                               current_user: models.User = Depends(get_current_user)):
     # Get all projects where this user is a member
-    projects = db.query(models.Project).join(models.Project.members).filter(models.User.id == current_user.id).all()
+    projects = (await db.execute(
+        select(models.Project)
+        .join(models.Project.members)
+        .where(models.User.id == current_user.id)
+        .options(*loaders.profile("project_lifecycle"))
+    )).scalars().all()
 
     result = []
     for project in projects:
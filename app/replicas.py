@@ -0,0 +1,158 @@
+# replicas.py
+"""
+Read replicas for GET/HEAD requests.
+
+database.RoutingSession asks the ReplicaSet for an engine whenever a read-only
+request runs a plain SELECT. Replicas are picked round-robin (one per session,
+so a request sees a single snapshot) and skipped while marked unhealthy.
+
+Health: a replica is marked down as soon as one of its connections fails, and
+a daemon thread (started with the app) re-checks every replica with SELECT 1
+every REPLICA_HEALTH_CHECK_SECONDS, bringing recovered ones back.
+
+Read-your-writes: after a user's session commits a write, that user's reads
+stay on the primary for READ_YOUR_WRITES_SECONDS so they never read back
+stale data from a lagging replica. The window is tracked per process.
+"""
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
+
+from . import metrics
+from .config import settings
+
+
+def engine_kwargs(url: str) -> dict:
+    kwargs = {"pool_pre_ping": True, "pool_recycle": 3600, "future": True, "poolclass": metrics.TimedQueuePool}
+    if make_url(url).get_backend_name() != "sqlite":
+        kwargs.update(pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+    return kwargs
+
+
+class Replica:
+    def __init__(self, url: str, name: str = "replica"):
+        self.url = url
+        self.name = name
+        self.engine: Engine = create_engine(url, **engine_kwargs(url))
+        metrics.register_engine(name, self.engine)
+        self.async_engine = None
+        self.healthy = True
+        self.last_error: Optional[str] = None
+        self.reads = 0
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.original_exception)
+
+    def mark_down(self, exc):
+        self.healthy = False
+        self.last_error = str(exc)[:500]
+
+    def check(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            self.mark_down(e)
+        else:
+            self.healthy = True
+            self.last_error = None
+        return self.healthy
+
+    def get_async_engine(self):
+        if self.async_engine is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            from .database import async_url_for
+            url = async_url_for(self.url)
+            kwargs = engine_kwargs(url)
+            kwargs.pop("future")
+            kwargs["poolclass"] = metrics.TimedAsyncQueuePool
+            self.async_engine = create_async_engine(url, **kwargs)
+            metrics.register_engine(f"{self.name}-async", self.async_engine.sync_engine)
+            event.listen(self.async_engine.sync_engine, "handle_error", self._on_error)
+        return self.async_engine
+
+    @property
+    def display_url(self) -> str:
+        return make_url(self.url).render_as_string(hide_password=True)
+
+
+class ReplicaSet:
+    def __init__(self, urls: List[str],
+                 check_seconds: float = settings.REPLICA_HEALTH_CHECK_SECONDS,
+                 ryw_seconds: float = settings.READ_YOUR_WRITES_SECONDS):
+        self.replicas = [Replica(u, f"replica-{i}") for i, u in enumerate(urls)]
+        self.check_seconds = check_seconds
+        self.ryw_seconds = ryw_seconds
+        self._cycle = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._lock = threading.Lock()
+        self._recent_writes: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.fallbacks = 0  # reads sent to the primary because every replica was down
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    # --- selection ---
+    def pick(self) -> Optional[Replica]:
+        """Next healthy replica in round-robin order, or None if all are down."""
+        if not self.replicas:
+            return None
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[next(self._cycle)]
+                if replica.healthy:
+                    replica.reads += 1
+                    return replica
+            self.fallbacks += 1
+        return None
+
+    # --- read-your-writes ---
+    def note_write(self, principal: str):
+        with self._lock:
+            now = time.monotonic()
+            self._recent_writes[principal] = now + self.ryw_seconds
+            if len(self._recent_writes) > 10000:
+                self._recent_writes = {k: t for k, t in self._recent_writes.items() if t > now}
+
+    def wrote_recently(self, principal: Optional[str]) -> bool:
+        if principal is None:
+            return False
+        until = self._recent_writes.get(principal)
+        return until is not None and until > time.monotonic()
+
+    # --- health checks ---
+    def check_all(self):
+        for replica in self.replicas:
+            replica.check()
+
+    def _run(self):
+        while not self._stop.wait(self.check_seconds):
+            self.check_all()
+
+    def start(self):
+        if self.replicas and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "fallbacks": self.fallbacks,
+            "replicas": [
+                {"url": r.display_url, "healthy": r.healthy, "reads": r.reads, "last_error": r.last_error}
+                for r in self.replicas
+            ],
+        }
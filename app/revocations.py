@@ -0,0 +1,123 @@
+# revocations.py
+"""
+In-process mirror of the token_revocations table for stateless auth.
+
+Lookups are a set membership test (jti) and a dict lookup (user_id -> minimum
+token version), so validating a token needs no query. The mirror is refreshed
+incrementally (rows with id > last seen) at most every REVOCATION_REFRESH_SECONDS.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+
+
+class _Pending(NamedTuple):
+    """Values of a revocation row, held until its transaction commits."""
+    jti: Optional[str]
+    user_id: Optional[int]
+    min_token_version: Optional[int]
+    expires_at: datetime
+
+
+def token_version_now() -> int:
+    """Token version = issue time in milliseconds; revoking a user bumps the minimum."""
+    return int(time.time() * 1000)
+
+
+class RevocationList:
+    def __init__(self, refresh_seconds: float = settings.REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._jtis: Dict[str, datetime] = {}
+        self._min_version: Dict[int, int] = {}
+        self._last_id = 0
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _apply(self, row):
+        if row.jti:
+            self._jtis[row.jti] = row.expires_at
+        if row.user_id is not None and row.min_token_version is not None:
+            if row.min_token_version > self._min_version.get(row.user_id, 0):
+                self._min_version[row.user_id] = row.min_token_version
+
+    def _due(self, force: bool) -> bool:
+        return force or time.monotonic() >= self._next_refresh
+
+    def _new_rows_stmt(self):
+        return (
+            select(models.TokenRevocation)
+            .where(models.TokenRevocation.id > self._last_id)
+            .where(models.TokenRevocation.expires_at > datetime.utcnow())
+            .order_by(models.TokenRevocation.id)
+            # never from a lagging replica: a revocation must apply everywhere at once
+            .execution_options(use_primary=True)
+        )
+
+    def _merge(self, rows):
+        with self._lock:
+            for row in rows:
+                self._apply(row)
+                self._last_id = max(self._last_id, row.id)
+            # forget single-token revocations once the token itself has expired
+            cutoff = datetime.utcnow()
+            self._jtis = {j: exp for j, exp in self._jtis.items() if exp > cutoff}
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+
+    async def refresh_async(self, db, force: bool = False):
+        if self._due(force):
+            self._merge((await db.execute(self._new_rows_stmt())).scalars().all())
+
+    def is_revoked(self, claims: dict) -> bool:
+        jti = claims.get("jti")
+        if jti and jti in self._jtis:
+            return True
+        uid = claims.get("uid")
+        if uid is not None and claims.get("tv", 0) < self._min_version.get(uid, 0):
+            return True
+        return False
+
+    def apply_committed(self, pending):
+        with self._lock:
+            for row in pending:
+                self._apply(row)
+
+    # --- writers (caller commits) ---
+    def _add(self, db, row: models.TokenRevocation):
+        db.add(row)
+        # applied locally once the caller's commit succeeds (see _apply_on_commit);
+        # other processes pick it up on their next refresh
+        db.info.setdefault("revocations", []).append(
+            _Pending(row.jti, row.user_id, row.min_token_version, row.expires_at))
+
+    def revoke_user(self, db: Session, user_id: int, token_ttl_minutes: int):
+        """Revoke every token issued to user_id so far."""
+        self._add(db, models.TokenRevocation(
+            user_id=user_id,
+            min_token_version=token_version_now() + 1,
+            expires_at=datetime.utcnow() + timedelta(minutes=token_ttl_minutes),
+        ))
+
+    def revoke_token(self, db: Session, jti: str, user_id: Optional[int], expires_at: datetime):
+        self._add(db, models.TokenRevocation(jti=jti, user_id=user_id, expires_at=expires_at))
+
+
+revocation_list = RevocationList()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_on_commit(session):
+    pending = session.info.pop("revocations", None)
+    if pending:
+        revocation_list.apply_committed(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_rollback(session):
+    session.info.pop("revocations", None)
@@ -9,7 +9,7 @@ class AdminSignup(BaseModel):
     password: str
 
 class LoginRequest(BaseModel):
-    email: EmailStr
+    email: str   # email, employee/student code or full name
     password: str
 
 class TokenResponse(BaseModel):
@@ -331,3 +331,39 @@ class AuditLogOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+# -----------------------------
+# Geofence sites (see geofence.py)
+# -----------------------------
+class SiteCreate(BaseModel):
+    name: str
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    radius_m: int = Field(50, gt=0, le=50000)
+    ssids: List[str] = []          # empty = global ALLOWED_SSID settings
+    allowed_ips: List[str] = []    # IPs/CIDRs; empty = global ALLOWED_IPS / router settings
+    is_active: bool = True
+
+class SiteUpdate(BaseModel):
+    name: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    radius_m: Optional[int] = Field(None, gt=0, le=50000)
+    ssids: Optional[List[str]] = None
+    allowed_ips: Optional[List[str]] = None
+    is_active: Optional[bool] = None
+
+class SiteOut(BaseModel):
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    radius_m: int
+    ssids: Optional[List[str]] = None
+    allowed_ips: Optional[List[str]] = None
+    is_active: bool
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,78 @@
+# sites.py
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import database, geofence, models, schemas, utils
+
+router = APIRouter(prefix="/sites", tags=["Sites"])
+
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
+
+
+def _require_admin(current_user: models.User):
+    if getattr(current_user, "role", None) != "Admin":
+        raise HTTPException(status_code=403, detail="Only Admin can manage sites")
+
+
+@router.post("/", response_model=schemas.SiteOut)
+async def create_site(request: schemas.SiteCreate, db: AsyncSession = Depends(get_db),
+                current_user: models.User = Depends(get_current_user)):
+    _require_admin(current_user)
+    site = models.Site(**request.model_dump())
+    db.add(site)
+    await db.commit()
+    await db.refresh(site)
+    geofence.registry.invalidate()
+    return site
+
+
+@router.get("/", response_model=List[schemas.SiteOut])
+async def list_sites(include_inactive: bool = False, db: AsyncSession = Depends(get_db),
+               current_user: models.User = Depends(get_current_user)):
+    _require_admin(current_user)
+    stmt = select(models.Site)
+    if not include_inactive:
+        stmt = stmt.where(models.Site.is_active == True)
+    return (await db.execute(stmt.order_by(models.Site.id))).scalars().all()
+
+
+@router.get("/match")
+async def match_sites(latitude: float = Query(..., ge=-90, le=90), longitude: float = Query(..., ge=-180, le=180),
+                db: AsyncSession = Depends(get_db),
+                current_user: models.User = Depends(get_current_user)):
+    """Admin: active sites whose radius contains the point, nearest first (from the in-memory index)."""
+    _require_admin(current_user)
+    index = await db.run_sync(geofence.registry.current)
+    return [{"id": site.id, "name": site.name, "distance_m": round(dist, 1), "radius_m": site.radius_m}
+            for dist, site in index.containing(latitude, longitude)]
+
+
+@router.put("/{site_id}", response_model=schemas.SiteOut)
+async def update_site(site_id: int, request: schemas.SiteUpdate, db: AsyncSession = Depends(get_db),
+                current_user: models.User = Depends(get_current_user)):
+    _require_admin(current_user)
+    site = await db.get(models.Site, site_id)
+    if not site:
+        raise HTTPException(status_code=404, detail="Site not found")
+    for field, value in request.model_dump(exclude_unset=True).items():
+        setattr(site, field, value)
+    await db.commit()
+    await db.refresh(site)
+    geofence.registry.invalidate()
+    return site
+
+
+@router.delete("/{site_id}")
+async def deactivate_site(site_id: int, db: AsyncSession = Depends(get_db),
+                    current_user: models.User = Depends(get_current_user)):
+    """Sites are deactivated, not deleted: attendance rows keep pointing at them."""
+    _require_admin(current_user)
+    site = await db.get(models.Site, site_id)
+    if not site:
+        raise HTTPException(status_code=404, detail="Site not found")
+    site.is_active = False
+    await db.commit()
+    geofence.registry.invalidate()
+    return {"message": "Site deactivated", "id": site.id}
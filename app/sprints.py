@@ -1,40 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from . import database, models, schemas, utils
 
 router = APIRouter(prefix="/sprints", tags=["Sprints"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 @router.post("/", response_model=schemas.SprintResponse)
-def create_sprint(request: schemas.SprintCreate, db: Session = Depends(get_db),
-                  current_user: models.User = Depends(utils.get_current_user)):
+async def create_sprint(request: schemas.SprintCreate, db: AsyncSession = Depends(get_db),
+                  current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can create sprints")
 
     sprint = models.Sprint(name=request.name, project_id=request.project_id, end_date=request.end_date)
     db.add(sprint)
-    db.commit()
-    db.refresh(sprint)
+    await db.commit()
+    await db.refresh(sprint)
     return sprint
 
 @router.get("/{project_id}", response_model=List[schemas.SprintResponse])
-def list_sprints(project_id: int, db: Session = Depends(get_db),
-                 current_user: models.User = Depends(utils.get_current_user)):
-    sprints = db.query(models.Sprint).filter(models.Sprint.project_id == project_id).all()
+async def list_sprints(project_id: int, db: AsyncSession = Depends(get_db),
+                 current_user: models.User = Depends(get_current_user)):
+    sprints = (await db.execute(select(models.Sprint).where(models.Sprint.project_id == project_id))).scalars().all()
     return sprints
 
 @router.get("/", response_model=List[schemas.SprintResponse])
-def list_all_sprints(db: Session = Depends(get_db),
-                     current_user: models.User = Depends(utils.get_current_user)):
+async def list_all_sprints(db: AsyncSession = Depends(get_db),
+                     current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Tester"]:
         raise HTTPException(status_code=403, detail="Only Admin can view all sprints")
 
-    sprints = db.query(models.Sprint).all()
+    sprints = (await db.execute(select(models.Sprint))).scalars().all()
     return sprints
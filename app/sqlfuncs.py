@@ -0,0 +1,48 @@
+# sqlfuncs.py
+"""
+Portable SQL expressions the ORM doesn't provide.
+
+    select(func.sum(sqlfuncs.worked_seconds(A.punch_in_time, A.punch_out_time)))
+
+Date arithmetic differs per backend, so these compile to TIMESTAMPDIFF on
+MySQL, julianday() on SQLite and EXTRACT(EPOCH ...) elsewhere.
+"""
+from sqlalchemy import Integer, case
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class duration_seconds(FunctionElement):
+    """Whole seconds from start to end (negative if end is earlier, NULL if either is NULL)."""
+    type = Integer()
+    name = "duration_seconds"
+    inherit_cache = True
+
+
+def _args(element, compiler, **kw):
+    start, end = element.clauses
+    return compiler.process(start, **kw), compiler.process(end, **kw)
+
+
+@compiles(duration_seconds)
+def _duration_default(element, compiler, **kw):
+    start, end = _args(element, compiler, **kw)
+    return f"CAST(EXTRACT(EPOCH FROM ({end} - {start})) AS INTEGER)"
+
+
+@compiles(duration_seconds, "mysql")
+def _duration_mysql(element, compiler, **kw):
+    start, end = _args(element, compiler, **kw)
+    return f"TIMESTAMPDIFF(SECOND, {start}, {end})"
+
+
+@compiles(duration_seconds, "sqlite")
+def _duration_sqlite(element, compiler, **kw):
+    start, end = _args(element, compiler, **kw)
+    # julianday() keeps milliseconds; the nudge stops 28799.9999... truncating to 28799
+    return f"CAST((julianday({end}) - julianday({start})) * 86400 + 0.0005 AS INTEGER)"
+
+
+def worked_seconds(start, end):
+    """Duration of a closed session, 0 for open or inverted ones (same rule as the Python reports)."""
+    return case((end >= start, duration_seconds(start, end)), else_=0)
@@ -1,34 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from . import models, database, utils
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from . import models, database, utils, loaders
 
 router = APIRouter(prefix="/staff", tags=["Staff"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 # 4. Get all staff (Admin only)
 @router.get("/")
-def get_all_staff(db: Session = Depends(get_db),
-                  current_user: models.User = Depends(utils.get_current_user)):
+async def get_all_staff(db: AsyncSession = Depends(get_db),
+                  current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can view staff")
-    return db.query(models.User).filter(models.User.role == "Staff").all()
+    return (await db.execute(
+        select(models.User).where(models.User.role == "Staff").options(*loaders.profile("user_list"))
+    )).scalars().all()
 
 # 5. Assign class to staff (Admin only)
 @router.post("/{staff_id}/assign/{class_id}")
-def assign_class(staff_id: int, class_id: int,
-                 db: Session = Depends(get_db),
-                 current_user: models.User = Depends(utils.get_current_user)):
+async def assign_class(staff_id: int, class_id: int,
+                 db: AsyncSession = Depends(get_db),
+                 current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can assign classes")
 
-    staff = db.query(models.User).filter(models.User.id == staff_id, models.User.role == "Staff").first()
-    cls = db.query(models.Class).filter(models.Class.id == class_id).first()
+    staff = (await db.execute(
+        select(models.User).where(models.User.id == staff_id, models.User.role == "Staff")
+        .options(selectinload(models.User.assigned_classes))
+    )).scalars().first()
+    cls = (await db.execute(select(models.Class).where(models.Class.id == class_id))).scalars().first()
 
     if not staff or not cls:
         raise HTTPException(status_code=404, detail="Staff or Class not found")
@@ -37,19 +40,22 @@ def assign_class(staff_id: int, class_id: int,
         raise HTTPException(status_code=400, detail="Class already assigned")
 
     staff.assigned_classes.append(cls)
-    db.commit()
+    await db.commit()
     return {"message": f"Class '{cls.name}' assigned to {staff.full_name}"}
 
 # 7. Revoke class (Admin only)
 @router.delete("/{staff_id}/revoke/{class_id}")
-def revoke_class(staff_id: int, class_id: int,
-                 db: Session = Depends(get_db),
-                 current_user: models.User = Depends(utils.get_current_user)):
+async def revoke_class(staff_id: int, class_id: int,
+                 db: AsyncSession = Depends(get_db),
+                 current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can revoke classes")
 
-    staff = db.query(models.User).filter(models.User.id == staff_id, models.User.role == "Staff").first()
-    cls = db.query(models.Class).filter(models.Class.id == class_id).first()
+    staff = (await db.execute(
+        select(models.User).where(models.User.id == staff_id, models.User.role == "Staff")
+        .options(selectinload(models.User.assigned_classes))
+    )).scalars().first()
+    cls = (await db.execute(select(models.Class).where(models.Class.id == class_id))).scalars().first()
 
     if not staff or not cls:
         raise HTTPException(status_code=404, detail="Staff or Class not found")
@@ -58,18 +64,20 @@ def revoke_class(staff_id: int, class_id: int,
         raise HTTPException(status_code=400, detail="Class not assigned")
 
     staff.assigned_classes.remove(cls)
-    db.commit()
+    await db.commit()
     return {"message": f"Class '{cls.name}' revoked from {staff.full_name}"}
 
 # 🔹 New: Get all staff by class id
 @router.get("/class/{class_id}")
-def get_staff_by_class(class_id: int,
-                       db: Session = Depends(get_db),
-                       current_user: models.User = Depends(utils.get_current_user)):
+async def get_staff_by_class(class_id: int,
+                       db: AsyncSession = Depends(get_db),
+                       current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Tester"]:
         raise HTTPException(status_code=403, detail="Not authorized to view staff by class")
 
-    cls = db.query(models.Class).filter(models.Class.id == class_id).first()
+    cls = (await db.execute(
+        select(models.Class).where(models.Class.id == class_id).options(*loaders.profile("class_staff"))
+    )).scalars().first()
     if not cls:
         raise HTTPException(status_code=404, detail="Class not found")
 
@@ -77,13 +85,16 @@ def get_staff_by_class(class_id: int,
             for s in cls.staff]
 
 @router.get("/{staff_id}/classes")
-def get_classes_by_staff(staff_id: int,
-                         db: Session = Depends(get_db),
-                         current_user: models.User = Depends(utils.get_current_user)):
+async def get_classes_by_staff(staff_id: int,
+                         db: AsyncSession = Depends(get_db),
+                         current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Tester", "Staff"]:
         raise HTTPException(status_code=403, detail="Not authorized to view staff classes")
 
-    staff = db.query(models.User).filter(models.User.id == staff_id, models.User.role == "Staff").first()
+    staff = (await db.execute(
+        select(models.User).where(models.User.id == staff_id, models.User.role == "Staff")
+        .options(selectinload(models.User.assigned_classes))
+    )).scalars().first()
     if not staff:
         raise HTTPException(status_code=404, detail="Staff not found")
 
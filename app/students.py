@@ -1,35 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from . import models, database, utils
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from . import models, database, utils, loaders
 from typing import List
 
 router = APIRouter(prefix="/students", tags=["Students"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 # 🔹 New: Get all students (Admin only, or Staff if you prefer)
 @router.get("/")
-def get_all_students(db: Session = Depends(get_db),
-                     current_user: models.User = Depends(utils.get_current_user)):
+async def get_all_students(db: AsyncSession = Depends(get_db),
+                     current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Staff", "Tester"]:
         raise HTTPException(status_code=403, detail="Not authorized to view students")
-    return db.query(models.User).filter(models.User.role == "Student").all()
+    return (await db.execute(
+        select(models.User).where(models.User.role == "Student").options(*loaders.profile("user_list"))
+    )).scalars().all()
 
 # 6. Enroll student in a class (Staff/Admin allowed)
 @router.post("/{student_id}/enroll/{class_id}")
-def enroll_student(student_id: int, class_id: int,
-                   db: Session = Depends(get_db),
-                   current_user: models.User = Depends(utils.get_current_user)):
+async def enroll_student(student_id: int, class_id: int,
+                   db: AsyncSession = Depends(get_db),
+                   current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Staff"]:
         raise HTTPException(status_code=403, detail="Only Staff/Admin can enroll students")
 
-    student = db.query(models.User).filter(models.User.id == student_id, models.User.role == "Student").first()
-    cls = db.query(models.Class).filter(models.Class.id == class_id).first()
+    student = (await db.execute(
+        select(models.User).where(models.User.id == student_id, models.User.role == "Student")
+        .options(selectinload(models.User.enrolled_classes))
+    )).scalars().first()
+    cls = (await db.execute(select(models.Class).where(models.Class.id == class_id))).scalars().first()
 
     if not student or not cls:
         raise HTTPException(status_code=404, detail="Student or Class not found")
@@ -38,18 +41,20 @@ def enroll_student(student_id: int, class_id: int,
         raise HTTPException(status_code=400, detail="Already enrolled")
 
     student.enrolled_classes.append(cls)
-    db.commit()
+    await db.commit()
     return {"message": f"Student {student.full_name} enrolled in {cls.name}"}
 
 # Get all students of a specific class
 @router.get("/class/{class_id}")
-def get_class_students(class_id: int,
-                       db: Session = Depends(get_db),
-                       current_user: models.User = Depends(utils.get_current_user)):
+async def get_class_students(class_id: int,
+                       db: AsyncSession = Depends(get_db),
+                       current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Staff", "Tester"]:
         raise HTTPException(status_code=403, detail="Not authorized to view class students")
 
-    cls = db.query(models.Class).filter(models.Class.id == class_id).first()
+    cls = (await db.execute(
+        select(models.Class).where(models.Class.id == class_id).options(*loaders.profile("class_students"))
+    )).scalars().first()
     if not cls:
         raise HTTPException(status_code=404, detail="Class not found")
 
@@ -57,9 +62,9 @@ def get_class_students(class_id: int,
 
 # Get classes assigned to a student
 @router.get("/{student_id}/classes")
-def get_classes_by_student(student_id: int,
-                           db: Session = Depends(get_db),
-                           current_user: models.User = Depends(utils.get_current_user)) -> List[dict]:
+async def get_classes_by_student(student_id: int,
+                           db: AsyncSession = Depends(get_db),
+                           current_user: models.User = Depends(get_current_user)) -> List[dict]:
     """
     Returns list of classes the given student is enrolled in.
 
@@ -83,7 +88,10 @@ def get_classes_by_student(student_id: int,
     else:
         raise HTTPException(status_code=403, detail="Not authorized to view student classes")
 
-    student = db.query(models.User).filter(models.User.id == student_id, models.User.role == "Student").first()
+    student = (await db.execute(
+        select(models.User).where(models.User.id == student_id, models.User.role == "Student")
+        .options(selectinload(models.User.enrolled_classes))
+    )).scalars().first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
@@ -1,22 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from . import database, models, schemas, utils
+from . import database, models, schemas, utils, loaders
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Tasks is served with the async engine (database.get_async_db); the auth
+# dependency shares the same AsyncSession.
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 
 # ---------------- CREATE TASK ----------------
 @router.post("/", response_model=schemas.TaskResponse)
-def create_task(request: schemas.TaskCreate, db: Session = Depends(get_db),
-                current_user: models.User = Depends(utils.get_current_user)):
+async def create_task(request: schemas.TaskCreate, db: AsyncSession = Depends(get_db),
+                current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Developer", "SEO"]:
         raise HTTPException(status_code=403, detail="You are not allowed to create tasks")
 
@@ -27,17 +26,17 @@ def create_task(request: schemas.TaskCreate, db: Session = Depends(get_db),
         assigned_to=request.assigned_to
     )
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    await db.commit()
+    await db.refresh(task)
     return task
 
 
 # ---------------- UPDATE STATUS ----------------
 @router.put("/{id}/status")
-def update_task_status(id: int, request: schemas.TaskStatusUpdate,
-                       db: Session = Depends(get_db),
-                       current_user: models.User = Depends(utils.get_current_user)):
-    task = db.query(models.Task).filter(models.Task.id == id).first()
+async def update_task_status(id: int, request: schemas.TaskStatusUpdate,
+                       db: AsyncSession = Depends(get_db),
+                       current_user: models.User = Depends(get_current_user)):
+    task = await db.get(models.Task, id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
@@ -48,35 +47,35 @@ def update_task_status(id: int, request: schemas.TaskStatusUpdate,
         raise HTTPException(status_code=403, detail="You cannot update this task")
 
     task.status = request.status
-    db.commit()
+    await db.commit()
     return {"message": f"Task status updated to {task.status}"}
 
 
 # ---------------- LIST ALL TASKS (ADMIN) ----------------
 @router.get("/", response_model=List[schemas.TaskResponse])
-def list_all_tasks(db: Session = Depends(get_db),
-                   current_user: models.User = Depends(utils.get_current_user)):
+async def list_all_tasks(db: AsyncSession = Depends(get_db),
+                   current_user: models.User = Depends(get_current_user)):
     if current_user.role not in ["Admin", "Tester"]:
         raise HTTPException(status_code=403, detail="Only Admin can view all tasks")
 
-    return db.query(models.Task).all()
+    return (await db.execute(select(models.Task))).scalars().all()
 
 
 # ---------------- LIST MY TASKS ----------------
 @router.get("/my", response_model=List[schemas.TaskResponse])
-def list_my_tasks(db: Session = Depends(get_db),
-                  current_user: models.User = Depends(utils.get_current_user)):
-    return db.query(models.Task).filter(models.Task.assigned_to == current_user.id).all()
+async def list_my_tasks(db: AsyncSession = Depends(get_db),
+                  current_user: models.User = Depends(get_current_user)):
+    return (await db.execute(select(models.Task).where(models.Task.assigned_to == current_user.id))).scalars().all()
 
 
 # ---------------- GET ALL TASKS WITH BUGS ----------------
 @router.get("/full")
-def list_all_tasks_with_bugs(db: Session = Depends(get_db),
-                             current_user: models.User = Depends(utils.get_current_user)):
+async def list_all_tasks_with_bugs(db: AsyncSession = Depends(get_db),
+                             current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can view full details")
 
-    tasks = db.query(models.Task).all()
+    tasks = (await db.execute(select(models.Task).options(*loaders.profile("task_with_bugs")))).scalars().all()
     result = []
     for t in tasks:
         task_data = {
@@ -104,9 +103,9 @@ def list_all_tasks_with_bugs(db: Session = Depends(get_db),
 
 # ---------------- GET TASK DETAIL ----------------
 @router.get("/detail/{id}")
-def get_task(id: int, db: Session = Depends(get_db),
-             current_user: models.User = Depends(utils.get_current_user)):
-    task = db.query(models.Task).filter(models.Task.id == id).first()
+async def get_task(id: int, db: AsyncSession = Depends(get_db),
+             current_user: models.User = Depends(get_current_user)):
+    task = await db.get(models.Task, id, options=loaders.profile("task_with_bugs"))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
@@ -127,30 +126,31 @@ def get_task(id: int, db: Session = Depends(get_db),
 
 # ---------------- DELETE TASK (ADMIN) ----------------
 @router.delete("/{id}")
-def delete_task(id: int, db: Session = Depends(get_db),
-                current_user: models.User = Depends(utils.get_current_user)):
+async def delete_task(id: int, db: AsyncSession = Depends(get_db),
+                current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can delete tasks")
 
-    task = db.query(models.Task).filter(models.Task.id == id).first()
+    # bugs are loaded up front: the delete-orphan cascade cannot lazy-load under asyncio
+    task = await db.get(models.Task, id, options=loaders.profile("task_with_bugs"))
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await db.commit()
     return {"message": "Task deleted successfully"}
 
 
 # ---------------- ASSIGN/REASSIGN TASK (ADMIN) ----------------
 @router.put("/{id}/assign/{user_id}")
-def assign_task(id: int, user_id: int,
-                db: Session = Depends(get_db),
-                current_user: models.User = Depends(utils.get_current_user)):
+async def assign_task(id: int, user_id: int,
+                db: AsyncSession = Depends(get_db),
+                current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can reassign tasks")
 
-    task = db.query(models.Task).filter(models.Task.id == id).first()
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    task = await db.get(models.Task, id)
+    user = await db.get(models.User, user_id)
 
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -158,8 +158,7 @@ def assign_task(id: int, user_id: int,
         raise HTTPException(status_code=404, detail="User not found")
 
     task.assigned_to = user.id
-    db.commit()
-    db.refresh(task)
+    await db.commit()
 
     return {
         "message": f"Task '{task.title}' assigned to {user.role} (ID {user.id})",
@@ -171,7 +170,7 @@ def assign_task(id: int, user_id: int,
 
 # ---------------- LIST TASKS BY SPRINT ----------------
 @router.get("/sprint/{sprint_id}", response_model=List[schemas.TaskResponse])
-def list_tasks(sprint_id: int, db: Session = Depends(get_db),
-               current_user: models.User = Depends(utils.get_current_user)):
-    tasks = db.query(models.Task).filter(models.Task.sprint_id == sprint_id).all()
+async def list_tasks(sprint_id: int, db: AsyncSession = Depends(get_db),
+               current_user: models.User = Depends(get_current_user)):
+    tasks = (await db.execute(select(models.Task).where(models.Task.sprint_id == sprint_id))).scalars().all()
     return tasks
@@ -1,24 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from . import database, models, utils
+from . import database, models, utils, loaders
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+get_db = database.get_async_db
+get_current_user = utils.get_current_user_async
 
 @router.get("/")
-def list_users(db: Session = Depends(get_db),
-               current_user: models.User = Depends(utils.get_current_user)):
+async def list_users(db: AsyncSession = Depends(get_db),
+               current_user: models.User = Depends(get_current_user)):
     if current_user.role != "Admin":
         raise HTTPException(status_code=403, detail="Only Admin can view users")
 
-    users = db.query(models.User).filter(models.User.role != "Admin").all()
+    users = (await db.execute(
+        select(models.User).where(models.User.role != "Admin").options(*loaders.profile("user_list"))
+    )).scalars().all()
 
     return [
         {
@@ -1,95 +1,187 @@
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from . import database, models
+from .config import settings
+from .revocations import revocation_list, token_version_now
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import threading
+import time
+import uuid
 
 SECRET_KEY = "SUPER_SECRET_KEY"   # change in production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# principal cache used by get_current_user_async (per process)
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+PRINCIPAL_CACHE_MAX_SIZE = 4096
+
 SMTP_SERVER = "smtp.gmail.com"
 SMTP_PORT = 587
 SMTP_EMAIL = "codeinlastbench@gmail.com"        # 🔹 Replace with your Gmail
 SMTP_PASSWORD = "rpbl qmyr wvon fnex"        # 🔹 Use App Password, not your Gmail password!
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Instead of OAuth2PasswordBearer
 security = HTTPBearer()
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
-
 def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=expires_minutes)
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security),
-                     db: Session = Depends(get_db)):
-    token = credentials.credentials
+def token_claims(user) -> dict:
+    """
+    Claims for a user's access token. Besides sub/role they carry everything
+    get_current_user_async needs in stateless mode (AUTH_STATELESS) plus jti/tv for revocation.
+    """
+    return {
+        "sub": user.email,
+        "role": user.role,
+        "uid": user.id,
+        "name": user.full_name,
+        "blk": bool(getattr(user, "is_blocked", False)),
+        "act": bool(getattr(user, "is_active", True)),
+        "tv": token_version_now(),
+        "jti": uuid.uuid4().hex,
+    }
+
+def decode_access_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired or invalid")
 
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
-
-
-
+def revoke_user_tokens(db: Session, user_id: int, email: Optional[str] = None):
+    """Revoke all of a user's current tokens (e.g. block state changed). Caller commits."""
+    revocation_list.revoke_user(db, user_id, ACCESS_TOKEN_EXPIRE_MINUTES)
+    invalidate_principal(email)
 
-def send_invite_email(to_email: str, full_name: str, invite_code: str):
-    subject = "ODDO – You are invited!"
-    body = f"""
-    Hi {full_name},
-
-    You have been invited to join ODDO Project Management System.
-
-    Please use the following invite code to register your account:
-
-    Invite Code: {invite_code}
-
-    Go to http://127.0.0.1:8000/docs and sign up using this code.
-
-    Regards,
-    ODDO Team
+class CurrentUser(NamedTuple):
     """
-
-    msg = MIMEMultipart()
-    msg["From"] = SMTP_EMAIL
-    msg["To"] = to_email
-    msg["Subject"] = subject
-    msg.attach(MIMEText(body, "plain"))
-
-    try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_EMAIL, SMTP_PASSWORD)
-        server.sendmail(SMTP_EMAIL, to_email, msg.as_string())
-        server.quit()
-    except Exception as e:
-        print("❌ Email sending failed:", e)
+    Slim authenticated principal returned by get_current_user_async.
+    Only carries the columns handlers need for auth checks, so no relationships are loaded.
+    """
+    id: int
+    email: str
+    full_name: str
+    role: Optional[str]
+    is_blocked: bool
+    is_active: bool
+
+
+class PrincipalCache:
+    """Small thread-safe TTL + LRU cache of CurrentUser keyed by token subject (email)."""
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS, max_size: int = PRINCIPAL_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._items: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CurrentUser]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, principal = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return principal
+
+    def set(self, key: str, principal: CurrentUser):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_principal(email: Optional[str]):
+    """Drop the cached principal for a user; call whenever role, is_blocked or is_active changes."""
+    if email:
+        principal_cache.invalidate(email)
+
+
+def _principal_stmt(email: str):
+    return select(
+        models.User.id,
+        models.User.email,
+        models.User.full_name,
+        models.User.role,
+        models.User.is_blocked,
+        models.User.is_active,
+    ).where(models.User.email == email).limit(1)
+
+def _principal_from_row(row) -> Optional[CurrentUser]:
+    if row is None:
+        return None
+    return CurrentUser(
+        id=row.id,
+        email=row.email,
+        full_name=row.full_name,
+        role=row.role,
+        is_blocked=bool(row.is_blocked),
+        is_active=bool(row.is_active) if row.is_active is not None else True,
+    )
+
+def principal_from_claims(payload: dict) -> CurrentUser:
+    return CurrentUser(
+        id=payload["uid"],
+        email=payload["sub"],
+        full_name=payload.get("name") or "",
+        role=payload.get("role"),
+        is_blocked=bool(payload.get("blk", False)),
+        is_active=bool(payload.get("act", True)),
+    )
+
+def _claims_or_401(credentials: HTTPAuthorizationCredentials) -> dict:
+    payload = decode_access_token(credentials.credentials)
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return payload
+
+async def get_current_user_async(credentials: HTTPAuthorizationCredentials = Depends(security),
+                                 db=Depends(database.get_async_db)) -> CurrentUser:
+    """
+    Authenticated principal for the routers. Shares the handler's AsyncSession,
+    so a request uses a single pooled connection.
+    """
+    payload = _claims_or_401(credentials)
+    email = payload["sub"]
+    db.info["principal"] = email  # read-your-writes key for replica routing
+
+    if "uid" in payload:
+        # no query unless the in-memory revocation list is due for a refresh
+        await revocation_list.refresh_async(db)
+        if revocation_list.is_revoked(payload):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+        if settings.AUTH_STATELESS:
+            return principal_from_claims(payload)
+
+    user = principal_cache.get(email)
+    if user is None:
+        user = _principal_from_row((await db.execute(_principal_stmt(email))).first())
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        principal_cache.set(email, user)
+    return user
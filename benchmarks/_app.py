@@ -0,0 +1,44 @@
+# _app.py
+"""
+Shared bootstrap for the benchmark scripts.
+
+Points DATABASE_URL at a throwaway SQLite file (unless one is already set) before
+the app is imported, and offers helpers to create users and auth headers without
+going through bcrypt.
+"""
+import os
+import tempfile
+
+
+def bootstrap(database_url: str = None):
+    """Import and return the FastAPI app bound to a local benchmark database."""
+    # never let a benchmark deliver real mail
+    os.environ.setdefault("OUTBOX_WORKER_ENABLED", "0")
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+    elif not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(prefix="oddo-bench-"), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from app import database, models
+    from app.main import app
+    # throwaway database: build the schema directly instead of running migrations
+    models.Base.metadata.create_all(bind=database.engine)
+    return app
+
+
+def create_user(email: str, role: str = "Developer", full_name: str = None) -> int:
+    from app import database, models
+    db = database.SessionLocal()
+    try:
+        user = models.User(full_name=full_name or email.split("@")[0], email=email, password="!", role=role)
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def auth_headers(email: str, role: str = "Developer") -> dict:
+    from app import utils
+    token = utils.create_access_token({"sub": email, "role": role})
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,140 @@
+# async_vs_sync.py
+"""
+Sync vs async SQLAlchemy sessions under concurrent load.
+
+    python -m benchmarks.async_vs_sync [--clients 200] [--requests 2000] [--delay-ms 0]
+
+Starts uvicorn on a small app that exposes the same query twice: once through
+database.get_db (sync Session, handler runs in the threadpool) and once through
+database.get_async_db (AsyncSession on the event loop). CLIENTS concurrent
+httpx clients hammer each route in turn; reports throughput and p50/p99
+latency. --delay-ms adds a server-side sleep inside the transaction to mimic a
+slow database round trip, which is where the two modes diverge.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.login_storm import _free_port, _percentile
+
+DELAY_SECONDS = float(os.getenv("BENCH_DB_DELAY_MS", "0")) / 1000.0
+
+
+def build_app():
+    """ASGI app served by the uvicorn child process (see main())."""
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select, text
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from benchmarks._app import bootstrap
+    bootstrap()
+    from app import database, models
+
+    bench = FastAPI()
+
+    def tasks_stmt(sprint_id: int):
+        return select(models.Task.id, models.Task.title, models.Task.status).where(models.Task.sprint_id == sprint_id)
+
+    @bench.get("/sync/tasks/{sprint_id}")
+    def sync_tasks(sprint_id: int, db: Session = Depends(database.get_db)):
+        if DELAY_SECONDS:
+            time.sleep(DELAY_SECONDS)
+        return [dict(r._mapping) for r in db.execute(tasks_stmt(sprint_id))]
+
+    @bench.get("/async/tasks/{sprint_id}")
+    async def async_tasks(sprint_id: int, db: AsyncSession = Depends(database.get_async_db)):
+        if DELAY_SECONDS:
+            await asyncio.sleep(DELAY_SECONDS)
+        return [dict(r._mapping) for r in await db.execute(tasks_stmt(sprint_id))]
+
+    # warm both engines so the first timed request does not pay for connecting
+    @bench.get("/ping")
+    async def ping(db: AsyncSession = Depends(database.get_async_db)):
+        await db.execute(text("SELECT 1"))
+        with database.SessionLocal() as sync_db:
+            sync_db.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    return bench
+
+
+def _seed(database_url: str, sprints: int, tasks_per_sprint: int):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    code = (
+        "from benchmarks._app import bootstrap; bootstrap()\n"
+        "from app import database, models\n"
+        "db = database.SessionLocal()\n"
+        "p = models.Project(name='bench'); db.add(p); db.flush()\n"
+        f"sprints = [models.Sprint(name=f's{{i}}', project_id=p.id) for i in range({sprints})]\n"
+        "db.add_all(sprints); db.flush()\n"
+        f"db.add_all([models.Task(title=f't{{j}}', sprint_id=s.id) for s in sprints for j in range({tasks_per_sprint})])\n"
+        "db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+async def _hammer(base: str, path: str, clients: int, requests: int, sprints: int):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base, timeout=120, limits=limits) as client:
+        latencies, errors = [], 0
+        counter = iter(range(requests))
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                t0 = time.perf_counter()
+                r = await client.get(f"{path}/{i % sprints + 1}")
+                latencies.append(time.perf_counter() - t0)
+                if r.status_code != 200:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(clients)])
+        return latencies, time.perf_counter() - t0, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sprints", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=25, help="tasks per sprint")
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="oddo-async-")
+    database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    _seed(database_url, args.sprints, args.tasks)
+
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, OUTBOX_WORKER_ENABLED="0",
+               BENCH_DB_DELAY_MS=str(args.delay_ms))
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "benchmarks.async_vs_sync:build_app", "--factory",
+                             "--port", str(port), "--log-level", "warning"], env=env)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base + "/ping", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        print(f"{'mode':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for mode in ("sync", "async"):
+            lat, elapsed, errors = asyncio.run(_hammer(base, f"/{mode}/tasks", args.clients, args.requests, args.sprints))
+            print(f"{mode:>6} {len(lat) / elapsed:>8.1f} {_percentile(lat, 50) * 1000:>8.1f} "
+                  f"{_percentile(lat, 99) * 1000:>8.1f} {errors:>7}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
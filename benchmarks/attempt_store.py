@@ -0,0 +1,87 @@
+# attempt_store.py
+"""
+Cost of recording a failed punch: sliding-window stores vs the old users UPDATE.
+
+    python -m benchmarks.attempt_store [--failures 5000] [--processes 4]
+
+Reported per backend: microseconds per recorded failure, single-threaded.
+"db update" is what check_and_increment_fail used to do on every rejected
+punch (UPDATE users ... + COMMIT against the application database, here a
+SQLite file). Then PROCESSES processes hit the same keys of one shared
+SQLiteStore at once and the final counts are checked against the number of
+hits (exits non-zero if any were lost), since that store is what several
+uvicorn workers on a host share.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from ._app import bootstrap, create_user
+
+
+def _time_per_op(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def _hammer(path: str, keys: int, hits: int):
+    from app.attempt_limits import SQLiteStore
+    store = SQLiteStore(path)
+    for i in range(hits):
+        store.hit(f"k{i % keys}", time.time(), 3600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--failures", type=int, default=5000)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    bootstrap()
+    from sqlalchemy import update
+    from app import database, models
+    from app.attempt_limits import MemoryStore, SQLiteStore
+
+    user_id = create_user("attempts@example.com")
+    db = database.SessionLocal()
+
+    def db_update(i):
+        db.execute(update(models.User).where(models.User.id == user_id)
+                   .values(failed_attendance_attempts=models.User.failed_attendance_attempts + 1))
+        db.commit()
+
+    memory = MemoryStore()
+    shared = SQLiteStore(os.path.join(tempfile.mkdtemp(prefix="oddo-attempts-"), "attempts.db"))
+    window = 900
+    print(f"{'backend':<14} {'us/failure':>11}")
+    for name, fn in [
+        ("db update", db_update),
+        ("memory", lambda i: memory.hit(f"punch:{i % 500}", time.time(), window)),
+        ("sqlite store", lambda i: shared.hit(f"punch:{i % 500}", time.time(), window)),
+    ]:
+        print(f"{name:<14} {_time_per_op(fn, args.failures):>11.1f}")
+    db.close()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="oddo-attempts-"), "shared.db")
+    keys, hits = 10, 500
+    procs = [multiprocessing.Process(target=_hammer, args=(path, keys, hits)) for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    store = SQLiteStore(path)
+    counts = [store.count(f"k{k}", time.time(), 3600) for k in range(keys)]
+    expected = args.processes * hits // keys
+    lost = sum(expected - c for c in counts)
+    print(f"shared store: {args.processes} processes x {hits} hits on {keys} keys -> "
+          f"{sum(counts)} counted, {lost} lost")
+    sys.exit(1 if lost else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# bulk_invites.py
+"""
+POST /invites/bulk at scale.
+
+    python -m benchmarks.bulk_invites [--rows 10000] [--format json|csv]
+
+Pre-seeds some existing invites/users so the duplicate checks have work to do,
+then imports ROWS invites in one request and reports latency and rows/s.
+"""
+import argparse
+import csv
+import io
+import json
+import time
+
+from ._app import bootstrap, create_user, auth_headers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    args = parser.parse_args()
+
+    app = bootstrap()
+    from fastapi.testclient import TestClient
+    from app import database, models
+
+    create_user("admin@example.com", role="Admin")
+    headers = auth_headers("admin@example.com", "Admin")
+
+    # 5% of the batch already invited, 1% already registered, 1% duplicated inside the batch
+    db = database.SessionLocal()
+    db.add_all([models.Invite(email=f"s{i}@example.com", full_name=f"S {i}", code=f"OLD{i}")
+                for i in range(0, args.rows, 20)])
+    db.add_all([models.User(email=f"s{i}@example.com", full_name=f"S {i}", password="!", role="Student")
+                for i in range(1, args.rows, 100)])
+    db.commit()
+    db.close()
+
+    rows = [{"email": f"s{i}@example.com", "full_name": f"Student {i}", "code": f"STU{i}"} for i in range(args.rows)]
+    rows += rows[: args.rows // 100]
+
+    if args.format == "csv":
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=["email", "full_name", "code"])
+        writer.writeheader()
+        writer.writerows(rows)
+        body, ctype = buf.getvalue(), "text/csv"
+    else:
+        body, ctype = json.dumps(rows), "application/json"
+
+    with TestClient(app) as client:
+        t0 = time.perf_counter()
+        r = client.post("/invites/bulk", content=body, headers={**headers, "Content-Type": ctype})
+        elapsed = time.perf_counter() - t0
+    r.raise_for_status()
+    data = r.json()
+    print(f"rows submitted : {data['total']}")
+    print(f"created        : {data['created']}")
+    print(f"skipped        : {data['skipped']}")
+    print(f"elapsed        : {elapsed:.2f}s ({data['total'] / elapsed:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
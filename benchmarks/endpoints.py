@@ -0,0 +1,173 @@
+# endpoints.py
+"""
+Latency, allocation and query-count benchmark for every GET route, at several data scales.
+
+    python -m benchmarks.endpoints                       # compare with endpoints_baseline.json
+    python -m benchmarks.endpoints --write-baseline      # accept the current numbers
+    python -m benchmarks.endpoints --scales 1 10 100 --repeat 20 --json out.json
+
+Each scale runs in its own interpreter on a fresh SQLite database loaded by
+benchmarks.synth, and calls every GET route in app.main (same route list and
+callers as query_budgets) through TestClient: one warm-up call, REPEAT timed
+calls (p50/p95), then one call under tracemalloc for peak allocated KiB. The
+statement count comes from metrics.capture().
+
+A route regresses against the baseline when, at the same scale,
+  - p50 latency grows by more than --threshold (ratio) and --min-ms,
+  - peak allocation grows by more than --threshold, or
+  - it issues more statements, or its status code changes,
+and a route missing from the baseline fails too: add it with --write-baseline
+in the change that introduces it. Exits non-zero on regressions. Timings are machine-dependent: refresh the
+baseline with --write-baseline on the machine that runs the comparison.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "endpoints_baseline.json")
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def measure(scale: int, repeat: int, years: float) -> dict:
+    """Load `scale` units of synthetic data and measure every GET route (runs in a child process)."""
+    from ._app import bootstrap
+    app = bootstrap()
+    from fastapi.testclient import TestClient
+    from app import database, metrics, utils
+    from .query_budgets import QUERY_PARAMS, ROLE_FOR, get_routes
+    from .synth import load
+
+    load(database.engine, scale, years)
+    results = {}
+    with TestClient(app, raise_server_exceptions=False) as client:
+        for label, path in get_routes(app):
+            token = utils.create_access_token({"sub": ROLE_FOR.get(label, "admin@example.com")})
+            headers = {"Authorization": f"Bearer {token}"}
+            params = QUERY_PARAMS.get(label)
+            with metrics.capture() as seen:
+                status = client.get(path, params=params, headers=headers).status_code
+            timings = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                client.get(path, params=params, headers=headers)
+                timings.append(time.perf_counter() - t0)
+            tracemalloc.start()
+            client.get(path, params=params, headers=headers)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[label] = {
+                "status": status,
+                "queries": seen[0].queries if seen else 0,
+                "p50_ms": round(statistics.median(timings) * 1000, 3),
+                "p95_ms": round(_percentile(timings, 95) * 1000, 3),
+                "alloc_kib": round(peak / 1024, 1),
+            }
+    return results
+
+
+def _run_scale(scale: int, args) -> dict:
+    """Measure one scale in a fresh interpreter, so every scale gets its own database and engine."""
+    env = dict(os.environ, OUTBOX_WORKER_ENABLED="0")
+    env.pop("DATABASE_URL", None)   # bootstrap() creates a throwaway SQLite file
+    out = subprocess.run([sys.executable, "-m", "benchmarks.endpoints", "--child-scale", str(scale),
+                          "--repeat", str(args.repeat), "--years", str(args.years)],
+                         env=env, cwd=os.path.dirname(HERE), check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_ms: float) -> list:
+    regressions = []
+    for scale, routes in results.items():
+        for label, now in routes.items():
+            base = baseline.get(scale, {}).get(label)
+            if base is None:
+                if scale in baseline:
+                    regressions.append(f"{scale:>4}x {label:<48} not in the baseline")
+                continue
+            problems = []
+            if now["status"] != base["status"]:
+                problems.append(f"status {base['status']} -> {now['status']}")
+            if now["queries"] > base["queries"]:
+                problems.append(f"queries {base['queries']} -> {now['queries']}")
+            if now["p50_ms"] > base["p50_ms"] * threshold and now["p50_ms"] - base["p50_ms"] > min_ms:
+                problems.append(f"p50 {base['p50_ms']:.1f} -> {now['p50_ms']:.1f} ms")
+            if now["alloc_kib"] > base["alloc_kib"] * threshold:
+                problems.append(f"alloc {base['alloc_kib']:.0f} -> {now['alloc_kib']:.0f} KiB")
+            if problems:
+                regressions.append(f"{scale:>4}x {label:<48} {'; '.join(problems)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--threshold", type=float, default=1.5, help="allowed p50/allocation ratio over baseline")
+    parser.add_argument("--min-ms", type=float, default=2.0, help="ignore p50 growth smaller than this")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--write-baseline", action="store_true")
+    parser.add_argument("--json", help="also write the raw results here")
+    parser.add_argument("--child-scale", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_scale is not None:
+        print(json.dumps(measure(args.child_scale, args.repeat, args.years)))
+        return
+
+    results = {}
+    for scale in args.scales:
+        t0 = time.perf_counter()
+        results[str(scale)] = _run_scale(scale, args)
+        print(f"scale {scale}x measured in {time.perf_counter() - t0:.0f}s", file=sys.stderr)
+
+    labels = sorted({label for routes in results.values() for label in routes})
+    header = "".join(f"{f'{s}x p50/p95 ms':>18}{'KiB':>8}{'q':>4}" for s in results)
+    print(f"{'route':<48}{header}")
+    for label in labels:
+        cells = ""
+        for scale in results:
+            r = results[scale].get(label)
+            flag = "!" if r and r["status"] >= 500 else " "
+            cells += f"{r['p50_ms']:>9.1f}/{r['p95_ms']:<7.1f}{flag}{r['alloc_kib']:>8.0f}{r['queries']:>4}" if r else " " * 30
+        print(f"{label:<48}{cells}")
+
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=1, sort_keys=True)
+    if args.write_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as fh:
+                baseline = json.load(fh)
+        baseline.update(results)
+        with open(args.baseline, "w") as fh:
+            json.dump(baseline, fh, indent=1, sort_keys=True)
+            fh.write("\n")
+        print(f"wrote {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --write-baseline")
+        return
+    with open(args.baseline) as fh:
+        regressions = compare(results, json.load(fh), args.threshold, args.min_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {os.path.basename(args.baseline)}:")
+        print("\n".join(regressions))
+        sys.exit(1)
+    print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
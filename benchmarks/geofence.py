@@ -0,0 +1,111 @@
+# geofence.py
+"""
+Site lookup cost for punch geofencing: grid-bucket index vs brute-force scan.
+
+    python -m benchmarks.geofence [--sites 10 1000 10000] [--lookups 20000]
+
+For each size, sites are scattered over a country-sized box (clustered around
+a few dozen "cities", radius 30 m to 3 km, a few 10-20 km campuses). Probe
+points are half inside some site, half random. Reported: index build time,
+microseconds per lookup with app.geofence.SiteIndex and with a haversine scan
+over every site, and the candidates the index hands to haversine per lookup.
+Both must return the same sites in the same order; the run exits non-zero if
+they differ.
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from app.attendance_utils import haversine_distance_m
+from app.geofence import SiteIndex
+
+# roughly India
+LAT_RANGE = (8.0, 34.0)
+LNG_RANGE = (69.0, 92.0)
+
+
+def random_sites(rng: random.Random, n: int) -> list:
+    cities = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(40)]
+    sites = []
+    for i in range(1, n + 1):
+        lat, lng = rng.choice(cities)
+        radius = rng.randint(10_000, 20_000) if rng.random() < 0.002 else int(math.exp(rng.uniform(math.log(30), math.log(3000))))
+        sites.append(SimpleNamespace(
+            id=i, name=f"site-{i}", latitude=lat + rng.gauss(0, 0.2), longitude=lng + rng.gauss(0, 0.2),
+            radius_m=radius, ssids=[], allowed_ips=[],
+        ))
+    return sites
+
+
+def probes(rng: random.Random, sites: list, n: int) -> list:
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            s = rng.choice(sites)
+            d = rng.uniform(0, s.radius_m) / 111320.0
+            angle = rng.uniform(0, 2 * math.pi)
+            out.append((s.latitude + d * math.sin(angle), s.longitude + d * math.cos(angle) / math.cos(math.radians(s.latitude))))
+        else:
+            out.append((rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)))
+    return out
+
+
+def brute_force(sites: list, lat: float, lng: float) -> list:
+    hits = []
+    for site in sites:
+        dist = haversine_distance_m(lat, lng, site.latitude, site.longitude)
+        if dist <= site.radius_m:
+            hits.append((dist, site))
+    hits.sort(key=lambda h: (h[0], h[1].id))
+    return hits
+
+
+def run_size(n: int, lookups: int, seed: int) -> dict:
+    rng = random.Random(seed + n)
+    sites = random_sites(rng, n)
+    t0 = time.perf_counter()
+    index = SiteIndex(sites)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    points = probes(rng, sites, lookups)
+    t0 = time.perf_counter()
+    indexed = [[s.id for _, s in index.containing(lat, lng)] for lat, lng in points]
+    index_us = (time.perf_counter() - t0) / len(points) * 1e6
+    candidates = sum(len(index.candidates(lat, lng)) for lat, lng in points) / len(points)
+
+    # the scan is O(sites) per lookup: time (and compare) a slice sized to the site count
+    sample = points[:max(200, 2_000_000 // n)]
+    t0 = time.perf_counter()
+    scanned = [[s.id for _, s in brute_force(sites, lat, lng)] for lat, lng in sample]
+    scan_us = (time.perf_counter() - t0) / len(sample) * 1e6
+
+    mismatches = sum(a != b for a, b in zip(indexed, scanned))
+    return {"sites": n, "build_ms": build_ms, "index_us": index_us, "scan_us": scan_us,
+            "candidates": candidates, "hit_rate": sum(bool(h) for h in indexed) / len(indexed),
+            "checked": len(scanned), "mismatches": mismatches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sites", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'sites':>7} {'build ms':>9} {'index us':>9} {'scan us':>9} {'speedup':>8} "
+          f"{'candidates':>11} {'hits':>5} {'mismatches':>11}")
+    failed = False
+    for n in args.sites:
+        r = run_size(n, args.lookups, args.seed)
+        failed |= r["mismatches"] > 0
+        print(f"{r['sites']:>7} {r['build_ms']:>9.1f} {r['index_us']:>9.2f} {r['scan_us']:>9.1f} "
+              f"{r['scan_us'] / r['index_us']:>7.0f}x {r['candidates']:>11.1f} {r['hit_rate']:>5.0%} "
+              f"{r['mismatches']:>5}/{r['checked']}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
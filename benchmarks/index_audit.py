@@ -0,0 +1,240 @@
+# index_audit.py
+"""
+Missing-index audit: EXPLAIN every query the routers issue.
+
+    python -m benchmarks.index_audit                    # compare with the checked-in report
+    python -m benchmarks.index_audit --write-report     # accept the current findings
+    python -m benchmarks.index_audit --write-migration  # emit create_index ops for suggestions
+
+Replays every GET route (seeded like query_budgets) plus HOT_QUERIES, the
+lookups on write paths that a GET replay can't reach, and runs EXPLAIN
+(SQLite: EXPLAIN QUERY PLAN; MySQL: EXPLAIN) on each distinct SELECT.
+Reported per statement:
+  SCAN      full table scan on a filtered query; the suggested index is the
+            equality filters, then other filters, then ORDER BY columns
+  FILESORT  ORDER BY/GROUP BY needs a temporary sort; when the query also has
+            equality filters, (filters, sort columns) is suggested
+Unfiltered scans (plain list endpoints) are ignored.
+
+The default run fails if anything is reported that isn't in
+benchmarks/index_audit_report.txt, so new unindexed queries show up as
+regressions. Point DATABASE_URL at a scratch MySQL schema (created with
+`alembic upgrade head`) to audit MySQL plans; the report is per dialect.
+"""
+import argparse
+import os
+import re
+import sys
+
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, UnaryExpression
+from sqlalchemy.sql.schema import Column
+
+from ._app import bootstrap
+from .query_budgets import ROLE_FOR, get_routes, seed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_DIR = os.path.join(os.path.dirname(HERE), "migrations", "versions")
+
+EQUALITY_OPS = {operators.eq, operators.in_op}
+
+
+def hot_queries(models):
+    """Lookups on POST/PUT paths, with the same shape the handlers build."""
+    A, S, Asg, Log = models.Attendance, models.AssignmentSubmission, models.Assignment, models.AuditLog
+    return {
+        "punch_out: open session": select(A).where(A.user_id == 2, A.punch_out_time.is_(None))
+                                            .order_by(A.punch_in_time.desc()).limit(1),
+        "attendance: user history": select(A).where(A.user_id == 2).order_by(A.punch_in_time.desc()).limit(50),
+        "submissions: by assignment": select(S).where(S.assignment_id == 1),
+        "submissions: by student": select(S).where(S.student_id == 2),
+        "assignments: by class": select(Asg).where(Asg.class_id.in_([1, 2])),
+        "assignments: by creator": select(Asg).where(Asg.created_by == 1),
+        "assignments: by student": select(Asg).where(Asg.assigned_to_student == 2),
+        "audit log: resource history": select(Log).where(Log.resource_type == "payments", Log.resource_id == 1)
+                                                  .order_by(Log.created_at.desc()),
+    }
+
+
+# ---------------- statement capture ----------------
+class Recorder:
+    def __init__(self):
+        self.seen = {}          # statement -> (label, parameters, compiled select or None)
+        self.label = None
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.label is None or executemany or not statement.lstrip().upper().startswith("SELECT"):
+            return
+        compiled = getattr(context, "compiled", None)
+        stmt = getattr(compiled, "statement", None)
+        self.seen.setdefault(statement, (self.label, parameters, stmt))
+
+
+# ---------------- EXPLAIN ----------------
+def explain(conn, statement: str, parameters):
+    """Return ([(table, full_scan)], filesort) for one statement."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        scans, filesort = [], False
+        for row in rows:
+            detail = row[-1]
+            m = re.match(r"(SCAN|SEARCH) (\w+)(?: AS \w+)?(.*)", detail)
+            if m:
+                scans.append((m.group(2), m.group(1) == "SCAN" and "USING" not in m.group(3)))
+            if detail.startswith("USE TEMP B-TREE"):
+                filesort = True
+        return scans, filesort
+    rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().fetchall()
+    scans = [(r["table"], r["type"] == "ALL") for r in rows if r.get("table")]
+    return scans, any("filesort" in (r.get("Extra") or "") for r in rows)
+
+
+def _columns(stmt, table_name):
+    """(equality-filtered, otherwise-filtered, ORDER BY) columns of table_name in a select."""
+    eq, other, order = [], [], []
+    where = getattr(stmt, "whereclause", None) if stmt is not None else None
+    if where is not None:
+        for node in visitors.iterate(where):
+            if isinstance(node, BinaryExpression) and isinstance(node.left, Column) \
+                    and node.left.table.name == table_name and node.left.name not in eq + other:
+                (eq if node.operator in EQUALITY_OPS else other).append(node.left.name)
+    for clause in getattr(stmt, "_order_by_clauses", ()):
+        col = clause.element if isinstance(clause, UnaryExpression) else clause
+        if isinstance(col, Column) and col.table.name == table_name and col.name not in eq + other + order:
+            order.append(col.name)
+    return eq, other, order
+
+
+def _covered(table, columns) -> bool:
+    """True if an existing index (or the primary key) starts with the first suggested column."""
+    leading = [list(ix.columns.keys())[0] for ix in table.indexes]
+    leading += [list(table.primary_key.columns.keys())[0]] if table.primary_key.columns else []
+    leading += [list(c.columns.keys())[0] for c in table.constraints if c.__class__.__name__ == "UniqueConstraint"]
+    return columns[0] in leading and len(columns) == 1
+
+
+def audit(conn, recorded, metadata):
+    findings = []
+    for statement, (label, parameters, stmt) in sorted(recorded.items(), key=lambda kv: (kv[1][0], kv[0])):
+        scans, filesort = explain(conn, statement, parameters)
+        for table_name, full in scans:
+            if not full or table_name not in metadata.tables:
+                continue
+            eq, other, order = _columns(stmt, table_name)
+            if not eq and not other:
+                continue  # unfiltered list endpoints scan by design
+            columns = eq + other + order
+            if not _covered(metadata.tables[table_name], columns):
+                findings.append(("SCAN", table_name, label, tuple(columns)))
+        if filesort:
+            table_name = scans[0][0] if scans else "?"
+            eq, _, order = _columns(stmt, table_name)
+            # an index on (equality columns, sort columns) returns rows already ordered
+            findings.append(("FILESORT", table_name, label, tuple(eq + order) if eq and order else ()))
+    return sorted(set(findings))
+
+
+def format_finding(f) -> str:
+    kind, table, label, columns = f
+    suggest = f"  suggest ({', '.join(columns)})" if columns else ""
+    return f"{kind:<9}{table:<24}{label}{suggest}"
+
+
+# ---------------- outputs ----------------
+def report_path(dialect: str) -> str:
+    suffix = "" if dialect == "sqlite" else f"_{dialect}"
+    return os.path.join(HERE, f"index_audit_report{suffix}.txt")
+
+
+def write_migration(findings, metadata):
+    revisions = sorted(f for f in os.listdir(MIGRATIONS_DIR) if re.match(r"\d{4}_", f))
+    down = revisions[-1][:4]
+    rev = f"{int(down) + 1:04d}"
+    suggestions = sorted({(t, cols) for _, t, _, cols in findings if cols})
+    ups, downs = [], []
+    for table, cols in suggestions:
+        name = f"ix_{table}_{'_'.join(cols)}"
+        ups.append(f"    op.create_index('{name}', '{table}', {list(cols)!r}, unique=False)")
+        downs.append(f"    op.drop_index('{name}', table_name='{table}')")
+    path = os.path.join(MIGRATIONS_DIR, f"{rev}_index_audit.py")
+    with open(path, "w") as fh:
+        fh.write(f'''"""indexes suggested by benchmarks/index_audit.py
+
+Revision ID: {rev}
+Revises: {down}
+"""
+from alembic import op
+
+revision = "{rev}"
+down_revision = "{down}"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+{chr(10).join(ups) or "    pass"}
+
+
+def downgrade() -> None:
+{chr(10).join(reversed(downs)) or "    pass"}
+''')
+    print(f"wrote {path}; mirror the indexes in app/models.py __table_args__")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--write-report", action="store_true")
+    parser.add_argument("--write-migration", action="store_true")
+    args = parser.parse_args()
+
+    app = bootstrap()
+    from fastapi.testclient import TestClient
+    from app import database, models, utils
+
+    recorder = Recorder()
+    event.listen(Engine, "before_cursor_execute", recorder)
+    seed(args.size, 0)
+    with TestClient(app, raise_server_exceptions=False) as client:
+        for label, path in get_routes(app):
+            token = utils.create_access_token({"sub": ROLE_FOR.get(label, "admin@example.com")})
+            recorder.label = label
+            client.get(path, headers={"Authorization": f"Bearer {token}"})
+    with database.engine.connect() as conn:
+        for label, stmt in hot_queries(models).items():
+            recorder.label = label
+            conn.execute(stmt).fetchall()
+    recorder.label = None
+    event.remove(Engine, "before_cursor_execute", recorder)
+
+    with database.engine.connect() as conn:
+        dialect = conn.dialect.name
+        findings = audit(conn, recorder.seen, models.Base.metadata)
+    lines = [format_finding(f) for f in findings]
+    print("\n".join(lines) or "no findings")
+    print(f"\n{len(recorder.seen)} distinct SELECTs explained, {len(lines)} findings ({dialect})")
+
+    path = report_path(dialect)
+    if args.write_migration:
+        write_migration(findings, models.Base.metadata)
+    if args.write_report:
+        with open(path, "w") as fh:
+            fh.write(f"# index audit report ({dialect}); regenerate: python -m benchmarks.index_audit --write-report\n")
+            fh.write("".join(line + "\n" for line in lines))
+        print(f"wrote {path}")
+        return
+    accepted = set()
+    if os.path.exists(path):
+        with open(path) as fh:
+            accepted = {line.rstrip("\n") for line in fh if not line.startswith("#")}
+    new = [line for line in lines if line not in accepted]
+    if new:
+        print(f"\n{len(new)} finding(s) not in {os.path.basename(path)}:")
+        print("\n".join(new))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# login_storm.py
+"""
+Latency of ordinary endpoints while a burst of logins is running.
+
+    python -m benchmarks.login_storm [--logins 200] [--probes 200] [--workers 0 2 4]
+
+For each PASSWORD_HASH_WORKERS value a uvicorn instance is started on a fresh
+SQLite database; LOGINS concurrent /auth/login calls are fired while a probe
+client hits GET /tasks/my every few milliseconds. Reports p50/p99 probe latency
+and login throughput. WORKERS=0 hashes in the request threadpool, which is how
+login used to behave.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _seed(database_url: str, users: int, rounds: int):
+    env = dict(os.environ, DATABASE_URL=database_url, BCRYPT_ROUNDS=str(rounds))
+    code = (
+        "from benchmarks._app import bootstrap; bootstrap()\n"
+        "from app import database, models, passwords\n"
+        "db = database.SessionLocal()\n"
+        "hashed = passwords.hash_password('secret')\n"
+        f"db.add_all([models.User(full_name=f'u{{i}}', email=f'u{{i}}@example.com', password=hashed, role='Developer') for i in range({users})])\n"
+        "db.commit()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+async def _storm(base: str, logins: int, users: int, probes: int, probe_headers: dict):
+    async with httpx.AsyncClient(base_url=base, timeout=120) as client:
+        probe_lat = []
+
+        async def probe():
+            for _ in range(probes):
+                t0 = time.perf_counter()
+                await client.get("/tasks/my", headers=probe_headers)
+                probe_lat.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.005)
+
+        async def login(i):
+            r = await client.post("/auth/login", json={"email": f"u{i % users}@example.com", "password": "secret"})
+            return r.status_code
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(probe(), *[login(i) for i in range(logins)])
+        elapsed = time.perf_counter() - t0
+        statuses = results[1:]
+        return probe_lat, elapsed, statuses
+
+
+def run_mode(workers: int, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix="oddo-login-")
+    database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    _seed(database_url, args.users, args.rounds)
+
+    from app import utils
+    probe_headers = {"Authorization": "Bearer " + utils.create_access_token({"sub": "u0@example.com", "role": "Developer"})}
+
+    port = _free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, BCRYPT_ROUNDS=str(args.rounds),
+               PASSWORD_HASH_WORKERS=str(workers), PASSWORD_HASH_MAX_PENDING=str(args.logins * 2),
+               OUTBOX_WORKER_ENABLED="0")
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base + "/", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        probe_lat, elapsed, statuses = asyncio.run(_storm(base, args.logins, args.users, args.probes, probe_headers))
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {
+        "workers": workers,
+        "probe_p50_ms": _percentile(probe_lat, 50) * 1000,
+        "probe_p99_ms": _percentile(probe_lat, 99) * 1000,
+        "logins_per_s": len(statuses) / elapsed,
+        "login_errors": sum(1 for s in statuses if s != 200),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    args = parser.parse_args()
+
+    # the probe token only needs SECRET_KEY; keep this process off the real database
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'unused.db')}")
+
+    print(f"{'workers':>7} {'probe p50 ms':>13} {'probe p99 ms':>13} {'logins/s':>9} {'errors':>7}")
+    for workers in args.workers:
+        r = run_mode(workers, args)
+        print(f"{r['workers']:>7} {r['probe_p50_ms']:>13.1f} {r['probe_p99_ms']:>13.1f} {r['logins_per_s']:>9.1f} {r['login_errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
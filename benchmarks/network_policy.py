@@ -0,0 +1,138 @@
+# network_policy.py
+"""
+Cost of the punch IP checks with large allow-lists: compiled policy vs re-parsing.
+
+    python -m benchmarks.network_policy [--cidrs 10 1000 10000] [--lookups 20000]
+
+For each list size a random mix of IPv4/IPv6 CIDRs and single addresses is
+generated. Reported: time to compile a NetworkPolicy, and microseconds per
+is_ip_allowed + is_client_on_router_network check with the compiled policy
+against the previous implementation, which split the settings string and
+parsed every entry with ipaddress on each call. The old code runs on a slice
+of the same probe addresses (half of them inside a listed range) and both
+must agree there, so the run doubles as an equivalence check; it exits
+non-zero if they differ.
+"""
+import argparse
+import ipaddress
+import random
+import sys
+import time
+
+from app.network_policy import NetworkPolicy
+
+
+def legacy_ip_allowed(raw: str, client_ip: str) -> bool:
+    allowed = [s.strip() for s in raw.split(",") if s.strip()]
+    if ":" in client_ip and client_ip.count(":") == 1:
+        client_ip = client_ip.split(":")[0]
+    for entry in allowed:
+        try:
+            if "/" in entry:
+                if ipaddress.ip_address(client_ip) in ipaddress.ip_network(entry, strict=False):
+                    return True
+            elif ipaddress.ip_address(client_ip) == ipaddress.ip_address(entry):
+                return True
+        except Exception:
+            continue
+    return False
+
+
+def legacy_router(raw: str, client_ip: str) -> bool:
+    entries = [s.strip() for s in raw.split(",") if s.strip()]
+    if ":" in client_ip and client_ip.count(":") == 1:
+        client_ip = client_ip.split(":")[0]
+    try:
+        ip_obj = ipaddress.ip_address(client_ip)
+    except Exception:
+        return False
+    for entry in entries:
+        try:
+            if "/" in entry:
+                if ip_obj in ipaddress.ip_network(entry, strict=False):
+                    return True
+                continue
+            router_ip = ipaddress.ip_address(entry)
+            if router_ip.version == 4 and ip_obj.version == 4:
+                net = ipaddress.ip_network(".".join(str(router_ip).split(".")[:3]) + ".0/24")
+                if ip_obj in net:
+                    return True
+            elif ip_obj == router_ip:
+                return True
+        except Exception:
+            continue
+    return False
+
+
+def random_entries(rng: random.Random, n: int) -> list:
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.8:
+            ip = ipaddress.IPv4Address(rng.getrandbits(32))
+            out.append(str(ip) if rng.random() < 0.3 else f"{ip}/{rng.randint(16, 30)}")
+        else:
+            ip = ipaddress.IPv6Address(rng.getrandbits(128))
+            out.append(str(ip) if rng.random() < 0.3 else f"{ip}/{rng.randint(32, 64)}")
+    return out
+
+
+def probes(rng: random.Random, entries: list, n: int) -> list:
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            net = ipaddress.ip_network(rng.choice(entries), strict=False)
+            out.append(str(net.network_address + rng.randrange(net.num_addresses)))
+        elif rng.random() < 0.8:
+            out.append(str(ipaddress.IPv4Address(rng.getrandbits(32))))
+        else:
+            out.append(str(ipaddress.IPv6Address(rng.getrandbits(128))))
+    return out
+
+
+def run_size(n: int, lookups: int, seed: int) -> dict:
+    rng = random.Random(seed + n)
+    ips, routers = random_entries(rng, n), random_entries(rng, max(1, n // 10))
+    raw_ips, raw_routers = ",".join(ips), ",".join(routers)
+
+    t0 = time.perf_counter()
+    policy = NetworkPolicy(ssids=["office"], ips=ips, router_ips=routers)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    sample = probes(rng, ips + routers, lookups)
+    t0 = time.perf_counter()
+    compiled = [policy.ip_allowed(ip) or policy.on_router_network(ip) for ip in sample]
+    compiled_us = (time.perf_counter() - t0) / len(sample) * 1e6
+
+    # the old code parses every entry on every call: time (and compare) a slice sized to the list
+    legacy_sample = sample[:max(200, 500_000 // n)]
+    t0 = time.perf_counter()
+    legacy = [legacy_ip_allowed(raw_ips, ip) or legacy_router(raw_routers, ip) for ip in legacy_sample]
+    legacy_us = (time.perf_counter() - t0) / len(legacy_sample) * 1e6
+
+    mismatches = sum(a != b for a, b in zip(compiled, legacy))
+    return {"cidrs": n, "ranges": policy.allowed_ips.size + policy.router_networks.size,
+            "compile_ms": compile_ms, "compiled_us": compiled_us, "legacy_us": legacy_us,
+            "hit_rate": sum(compiled) / len(compiled), "checked": len(legacy), "mismatches": mismatches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cidrs", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'cidrs':>7} {'ranges':>7} {'compile ms':>11} {'compiled us':>12} {'legacy us':>10} "
+          f"{'speedup':>8} {'hits':>5} {'mismatches':>11}")
+    failed = False
+    for n in args.cidrs:
+        r = run_size(n, args.lookups, args.seed)
+        failed |= r["mismatches"] > 0
+        print(f"{r['cidrs']:>7} {r['ranges']:>7} {r['compile_ms']:>11.1f} {r['compiled_us']:>12.2f} "
+              f"{r['legacy_us']:>10.1f} {r['legacy_us'] / r['compiled_us']:>7.0f}x {r['hit_rate']:>5.0%} "
+              f"{r['mismatches']:>5}/{r['checked']}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# outbox_throughput.py
+"""
+Email outbox throughput against a local SMTP stand-in.
+
+    pip install aiosmtpd
+    python -m benchmarks.outbox_throughput [--messages 2000] [--batch 50] [--fail-every 0]
+
+Starts an aiosmtpd server on localhost, enqueues MESSAGES outbox rows and drains
+them with mailer.OutboxWorker over one persistent connection. With --fail-every N
+the server rejects every Nth message, exercising the retry/dead-letter path.
+"""
+import argparse
+import socket
+import time
+
+from ._app import bootstrap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=50)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        raise SystemExit("aiosmtpd is required: pip install aiosmtpd")
+
+    bootstrap()
+    from app import database, mailer, models
+
+    received = {"n": 0, "seen": 0}
+
+    class Handler:
+        async def handle_DATA(self, server, session, envelope):
+            received["seen"] += 1
+            if args.fail_every and received["seen"] % args.fail_every == 0:
+                return "451 Try again later"
+            received["n"] += 1
+            return "250 OK"
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    controller = Controller(Handler(), hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        db = database.SessionLocal()
+        db.execute(models.EmailOutbox.__table__.insert(), [
+            {"to_email": f"user{i}@example.com", "subject": "bench", "body": "hello", "status": "pending",
+             "attempts": 0, "next_attempt_at": mailer.datetime.utcnow()}
+            for i in range(args.messages)
+        ])
+        db.commit()
+        db.close()
+
+        worker = mailer.OutboxWorker(host="127.0.0.1", port=port, username=None, password=None,
+                                     sender="bench@example.com", use_tls=False, batch_size=args.batch)
+        t0 = time.perf_counter()
+        worker.drain()
+        elapsed = time.perf_counter() - t0
+        worker._disconnect()
+    finally:
+        controller.stop()
+
+    print(f"messages enqueued : {args.messages}")
+    print(f"delivered         : {received['n']}")
+    print(f"retry scheduled   : {worker.failed}")
+    print(f"dead-lettered     : {worker.dead}")
+    print(f"elapsed           : {elapsed:.2f}s")
+    print(f"throughput        : {worker.sent / elapsed:.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# pool_checkouts.py
+"""
+Pool checkouts per authenticated request.
+
+    python -m benchmarks.pool_checkouts [--requests 200]
+
+Compares the shared request-scoped session (routers and get_current_user_async
+both depend on database.get_async_db) with the old layout where the auth
+dependency opened its own session, by counting "checkout" events on the async
+engine's pool.
+"""
+import argparse
+
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+
+from ._app import bootstrap, create_user, auth_headers
+
+
+def measure(client, headers, n: int, counter: dict) -> float:
+    from app import utils
+    counter["n"] = 0
+    for _ in range(n):
+        # cold principal cache so get_current_user really hits the database
+        utils.principal_cache.clear()
+        r = client.get("/sprints/1", headers=headers)
+        r.raise_for_status()
+    return counter["n"] / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    app = bootstrap()
+    from fastapi.testclient import TestClient
+    from app import database, utils
+
+    create_user("bench@example.com")
+    headers = auth_headers("bench@example.com")
+
+    counter = {"n": 0}
+
+    database.get_async_sessionmaker()
+
+    @event.listens_for(database.async_engine.sync_engine, "checkout")
+    def _on_checkout(*_):
+        counter["n"] += 1
+
+    async def legacy_get_db():
+        async with database.AsyncSessionLocal() as db:
+            yield db
+
+    async def legacy_current_user(credentials: HTTPAuthorizationCredentials = Depends(utils.security),
+                                  db=Depends(legacy_get_db)):
+        return await utils.get_current_user_async(credentials, db)
+
+    with TestClient(app) as client:
+        shared = measure(client, headers, args.requests, counter)
+        app.dependency_overrides[utils.get_current_user_async] = legacy_current_user
+        legacy = measure(client, headers, args.requests, counter)
+        app.dependency_overrides.clear()
+
+    print(f"requests per mode       : {args.requests}")
+    print(f"separate auth session   : {legacy:.2f} checkouts/request")
+    print(f"shared request session  : {shared:.2f} checkouts/request")
+
+
+if __name__ == "__main__":
+    main()
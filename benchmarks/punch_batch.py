@@ -0,0 +1,145 @@
+# punch_batch.py
+"""
+Offline punch upload: vectorised batch validation and one batch request vs
+one request per punch.
+
+    python -m benchmarks.punch_batch [--events 500] [--sites 0 1000] [--rounds 20]
+
+Validation: for each site count, EVENTS punches (half near a site or the
+office, half anywhere) are checked with geofence.check_location one at a time,
+then with geofence.check_locations in one call, vectorised with NumPy and
+with the plain loop it uses for small batches. Reported: microseconds per punch; all three must agree
+with the one-at-a-time verdicts (exits non-zero otherwise).
+
+Requests: EVENTS/2 in/out pairs uploaded as one POST /attendance/punch-batch
+vs the same punches as POST /attendance/punch-in and /punch-out calls, through
+the ASGI test client, with the statements each issues.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from ._app import bootstrap, create_user
+
+
+def _points(rng: random.Random, sites: list, settings, n: int) -> list:
+    centres = [(s.latitude, s.longitude) for s in sites] or [(settings.OFFICE_LAT, settings.OFFICE_LNG)]
+    ssid, ip = settings.ALLOWED_SSID, settings.ALLOWED_IPS.split(",")[0].strip()
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            lat, lng = rng.choice(centres)
+            out.append((lat + rng.gauss(0, 0.001), lng + rng.gauss(0, 0.001), ssid, ip))
+        else:
+            out.append((rng.uniform(8, 34), rng.uniform(69, 92), ssid, ip))
+    return out
+
+
+def _time(fn, rounds: int):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return (time.perf_counter() - t0) / rounds, result
+
+
+def validation(n_sites: int, events: int, rounds: int, seed: int) -> dict:
+    from app import attendance_utils, database, geofence, models
+    from app.config import settings
+    rng = random.Random(seed + n_sites)
+    db = database.SessionLocal()
+    try:
+        db.query(models.Site).delete()
+        for i in range(n_sites):
+            db.add(models.Site(name=f"site-{i}", latitude=rng.uniform(8, 34), longitude=rng.uniform(69, 92),
+                               radius_m=rng.randint(50, 3000), ssids=[], allowed_ips=[]))
+        db.commit()
+        geofence.registry.invalidate()
+        sites = db.query(models.Site).all()
+        points = _points(rng, sites, settings, events)
+        geofence.check_locations(db, points[:1])   # build the index outside the timings
+
+        single_s, expected = _time(lambda: [geofence.check_location(db, *p) for p in points], rounds)
+        batch_s, batch = _time(lambda: geofence.check_locations(db, points), rounds)
+        vectorize_min = attendance_utils.VECTORIZE_MIN
+        attendance_utils.VECTORIZE_MIN = float("inf")
+        try:
+            scalar_s, scalar = _time(lambda: geofence.check_locations(db, points), rounds)
+        finally:
+            attendance_utils.VECTORIZE_MIN = vectorize_min
+        return {"sites": n_sites, "single_us": single_s / events * 1e6, "batch_us": batch_s / events * 1e6,
+                "scalar_us": scalar_s / events * 1e6,
+                "mismatches": sum(a != b for a, b in zip(expected, batch)) + sum(a != b for a, b in zip(expected, scalar)),
+                "passing": sum(v.ok for v in expected)}
+    finally:
+        db.query(models.Site).delete()
+        db.commit()
+        geofence.registry.invalidate()
+        db.close()
+
+
+def requests(app, pairs: int) -> dict:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app import database, utils
+    from app.config import settings
+    good = {"latitude": settings.OFFICE_LAT, "longitude": settings.OFFICE_LNG,
+            "ssid": settings.ALLOWED_SSID, "ip": settings.ALLOWED_IPS.split(",")[0].strip()}
+    statements = []
+    database.get_async_sessionmaker()
+    for engine in (database.engine, database.async_engine.sync_engine):   # the punch routes use the async one
+        event.listen(engine, "before_cursor_execute", lambda *a: statements.append(1))
+    out = {}
+    with TestClient(app) as client:
+        for mode in ("single", "batch"):
+            create_user(f"{mode}@example.com")
+            headers = {"Authorization": "Bearer " + utils.create_access_token({"sub": f"{mode}@example.com"})}
+            statements.clear()
+            t0 = time.perf_counter()
+            if mode == "batch":
+                now = datetime.utcnow()
+                events = []
+                for k in range(pairs):
+                    start = now - timedelta(minutes=10 * (pairs - k))
+                    events += [{"type": "in", "client_ts": start.isoformat(), **good},
+                               {"type": "out", "client_ts": (start + timedelta(minutes=5)).isoformat(), **good}]
+                r = client.post("/attendance/punch-batch", json={"events": events}, headers=headers)
+                assert r.status_code == 200 and r.json()["recorded"] == 2 * pairs, r.text
+            else:
+                for _ in range(pairs):
+                    for path in ("/attendance/punch-in", "/attendance/punch-out"):
+                        r = client.post(path, json=good, headers=headers)
+                        assert r.status_code == 200, r.text
+            out[mode] = {"ms": (time.perf_counter() - t0) * 1000, "statements": len(statements)}
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--sites", type=int, nargs="+", default=[0, 1000])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    app = bootstrap()
+
+    print(f"validation, {args.events} punches per batch")
+    print(f"{'sites':>6} {'single us':>10} {'batch us':>9} {'loop us':>12} {'speedup':>8} {'passing':>8} {'mismatches':>11}")
+    failed = False
+    for n in args.sites:
+        r = validation(n, args.events, args.rounds, args.seed)
+        failed |= r["mismatches"] > 0
+        print(f"{r['sites']:>6} {r['single_us']:>10.1f} {r['batch_us']:>9.1f} {r['scalar_us']:>12.1f} "
+              f"{r['single_us'] / r['batch_us']:>7.1f}x {r['passing']:>8} {r['mismatches']:>11}")
+
+    pairs = args.events // 2
+    r = requests(app, pairs)
+    print(f"\nrequests, {pairs} in/out pairs")
+    for mode in ("single", "batch"):
+        print(f"{mode:>7}: {r[mode]['ms']:>8.0f} ms {r[mode]['statements']:>6} statements")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# punch_storm.py
+"""
+Morning punch-in storm against a local uvicorn instance.
+
+    python -m benchmarks.punch_storm [--scale 10] [--window 60] [--curve normal] [--workers 1 2 4]
+
+Seeds a database with benchmarks.synth (every student, staff member and
+developer is a puncher), starts `uvicorn --workers N` on it and replays one
+morning: each user arrives once, at a time drawn from the arrival curve over
+WINDOW seconds, and POSTs /attendance/punch-in. INVALID_RATE of users first
+send 1-3 payloads that fail the SSID, geo or IP check (going through
+check_and_increment_fail) before a valid one; PUNCH_OUT_RATE of users punch out
+again before the window ends.
+
+Curves: uniform, normal (peak mid-window, sd = window/6) and spike (half of
+everyone inside the first tenth of the window).
+
+Reported per worker count: throughput, p50/p99 latency per endpoint, status
+codes (403 = rejected check, 5xx = errors such as lock timeouts) and, from
+the server's /metrics, time spent in SQL and waiting for a pooled connection.
+On MySQL (--database-url pointing at a scratch schema) InnoDB row lock waits
+are read from SHOW GLOBAL STATUS before and after the run; SQLite has no lock
+wait counter, so lock contention shows up there as "database is locked" 500s.
+With several workers /metrics answers for one worker only, so those columns
+are a sample. Size DB_POOL_SIZE/DB_MAX_OVERFLOW with --pool-size/--max-overflow.
+"""
+import argparse
+import asyncio
+import collections
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .login_storm import _free_port, _percentile
+
+CURVES = ("uniform", "normal", "spike")
+METRIC_LINE = re.compile(r'^(oddo_\w+)\{route="([^"]+)"\} ([0-9.e+-]+)$')
+METRICS_TOKEN = "punch-storm"   # the spawned server only serves /metrics once a token is set
+
+
+def arrivals(n: int, window: float, curve: str, rnd: random.Random) -> list:
+    """n arrival offsets in seconds within [0, window]."""
+    if curve == "uniform":
+        times = [rnd.uniform(0, window) for _ in range(n)]
+    elif curve == "normal":
+        times = [min(window, max(0.0, rnd.gauss(window / 2, window / 6))) for _ in range(n)]
+    else:
+        times = [rnd.uniform(0, window / 10) if i % 2 == 0 else rnd.uniform(0, window) for i in range(n)]
+    return sorted(times)
+
+
+def payload(settings, valid: bool, rnd: random.Random) -> dict:
+    good = {"latitude": settings.OFFICE_LAT, "longitude": settings.OFFICE_LNG,
+            "ssid": settings.ALLOWED_SSID, "ip": settings.ALLOWED_IPS.split(",")[0].strip()}
+    if valid:
+        return good
+    broken = rnd.choice(("ssid", "geo", "ip"))
+    if broken == "ssid":
+        return {**good, "ssid": "Guest WiFi"}
+    if broken == "geo":
+        return {**good, "latitude": settings.OFFICE_LAT + 0.05}   # ~5 km away
+    return {**good, "ip": "203.0.113.7"}
+
+
+def _seed(env: dict, scale: int):
+    code = (
+        "from benchmarks._app import bootstrap; bootstrap()\n"
+        "from app import database\n"
+        "from benchmarks.synth import load\n"
+        f"load(database.engine, {scale}, years=0.25)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, stderr=subprocess.DEVNULL)
+
+
+def _punchers(env: dict) -> list:
+    code = (
+        "from sqlalchemy import select\n"
+        "from app import database, models\n"
+        "with database.engine.connect() as c:\n"
+        "    for e in c.execute(select(models.User.email).where(models.User.role != 'Admin')).scalars(): print(e)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True).stdout
+    return out.split()
+
+
+def _innodb_lock_status(database_url: str) -> dict:
+    from sqlalchemy import create_engine, text
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_%'")).all()
+        return {name: float(value) for name, value in rows}
+    finally:
+        engine.dispose()
+
+
+def _server_metrics(base: str, token: str) -> dict:
+    out = collections.defaultdict(dict)
+    r = httpx.get(base + "/metrics", headers={"Authorization": f"Bearer {token}"}, timeout=10)
+    for line in r.text.splitlines():
+        m = METRIC_LINE.match(line)
+        if m:
+            out[m.group(2)][m.group(1)] = float(m.group(3))
+    return out
+
+
+async def _storm(base: str, plan: list, window: float, punch_out_rate: float, max_connections: int, settings, rnd):
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    latencies = collections.defaultdict(list)
+    statuses = collections.Counter()
+    async with httpx.AsyncClient(base_url=base, timeout=120, limits=limits) as client:
+        async def call(path, token, body):
+            t0 = time.perf_counter()
+            try:
+                r = await client.post(path, json=body, headers={"Authorization": f"Bearer {token}"})
+                status = r.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies[path].append(time.perf_counter() - t0)
+            statuses[(path, status)] += 1
+
+        async def user(at, token, failures, punch_out):
+            await asyncio.sleep(max(0.0, at - (time.perf_counter() - started)))
+            for _ in range(failures):
+                await call("/attendance/punch-in", token, payload(settings, False, rnd))
+            await call("/attendance/punch-in", token, payload(settings, True, rnd))
+            if punch_out:
+                await asyncio.sleep(max(0.0, rnd.uniform(at, window) - (time.perf_counter() - started)))
+                await call("/attendance/punch-out", token, payload(settings, True, rnd))
+
+        started = time.perf_counter()
+        await asyncio.gather(*[user(at, token, failures, rnd.random() < punch_out_rate)
+                               for at, token, failures in plan])
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def run_mode(workers: int, args, base_env: dict, emails: list, settings, utils) -> dict:
+    rnd = random.Random(args.seed)
+    tokens = [utils.create_access_token({"sub": email}) for email in emails]
+    times = arrivals(len(tokens), args.window, args.curve, rnd)
+    plan = [(at, token, rnd.randint(1, 3) if rnd.random() < args.invalid_rate else 0)
+            for at, token in zip(times, tokens)]
+
+    port = _free_port()
+    env = dict(base_env, DB_POOL_SIZE=str(args.pool_size), DB_MAX_OVERFLOW=str(args.max_overflow),
+               METRICS_TOKEN=METRICS_TOKEN)
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--workers", str(workers), "--log-level", "warning"], env=env)
+    base = f"http://127.0.0.1:{port}"
+    mysql = base_env["DATABASE_URL"].startswith("mysql")
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base + "/", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        locks_before = _innodb_lock_status(base_env["DATABASE_URL"]) if mysql else {}
+        latencies, statuses, elapsed = asyncio.run(
+            _storm(base, plan, args.window, args.punch_out_rate, args.max_connections, settings, rnd))
+        locks_after = _innodb_lock_status(base_env["DATABASE_URL"]) if mysql else {}
+        server = _server_metrics(base, METRICS_TOKEN)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {"workers": workers, "latencies": latencies, "statuses": statuses, "elapsed": elapsed, "server": server,
+            "lock_waits": locks_after.get("Innodb_row_lock_waits", 0) - locks_before.get("Innodb_row_lock_waits", 0),
+            "lock_ms": locks_after.get("Innodb_row_lock_time", 0) - locks_before.get("Innodb_row_lock_time", 0),
+            "mysql": mysql}
+
+
+def report(r: dict):
+    total = sum(r["statuses"].values())
+    print(f"\nworkers={r['workers']}: {total} requests in {r['elapsed']:.1f}s = {total / r['elapsed']:.1f} req/s")
+    print(f"  {'endpoint':<24} {'n':>6} {'p50 ms':>8} {'p99 ms':>8} {'sql s':>7} {'pool wait s':>12}")
+    for path, values in sorted(r["latencies"].items()):
+        m = r["server"].get(f"POST {path}", {})
+        print(f"  {path:<24} {len(values):>6} {_percentile(values, 50) * 1000:>8.1f} {_percentile(values, 99) * 1000:>8.1f}"
+              f" {m.get('oddo_db_seconds_total', 0):>7.2f} {m.get('oddo_db_pool_wait_seconds_total', 0):>12.3f}")
+    codes = collections.Counter()
+    for (path, status), n in r["statuses"].items():
+        codes[status] += n
+    errors = sum(n for status, n in codes.items() if not isinstance(status, int) or status >= 500)
+    print("  status: " + ", ".join(f"{status}={n}" for status, n in sorted(codes.items(), key=str))
+          + f"  error rate {errors / max(total, 1):.1%}")
+    if r["mysql"]:
+        print(f"  InnoDB row lock waits: {r['lock_waits']:.0f} ({r['lock_ms']:.0f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10, help="benchmarks.synth scale (40 punchers per unit)")
+    parser.add_argument("--window", type=float, default=60.0, help="seconds the morning is compressed into")
+    parser.add_argument("--curve", choices=CURVES, default="normal")
+    parser.add_argument("--invalid-rate", type=float, default=0.15)
+    parser.add_argument("--punch-out-rate", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--max-overflow", type=int, default=20)
+    parser.add_argument("--max-connections", type=int, default=500, help="client-side HTTP connection cap")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", default=None, help="default: a fresh SQLite file per worker count")
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        database_url = args.database_url or \
+            f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='oddo-punch-'), 'bench.db')}"
+        env = dict(os.environ, DATABASE_URL=database_url, OUTBOX_WORKER_ENABLED="0")
+        if workers == args.workers[0] or not args.database_url:
+            _seed(env, args.scale)
+        emails = _punchers(env)
+        # tokens only need SECRET_KEY; importing utils here must not reach for the default database
+        os.environ["DATABASE_URL"] = database_url
+        from app import utils
+        from app.config import settings
+        report(run_mode(workers, args, env, emails, settings, utils))
+
+
+if __name__ == "__main__":
+    main()
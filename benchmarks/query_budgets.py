@@ -0,0 +1,195 @@
+# query_budgets.py
+"""
+Per-endpoint query budgets and N+1 detection.
+
+    python -m benchmarks.query_budgets [--small 5] [--large 40] [--verbose]
+
+Seeds a SQLite database at two sizes and calls every GET route registered in
+app.main with metrics.capture() active. A route fails when
+  - it does not answer 2xx (a 4xx means the call never reached its queries:
+    give it what it needs in PATH_PARAMS / QUERY_PARAMS),
+  - it issues more statements at the large size than at the small one
+    (query count scales with data),
+  - any identical statement runs QUERY_REPEAT_THRESHOLD+ times in one request
+    (N+1), or
+  - it exceeds its entry in BUDGETS.
+Exits non-zero on failure, so it can gate CI.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from ._app import bootstrap
+
+# hard ceilings for hot endpoints (statements per request, auth lookup included)
+BUDGETS = {
+    "GET /tasks/full": 3,
+    "GET /projects/": 3,
+    "GET /me/projects/full": 5,
+    "GET /assignments/{assignment_id}/submissions": 4,
+    "GET /classes/": 4,
+    # the whole month is one streamed query, however many users and days
+    "GET /attendance/admin/report": 2,
+}
+
+# who calls each route (default Admin); ids match seed()
+ROLE_FOR = {
+    "GET /me/projects/full": "dev@example.com",
+    "GET /attendance/me": "student@example.com",
+}
+
+PATH_PARAMS = {
+    "project_id": 1, "sprint_id": 1, "task_id": 1, "id": 1, "class_id": 1,
+    "assignment_id": 1, "student_id": 2, "staff_id": 3, "user_id": 2,
+}
+
+# required query parameters; the report covers the month the seeded attendance is in
+QUERY_PARAMS = {
+    "GET /attendance/admin/report": {"month": (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m")},
+    "GET /sites/match": {"latitude": 22.8049, "longitude": 86.2030},
+}
+
+SKIP = {"GET /metrics", "GET /"}
+
+
+def seed(n: int, start: int):
+    """Add n of everything, hanging off the fixed ids used in PATH_PARAMS."""
+    from app import database, models
+    db = database.SessionLocal()
+    try:
+        if start == 0:
+            for email, role in (("admin@example.com", "Admin"), ("student@example.com", "Student"),
+                                ("staff@example.com", "Staff"), ("dev@example.com", "Developer")):
+                db.add(models.User(full_name=email.split("@")[0], email=email, password="!", role=role))
+            db.flush()
+            db.add(models.Project(name="p1"))
+            db.add(models.Class(name="c1"))
+            db.flush()
+            db.add(models.Sprint(name="s1", project_id=1))
+            db.flush()
+            db.add(models.Task(title="t1", sprint_id=1, assigned_to=4))
+            db.add(models.Assignment(title="a1", class_id=1, created_by=1))
+            db.flush()
+        project = db.get(models.Project, 1)
+        cls = db.get(models.Class, 1)
+        student = db.get(models.User, 2)
+        staff = db.get(models.User, 3)
+        dev = db.get(models.User, 4)
+        project.members.append(dev) if dev not in project.members else None
+        cls.students.append(student) if student not in cls.students else None
+        cls.staff.append(staff) if staff not in cls.staff else None
+
+        now = datetime.utcnow()
+        for i in range(start, start + n):
+            s = models.User(full_name=f"student{i}", email=f"student{i}@example.com", password="!", role="Student")
+            st = models.User(full_name=f"staff{i}", email=f"staff{i}@example.com", password="!", role="Staff")
+            d = models.User(full_name=f"dev{i}", email=f"dev{i}@example.com", password="!", role="Developer")
+            c = models.Class(name=f"class{i}")
+            db.add_all([s, st, d, c])
+            db.flush()
+            cls.students.append(s)
+            cls.staff.append(st)
+            project.members.append(d)
+            c.students.append(student)
+            c.staff.append(staff)
+            p = models.Project(name=f"project{i}")
+            p.members.append(dev)
+            sprint = models.Sprint(name=f"sprint{i}", project_id=1)
+            db.add_all([p, sprint])
+            db.flush()
+            task = models.Task(title=f"task{i}", sprint_id=sprint.id, assigned_to=4)
+            db.add(task)
+            db.flush()
+            db.add(models.Bug(description=f"bug{i}", task_id=1, created_by=1))
+            db.add(models.Bug(description=f"bug{i}", task_id=task.id, created_by=1))
+            a = models.Assignment(title=f"assignment{i}", class_id=1, created_by=1, assigned_to_student=2)
+            db.add(a)
+            db.add(models.AssignmentSubmission(assignment_id=1, student_id=s.id, submitted_at=now))
+            db.add(models.AssignmentSubmission(assignment_id=1, student_id=2, submitted_at=now, grader_id=st.id))
+            day = now - timedelta(days=i + 1)
+            for uid in (2, 4):
+                db.add(models.Attendance(user_id=uid, date=day, punch_in_time=day, punch_out_time=day + timedelta(hours=8)))
+            fs = models.FeeStructure(class_id=1, name=f"fee{i}", total_amount=900, terms=3)
+            db.add(fs)
+            db.flush()
+            db.add(models.Payment(student_id=2, fee_structure_id=fs.id, amount=100, payment_date=now, term_no=1))
+            db.add(models.Expense(title=f"expense{i}", amount=50, expense_date=now))
+            db.add(models.StaffSalary(staff_id=3, month=f"2025-{i % 12 + 1:02d}", net_amount=500))
+            db.add(models.AuditLog(actor_id=1, action="seed", resource_type="x", resource_id=i))
+            db.add(models.Invite(email=f"invite{i}@example.com", full_name=f"invite{i}", code=f"code{i}"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def get_routes(app):
+    from fastapi.routing import APIRoute
+    out = []
+    for route in app.routes:
+        if isinstance(route, APIRoute) and "GET" in route.methods:
+            label = f"GET {route.path}"
+            if label not in SKIP:
+                out.append((label, route.path.format(**{k: PATH_PARAMS.get(k, 1) for k in route.param_convertors})))
+    return out
+
+
+def run_all(client, routes) -> dict:
+    from app import metrics, utils
+    results = {}
+    for label, path in routes:
+        email = ROLE_FOR.get(label, "admin@example.com")
+        token = utils.create_access_token({"sub": email})
+        # cold principal cache: every request pays the same one auth lookup
+        utils.principal_cache.clear()
+        with metrics.capture() as seen:
+            r = client.get(path, params=QUERY_PARAMS.get(label), headers={"Authorization": f"Bearer {token}"})
+        results[label] = (r.status_code, seen[0])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--small", type=int, default=5)
+    parser.add_argument("--large", type=int, default=40)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    app = bootstrap()
+    from fastapi.testclient import TestClient
+    from app.config import settings
+
+    routes = get_routes(app)
+    # server errors are reported per route instead of aborting the run
+    with TestClient(app, raise_server_exceptions=False) as client:
+        seed(args.small, 0)
+        small = run_all(client, routes)
+        seed(args.large - args.small, args.small)
+        large = run_all(client, routes)
+
+    failures = 0
+    print(f"{'route':<48} {'status':>6} {'small':>6} {'large':>6}  verdict")
+    for label, _ in routes:
+        s_status, s = small[label]
+        l_status, l = large[label]
+        problems = []
+        if not (200 <= l_status < 300 and 200 <= s_status < 300):
+            problems.append(f"HTTP {l_status if l_status >= 300 else s_status}")
+        if l.queries > s.queries:
+            problems.append("scales with data")
+        repeated = l.repeated_shapes(settings.QUERY_REPEAT_THRESHOLD)
+        if repeated:
+            problems.append(f"N+1 ({max(repeated.values())}x same statement)")
+        if label in BUDGETS and l.queries > BUDGETS[label]:
+            problems.append(f"over budget {BUDGETS[label]}")
+        failures += bool(problems)
+        print(f"{label:<48} {l_status:>6} {s.queries:>6} {l.queries:>6}  {'; '.join(problems) or 'ok'}")
+        if problems and args.verbose:
+            for sql, n in sorted(repeated.items(), key=lambda kv: -kv[1]):
+                print(f"{'':>8}{n}x {sql[:150]}")
+
+    print(f"\n{failures} of {len(routes)} routes failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# report_stream.py
+"""
+Server memory while streaming GET /attendance/admin/report, as user count grows.
+
+    python -m benchmarks.report_stream [--users 1000 4000 16000] [--format csv|ndjson|xlsx]
+
+For each size a fresh SQLite database is loaded with benchmarks.synth (about
+a month of attendance plus its daily rollup), a uvicorn process is started on
+it, and the current month's report is downloaded with a streaming client.
+Reported: users, response size, time, and the server's RSS before the
+request against its peak RSS (VmHWM) afterwards. Flat growth across sizes
+means the export holds a bounded number of rows however large the
+organisation is. Linux only (reads /proc/<pid>/status).
+"""
+import argparse
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+from .login_storm import _free_port
+from .synth import SCALE_UNIT
+
+
+def _status_kib(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as fh:
+        for line in fh:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _seed(env: dict, scale: int):
+    code = (
+        "from benchmarks._app import bootstrap; bootstrap()\n"
+        "from app import database\n"
+        "from benchmarks.synth import load\n"
+        f"load(database.engine, {scale}, years=0.1)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, stderr=subprocess.DEVNULL)
+
+
+def run_size(users: int, fmt: str) -> dict:
+    per_unit = sum(SCALE_UNIT[k] for k in ("students", "staff", "developers"))
+    scale = max(1, math.ceil(users / per_unit))
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='oddo-report-'), 'bench.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url, OUTBOX_WORKER_ENABLED="0")
+    _seed(env, scale)
+
+    os.environ["DATABASE_URL"] = database_url
+    from app import utils
+    headers = {"Authorization": "Bearer " + utils.create_access_token({"sub": "admin@example.com"})}
+
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                             "--log-level", "warning"], env=env)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base + "/", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        # warm up imports and the connection pool on a tiny request
+        httpx.get(base + "/attendance/admin/report", params={"month": "2000-01", "format": fmt},
+                  headers=headers, timeout=60).raise_for_status()
+        rss_before = _status_kib(proc.pid, "VmRSS")
+        month = datetime.utcnow().strftime("%Y-%m")
+        size = 0
+        t0 = time.perf_counter()
+        with httpx.stream("GET", base + "/attendance/admin/report", params={"month": month, "format": fmt},
+                          headers=headers, timeout=600) as r:
+            r.raise_for_status()
+            for chunk in r.iter_bytes():
+                size += len(chunk)
+        elapsed = time.perf_counter() - t0
+        peak = _status_kib(proc.pid, "VmHWM")
+    finally:
+        proc.terminate()
+        proc.wait()
+    return {"users": scale * per_unit, "bytes": size, "seconds": elapsed,
+            "rss_before_mib": rss_before / 1024, "peak_mib": peak / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1000, 4000, 16000])
+    parser.add_argument("--format", choices=["csv", "ndjson", "xlsx"], default="csv")
+    args = parser.parse_args()
+
+    print(f"{'users':>7} {'size KiB':>10} {'seconds':>8} {'rss before MiB':>15} {'peak MiB':>9} {'growth MiB':>11}")
+    for users in args.users:
+        r = run_size(users, args.format)
+        print(f"{r['users']:>7} {r['bytes'] / 1024:>10.0f} {r['seconds']:>8.2f} {r['rss_before_mib']:>15.1f} "
+              f"{r['peak_mib']:>9.1f} {r['peak_mib'] - r['rss_before_mib']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# startup.py
+"""
+Worker startup cost: time to first request and connections opened.
+
+    python -m benchmarks.startup [--workers 8]
+
+Simulates a `uvicorn --workers N` restart: N fresh interpreters start at once,
+each importing app.main, running the lifespan startup and serving GET /
+against an already-migrated SQLite database. Reported per mode (median/max
+over workers): import time, time to first response, and database connections
+opened before that response. The AUTO_CREATE_SCHEMA=1 row shows what every
+worker paid when create_all ran at import.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+WORKER = r"""
+import json, time
+t0 = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+connects = {"n": 0}
+event.listen(Pool, "connect", lambda *a: connects.__setitem__("n", connects["n"] + 1))
+from app.main import app
+imported = time.perf_counter() - t0
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    client.get("/").raise_for_status()
+    first = time.perf_counter() - t0
+print(json.dumps({"import": imported, "first": first, "connects": connects["n"]}))
+"""
+
+
+def run_mode(workers: int, database_url: str, auto_create: bool) -> list:
+    env = dict(os.environ, DATABASE_URL=database_url, OUTBOX_WORKER_ENABLED="0",
+               AUTO_CREATE_SCHEMA="1" if auto_create else "0")
+    procs = [subprocess.Popen([sys.executable, "-c", WORKER], env=env, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True)
+             for _ in range(workers)]
+    results = []
+    for proc in procs:
+        out, _ = proc.communicate()
+        if proc.returncode == 0:
+            results.append(json.loads(out.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='oddo-startup-'), 'bench.db')}"
+    subprocess.run([sys.executable, "-c", "from benchmarks._app import bootstrap; bootstrap()"],
+                   env=dict(os.environ, DATABASE_URL=database_url), check=True, stderr=subprocess.DEVNULL)
+    print(f"{'mode':<22} {'import ms p50/max':>18} {'first req ms p50/max':>21} {'db connects':>12} {'failed':>7}")
+    for label, auto_create in (("migrations (default)", False), ("AUTO_CREATE_SCHEMA=1", True)):
+        rows = run_mode(args.workers, database_url, auto_create)
+        if not rows:
+            print(f"{label:<22} all {args.workers} workers failed")
+            continue
+        imp = [r["import"] * 1000 for r in rows]
+        first = [r["first"] * 1000 for r in rows]
+        print(f"{label:<22} {statistics.median(imp):>9.0f}/{max(imp):<8.0f} "
+              f"{statistics.median(first):>10.0f}/{max(first):<10.0f} {sum(r['connects'] for r in rows):>12} "
+              f"{args.workers - len(rows):>7}")
+
+
+if __name__ == "__main__":
+    main()
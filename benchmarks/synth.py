@@ -0,0 +1,237 @@
+# synth.py
+"""
+Synthetic data generator: bulk-load realistic volumes for benchmarking.
+
+    python -m benchmarks.synth --scale 10 [--years 1] [--database-url sqlite:///big.db]
+
+Everything is inserted with Core executemany in BATCH-row chunks (no ORM
+objects), so 100x loads in seconds on SQLite. Without --database-url a
+throwaway SQLite file is created; pass a MySQL URL to load a scratch MySQL
+schema (it is created with metadata.create_all if empty - never point this at
+a database you care about).
+
+Volumes per unit of --scale (see SCALE_UNIT): users by role, classes,
+projects/sprints/tasks/bugs, assignments and submissions, fee structures with
+one payment per student and term, monthly salaries and expenses, audit logs,
+and one attendance row per user and weekday for --years years (plus its
+attendance_daily rollup, via attendance_rollup.backfill).
+
+The first rows of every table have fixed ids that the endpoint benchmarks use
+in URLs (benchmarks/query_budgets.PATH_PARAMS): user 1 admin@example.com,
+2 student@example.com, 3 staff@example.com, 4 dev@example.com, and class,
+project, sprint, task, assignment and fee structure 1.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+BATCH = 5000
+
+# rows per unit of scale
+SCALE_UNIT = {
+    "students": 30,
+    "staff": 4,
+    "developers": 6,
+    "classes": 2,
+    "projects": 2,
+    "sprints_per_project": 3,
+    "tasks_per_sprint": 5,
+    "assignments_per_class": 5,
+    "expenses_per_month": 10,
+}
+
+FIXED_USERS = (
+    ("admin@example.com", "Admin"),
+    ("student@example.com", "Student"),
+    ("staff@example.com", "Staff"),
+    ("dev@example.com", "Developer"),
+)
+
+
+def _weekdays(end: datetime, years: float):
+    day = (end - timedelta(days=int(365 * years))).replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def _insert(conn, table, rows, counts):
+    """executemany rows into table in BATCH-sized chunks; rows may be a generator."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.execute(insert(table), batch)
+            counts[table.name] = counts.get(table.name, 0) + len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+        counts[table.name] = counts.get(table.name, 0) + len(batch)
+
+
+def load(engine, scale: int = 1, years: float = 1.0, seed: int = 1) -> dict:
+    """Insert scale units of data (see SCALE_UNIT) into an empty schema; returns row counts per table."""
+    from app import attendance_rollup, models
+    from app.config import settings
+    from app.login_ids import normalize
+
+    rnd = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    unit = {k: v * scale for k, v in SCALE_UNIT.items()}
+    counts = {}
+    T = {name: table for name, table in models.Base.metadata.tables.items()}
+
+    # ---------------- users ----------------
+    users = list(FIXED_USERS)
+    for role, key in (("Student", "students"), ("Staff", "staff"), ("Developer", "developers")):
+        users += [(f"{role.lower()}{i}@example.com", role) for i in range(unit[key])]
+    user_rows = [{"id": i, "full_name": email.split("@")[0].title(), "email": email, "password": "!",
+                  "role": role, "is_active": True, "failed_attendance_attempts": 0, "is_blocked": False}
+                 for i, (email, role) in enumerate(users, start=1)]
+    by_role = {}
+    for row in user_rows:
+        by_role.setdefault(row["role"], []).append(row["id"])
+    admin = by_role["Admin"][0]
+
+    with engine.begin() as conn:
+        _insert(conn, T["users"], user_rows, counts)
+        _insert(conn, T["login_identifiers"], ({"user_id": r["id"], "kind": "email", "identifier": normalize(r["email"])}
+                                                for r in user_rows), counts)
+
+        # ---------------- classes and enrolment ----------------
+        class_ids = list(range(1, unit["classes"] + 1))
+        _insert(conn, T["classes"], ({"id": c, "name": f"Class {c}"} for c in class_ids), counts)
+        students = by_role["Student"]
+        staff = by_role["Staff"]
+        enrolled = {s: class_ids[i % len(class_ids)] for i, s in enumerate(students)}
+        _insert(conn, T["student_classes"], ({"student_id": s, "class_id": c} for s, c in enrolled.items()), counts)
+        _insert(conn, T["staff_classes"], ({"staff_id": s, "class_id": class_ids[i % len(class_ids)]}
+                                           for i, s in enumerate(staff)), counts)
+
+        # ---------------- projects / sprints / tasks / bugs ----------------
+        devs = by_role["Developer"]
+        project_ids = list(range(1, unit["projects"] + 1))
+        _insert(conn, T["projects"], ({"id": p, "name": f"Project {p}", "description": "synthetic",
+                                       "deadline": now + timedelta(days=90), "created_at": now}
+                                      for p in project_ids), counts)
+        # dev@example.com is on every project, the rest round-robin
+        _insert(conn, T["project_members"], ({"project_id": p, "user_id": d} for p in project_ids for i, d in enumerate(devs)
+                                             if i == 0 or i % len(project_ids) == p - 1), counts)
+        sprints, tasks = [], []
+        for p in project_ids:
+            for s in range(SCALE_UNIT["sprints_per_project"]):
+                sprint_id = len(sprints) + 1
+                start = now - timedelta(days=14 * (SCALE_UNIT["sprints_per_project"] - s))
+                sprints.append({"id": sprint_id, "name": f"Sprint {s + 1}", "project_id": p,
+                                "start_date": start, "end_date": start + timedelta(days=14)})
+                for t in range(SCALE_UNIT["tasks_per_sprint"]):
+                    tasks.append({"id": len(tasks) + 1, "title": f"Task {len(tasks) + 1}", "description": "synthetic",
+                                  "sprint_id": sprint_id, "assigned_to": rnd.choice(devs),
+                                  "status": rnd.choice(list(models.TaskStatus)), "created_at": start})
+        _insert(conn, T["sprints"], sprints, counts)
+        _insert(conn, T["tasks"], tasks, counts)
+        _insert(conn, T["bugs"], ({"description": f"Bug in task {t['id']}", "task_id": t["id"],
+                                   "status": rnd.choice(["Open", "Closed"]), "created_by": rnd.choice(devs),
+                                   "created_at": now} for t in tasks if t["id"] == 1 or rnd.random() < 0.5), counts)
+
+        # ---------------- assignments / submissions ----------------
+        assignments = []
+        for c in class_ids:
+            for a in range(SCALE_UNIT["assignments_per_class"]):
+                assignments.append({"id": len(assignments) + 1, "title": f"Assignment {len(assignments) + 1}",
+                                    "description": "synthetic", "created_by": admin, "class_id": c,
+                                    "assigned_to_student": None, "due_date": now + timedelta(days=7 * a),
+                                    "created_at": now - timedelta(days=30), "status": models.AssignmentStatus.open})
+        _insert(conn, T["assignments"], assignments, counts)
+        class_students = {}
+        for s, c in enrolled.items():
+            class_students.setdefault(c, []).append(s)
+
+        def submissions():
+            for a in assignments:
+                for s in class_students.get(a["class_id"], ()):
+                    if rnd.random() < 0.7:
+                        graded = rnd.random() < 0.5
+                        yield {"assignment_id": a["id"], "student_id": s, "submitted_at": now - timedelta(days=rnd.randint(0, 30)),
+                               "optional_link": None, "comment": "done", "is_accepted": graded,
+                               "grader_id": rnd.choice(staff) if graded else None,
+                               "graded_at": now if graded else None, "grade_comment": None}
+        _insert(conn, T["assignment_submissions"], submissions(), counts)
+
+        # ---------------- finance ----------------
+        fee_ids = {c: c for c in class_ids}   # one fee structure per class
+        _insert(conn, T["fee_structures"], ({"id": f, "class_id": c, "name": f"Annual fee {c}", "total_amount": 900,
+                                             "terms": 3, "created_at": now} for c, f in fee_ids.items()), counts)
+        _insert(conn, T["payments"], ({"student_id": s, "fee_structure_id": fee_ids[c], "amount": 300,
+                                       "payment_date": now - timedelta(days=120 - 40 * term), "payment_method": "upi",
+                                       "term_no": term, "reference": f"txn-{s}-{term}", "status": "completed",
+                                       "created_by": admin, "created_at": now}
+                                      for s, c in enrolled.items() for term in (1, 2, 3) if rnd.random() < 0.9), counts)
+        months = max(1, int(12 * years))
+        month_starts = [(now.replace(day=1) - timedelta(days=31 * m)).replace(day=1) for m in range(months)]
+        _insert(conn, T["staff_salaries"], ({"staff_id": s, "month": m.strftime("%Y-%m"), "basic": 500, "allowances": 50,
+                                             "deductions": 25, "net_amount": 525,
+                                             "status": "paid" if i else "pending", "paid_date": m if i else None,
+                                             "created_by": admin, "created_at": m}
+                                            for s in staff for i, m in enumerate(month_starts)), counts)
+        _insert(conn, T["expenses"], ({"title": f"Expense {m:%Y-%m} #{e}", "vendor": "Vendor", "amount": rnd.randint(10, 500),
+                                       "expense_date": m + timedelta(days=e % 28),
+                                       "category": rnd.choice(["rent", "supplies", "travel"]), "created_by": admin,
+                                       "created_at": m}
+                                      for m in month_starts for e in range(unit["expenses_per_month"])), counts)
+        _insert(conn, T["audit_logs"], ({"actor_id": admin, "action": "payment.create", "resource_type": "payments",
+                                         "resource_id": i, "details": {"synthetic": True}, "created_at": now}
+                                        for i in range(1, counts.get("payments", 0) + 1)), counts)
+
+        # ---------------- attendance ----------------
+        ip = settings.ALLOWED_IPS.split(",")[0].strip()
+        office = (settings.OFFICE_LAT, settings.OFFICE_LNG)
+        punchers = by_role["Student"] + by_role["Staff"] + by_role["Developer"]
+
+        def attendance():
+            for day in _weekdays(now, years):
+                for uid in punchers:
+                    if rnd.random() < 0.05:
+                        continue   # absent
+                    punch_in = day + timedelta(hours=8, minutes=rnd.randint(30, 90))
+                    yield {"user_id": uid, "date": day, "punch_in_time": punch_in,
+                           "punch_out_time": punch_in + timedelta(hours=8, minutes=rnd.randint(0, 60)),
+                           "latitude": office[0], "longitude": office[1], "ssid": settings.ALLOWED_SSID,
+                           "punch_in_ip": ip, "punch_out_ip": ip, "note": "punch-in", "created_at": punch_in}
+        _insert(conn, T["attendance"], attendance(), counts)
+
+    # derived table, built the way production builds it
+    from sqlalchemy.orm import Session
+    with Session(engine) as db:
+        counts["attendance_daily"] = attendance_rollup.backfill(db)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database-url", default=None, help="default: a throwaway SQLite file")
+    args = parser.parse_args()
+
+    from ._app import bootstrap
+    bootstrap(args.database_url)
+    from app import database
+
+    t0 = time.perf_counter()
+    counts = load(database.engine, args.scale, args.years, args.seed)
+    elapsed = time.perf_counter() - t0
+    for table, n in sorted(counts.items()):
+        print(f"{table:<24} {n:>10}")
+    total = sum(counts.values())
+    print(f"\n{total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s) -> {os.environ['DATABASE_URL']}")
+
+
+if __name__ == "__main__":
+    main()
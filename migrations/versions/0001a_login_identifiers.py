@@ -0,0 +1,44 @@
+"""login identifiers
+
+One row per way a user can log in (email, invite code), with a unique
+identifier, so login resolves a user in one indexed lookup (login_ids.py).
+Backfill existing users with `python -m app.login_ids backfill`.
+
+Revision ID: 0001a
+Revises: 0001
+Create Date: 2026-10-17 07:45:43.023895
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001a'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('login_identifiers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('identifier', sa.String(length=191), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('identifier', name='uq_login_identifiers_identifier')
+    )
+    op.create_index(op.f('ix_login_identifiers_id'), 'login_identifiers', ['id'], unique=False)
+    op.create_index(op.f('ix_login_identifiers_user_id'), 'login_identifiers', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_login_identifiers_user_id'), table_name='login_identifiers')
+    op.drop_index(op.f('ix_login_identifiers_id'), table_name='login_identifiers')
+    op.drop_table('login_identifiers')
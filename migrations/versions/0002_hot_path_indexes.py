@@ -0,0 +1,48 @@
+"""hot path indexes
+
+Indexes for the lookups benchmarks/index_audit.py found scanning whole tables:
+submissions by assignment/student, assignments by class/creator/student,
+attendance history per user (newest first), audit-log history per resource and
+the class side of the class membership tables.
+
+Revision ID: 0002
+Revises: 0001c
+Create Date: 2026-10-17 07:49:03.597649
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_assignment_submissions_assignment_id'), 'assignment_submissions', ['assignment_id'], unique=False)
+    op.create_index(op.f('ix_assignment_submissions_student_id'), 'assignment_submissions', ['student_id'], unique=False)
+    op.create_index(op.f('ix_assignments_assigned_to_student'), 'assignments', ['assigned_to_student'], unique=False)
+    op.create_index(op.f('ix_assignments_class_id'), 'assignments', ['class_id'], unique=False)
+    op.create_index(op.f('ix_assignments_created_by'), 'assignments', ['created_by'], unique=False)
+    op.create_index('ix_attendance_user_punch_in', 'attendance', ['user_id', 'punch_in_time'], unique=False)
+    op.create_index('ix_audit_logs_resource', 'audit_logs', ['resource_type', 'resource_id', 'created_at'], unique=False)
+    op.create_index('ix_staff_classes_class_id', 'staff_classes', ['class_id'], unique=False)
+    op.create_index('ix_student_classes_class_id', 'student_classes', ['class_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_student_classes_class_id', table_name='student_classes')
+    op.drop_index('ix_staff_classes_class_id', table_name='staff_classes')
+    op.drop_index('ix_audit_logs_resource', table_name='audit_logs')
+    op.drop_index('ix_attendance_user_punch_in', table_name='attendance')
+    op.drop_index(op.f('ix_assignments_created_by'), table_name='assignments')
+    op.drop_index(op.f('ix_assignments_class_id'), table_name='assignments')
+    op.drop_index(op.f('ix_assignments_assigned_to_student'), table_name='assignments')
+    op.drop_index(op.f('ix_assignment_submissions_student_id'), table_name='assignment_submissions')
+    op.drop_index(op.f('ix_assignment_submissions_assignment_id'), table_name='assignment_submissions')
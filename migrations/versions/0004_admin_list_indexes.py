@@ -0,0 +1,32 @@
+"""admin list indexes
+
+Keyset pagination for /attendance/admin/all (punch_in_time across users) and
+/attendance/admin/blocked (blocked users by failed attempts).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 08:04:37.171946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_attendance_punch_in', 'attendance', ['punch_in_time'], unique=False)
+    op.create_index('ix_users_blocked_attempts', 'users', ['is_blocked', 'failed_attendance_attempts', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_blocked_attempts', table_name='users')
+    op.drop_index('ix_attendance_punch_in', table_name='attendance')
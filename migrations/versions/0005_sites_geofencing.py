@@ -0,0 +1,57 @@
+"""sites geofencing
+
+Campuses / branch offices for attendance geofencing, and the site each
+punch matched. With no active sites the single OFFICE_* circle from the
+settings keeps applying.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 08:15:15.682169
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sites',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=150), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=False),
+    sa.Column('longitude', sa.Float(), nullable=False),
+    sa.Column('radius_m', sa.Integer(), nullable=False),
+    sa.Column('ssids', sa.JSON(), nullable=True),
+    sa.Column('allowed_ips', sa.JSON(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sites_id', 'sites', ['id'], unique=False)
+
+    # batch mode: SQLite can only add a foreign key by rebuilding the table
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('site_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_attendance_site_id', ['site_id'], unique=False)
+        batch_op.create_foreign_key('fk_attendance_site_id', 'sites', ['site_id'], ['id'], ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('attendance', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_attendance_site_id', type_='foreignkey')
+        batch_op.drop_index('ix_attendance_site_id')
+        batch_op.drop_column('site_id')
+
+    op.drop_index('ix_sites_id', table_name='sites')
+    op.drop_table('sites')
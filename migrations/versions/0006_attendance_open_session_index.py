@@ -0,0 +1,30 @@
+"""attendance open session index
+
+punch-in/punch-out look up a user's open session (punch_out_time IS NULL)
+under the user's row lock; this makes that a single index seek.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 08:19:15.557452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_attendance_open', 'attendance', ['user_id', 'punch_out_time', 'punch_in_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attendance_open', table_name='attendance')
@@ -0,0 +1,30 @@
+"""sites active index
+
+GET /sites/ and the geofence registry read the active sites in id order;
+this serves them from an index instead of scanning the table.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 09:12:40.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_sites_active_id', 'sites', ['is_active', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sites_active_id', table_name='sites')